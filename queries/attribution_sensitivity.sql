@@ -0,0 +1,191 @@
+-- Sensitivity of attribution to the search radius, in one pass
+--
+-- Radius r (km) gives the attribution create_attribution.sql would produce
+-- with its 0.015° (~1.5 km) search literals set to r / 100 and the distance
+-- score decaying to 0 at r km instead of 1.5, scored with the default
+-- profile (scoring_profiles.sql). Candidates are the pairs attribution's own
+-- 1.5 km search kept (emissions.candidate_pairs of candidate_pairs.sql): they
+-- are joined to the list of radii, and nearest facility, operator dominance,
+-- density and confidence are computed for every plume and radius together,
+-- so the 1.5 km rows reproduce emissions.attributed.
+--
+-- Radii come from the sensitivity_radii_km variable (km, at most 1.5), e.g.
+--   duckdb -cmd "SET VARIABLE sensitivity_radii_km = [0.5, 1.0]" data/data.duckdb -f queries/attribution_sensitivity.sql
+--
+-- Output: emissions.attribution_sensitivity, one row per plume and radius
+-- with any facility in range (long format)
+
+INSTALL spatial;
+LOAD spatial;
+
+CREATE OR REPLACE TABLE emissions.attribution_sensitivity AS
+WITH
+radii AS (
+    SELECT
+        radius_km,
+        radius_km / 100 as search_radius  -- degrees, as 0.015 for 1.5 km
+    FROM (
+        SELECT DISTINCT
+            CASE WHEN r::DOUBLE > 1.5
+                 THEN error('Radius ' || r || ' km is beyond the 1.5 km search of emissions.candidate_pairs')
+                 ELSE r::DOUBLE END as radius_km
+        FROM (SELECT UNNEST(COALESCE(getvariable('sensitivity_radii_km'), [0.5, 0.75, 1.0, 1.5])) as r)
+    )
+),
+
+-- The default profile with its distance score reaching 0 at each radius
+scoring AS (
+    SELECT p.* REPLACE (r.radius_km as distance_decay_km), r.radius_km
+    FROM emissions.scoring_profile p
+    CROSS JOIN radii r
+    WHERE p.profile_id = default_scoring_profile()
+),
+
+-- Each candidate pair once per radius it is within (ST_DWithin on lon/lat
+-- points, as the search of create_attribution.sql)
+radius_pairs AS (
+    SELECT
+        c.id, c.source, c.facility_id, c.infra_type, c.facility_subtype, c.operator,
+        c.operator_number, c.operator_id, c.distance_km, r.radius_km
+    FROM emissions.candidate_pair_details c
+    JOIN emissions.sources s ON s.id = c.id
+    JOIN radii r ON ST_DWithin(s.geom, ST_Point(c.longitude, c.latitude), r.search_radius)
+    WHERE c.id IN (SELECT id FROM emissions.attributed)
+),
+
+-- ============================================================================
+-- RRC wells: nearest well, wells and operator wells per plume and radius
+-- ============================================================================
+rrc_nearest_wells AS (
+    SELECT DISTINCT ON (id, radius_km)
+        id,
+        radius_km,
+        facility_id,
+        operator,
+        operator_number,
+        operator_id,
+        distance_km
+    FROM radius_pairs
+    WHERE source = 'rrc'
+    ORDER BY id, radius_km, distance_km, facility_id, operator_number, operator  -- ties broken as in attribution
+),
+
+rrc_well_counts AS (
+    SELECT id, radius_km, COUNT(DISTINCT facility_id) as total_wells_nearby
+    FROM radius_pairs
+    WHERE source = 'rrc'
+    GROUP BY id, radius_km
+),
+
+rrc_operator_counts AS (
+    SELECT id, radius_km, operator_number, COUNT(DISTINCT facility_id) as operator_wells
+    FROM radius_pairs
+    WHERE source = 'rrc'
+    GROUP BY id, radius_km, operator_number
+),
+
+rrc_rows AS (
+    SELECT
+        nw.id,
+        nw.radius_km,
+        nw.facility_id as nearest_facility_id,
+        'well' as nearest_facility_type,
+        NULL as facility_subtype,
+        nw.operator as entity_name,
+        nw.operator_number as entity_id,
+        nw.operator_id,
+        nw.distance_km as distance_to_nearest_facility_km,
+        wc.total_wells_nearby as total_facilities_nearby,
+        oc.operator_wells as operator_facilities_of_type
+    FROM rrc_nearest_wells nw
+    LEFT JOIN rrc_well_counts wc ON nw.id = wc.id AND nw.radius_km = wc.radius_km
+    LEFT JOIN rrc_operator_counts oc
+        ON nw.id = oc.id AND nw.radius_km = oc.radius_km AND nw.operator_number = oc.operator_number
+),
+
+-- ============================================================================
+-- OGIM facilities: nearest facility, facilities and operator facilities of
+-- its type per plume and radius
+-- ============================================================================
+ogim_totals AS (
+    SELECT id, radius_km, COUNT(*) as total_facilities_nearby
+    FROM radius_pairs
+    WHERE source = 'ogim'
+    GROUP BY id, radius_km
+),
+
+ogim_operator_stats AS (
+    SELECT id, radius_km, infra_type, operator, COUNT(*) as operator_facilities_of_type
+    FROM radius_pairs
+    WHERE source = 'ogim'
+    GROUP BY id, radius_km, infra_type, operator
+),
+
+ogim_rows AS (
+    SELECT DISTINCT ON (nf.id, nf.radius_km)
+        nf.id,
+        nf.radius_km,
+        nf.facility_id as nearest_facility_id,
+        nf.infra_type as nearest_facility_type,
+        nf.facility_subtype,
+        nf.operator as entity_name,
+        NULL as entity_id,
+        nf.operator_id,
+        nf.distance_km as distance_to_nearest_facility_km,
+        totals.total_facilities_nearby,
+        op_stats.operator_facilities_of_type
+    FROM radius_pairs nf
+    INNER JOIN ogim_totals totals ON nf.id = totals.id AND nf.radius_km = totals.radius_km
+    INNER JOIN ogim_operator_stats op_stats
+        ON nf.id = op_stats.id
+        AND nf.radius_km = op_stats.radius_km
+        AND nf.operator = op_stats.operator
+        AND nf.infra_type = op_stats.infra_type
+    WHERE nf.source = 'ogim'
+    ORDER BY nf.id, nf.radius_km, nf.distance_km ASC, nf.facility_id, nf.infra_type, nf.operator  -- ties broken as in attribution
+),
+
+-- Closest facility of either source per plume and radius
+nearest AS (
+    SELECT DISTINCT ON (id, radius_km) *
+    FROM (
+        SELECT * FROM rrc_rows
+        UNION ALL
+        SELECT * FROM ogim_rows
+    ) combined
+    ORDER BY id, radius_km, distance_to_nearest_facility_km, nearest_facility_type, nearest_facility_id, entity_name
+)
+
+SELECT
+    n.id,
+    n.radius_km,
+    p.profile_id,
+    n.nearest_facility_id,
+    n.nearest_facility_type,
+    n.facility_subtype,
+    n.entity_name,
+    n.entity_id,
+    n.operator_id,
+    n.distance_to_nearest_facility_km,
+    n.total_facilities_nearby,
+    n.operator_facilities_of_type,
+    dominance_score(p, n.operator_facilities_of_type, n.total_facilities_nearby) as operator_dominance_score,
+    distance_score(p, n.distance_to_nearest_facility_km) as distance_score,
+    density_score(p, n.total_facilities_nearby) as density_score,
+    confidence_score(p, n.operator_facilities_of_type, n.total_facilities_nearby, n.distance_to_nearest_facility_km) as confidence_score
+FROM nearest n
+JOIN scoring p ON p.radius_km = n.radius_km
+ORDER BY n.id, n.radius_km;
+
+-- Summary by radius: how many plumes keep their published facility and operator
+SELECT
+    s.radius_km,
+    COUNT(*) as plumes,
+    ROUND(AVG(s.confidence_score), 1) as avg_confidence,
+    COUNT(*) FILTER (WHERE s.confidence_score >= 75) as high_confidence,
+    COUNT(*) FILTER (WHERE s.nearest_facility_id = a.nearest_facility_id) as same_facility,
+    COUNT(*) FILTER (WHERE s.entity_name = a.entity_name) as same_operator
+FROM emissions.attribution_sensitivity s
+JOIN emissions.attributed a ON a.id = s.id
+GROUP BY s.radius_km
+ORDER BY s.radius_km;
@@ -0,0 +1,76 @@
+-- Plume-facility candidate pairs: every RRC well link and OGIM facility within
+-- the 1.5km search radius of an attributed CH4 plume
+--
+-- create_attribution.sql (or scripts/attribution.py) runs the radius search
+-- for the plumes queued in emissions.pending only and merges their pairs into
+-- emissions.candidate_pairs, next to emissions.attributed. The exports, the
+-- sensitivity sweep and the LNG report read the pairs instead of repeating
+-- the spatial join.
+--
+-- Rows are kept compact: the facility is facility_row, the rowid of its row
+-- in rrc.well_operator (source 'rrc', one row per well-lease link) or
+-- infra.all_facilities (source 'ogim'). Both tables are written once at
+-- stage 1 and copied with the infrastructure database, and a changed
+-- infrastructure database starts data/data.duckdb over (see the Makefile's
+-- data-incremental), so the rowids stay valid for the pairs' lifetime.
+-- emissions.candidate_pair_details joins the facility's type, operator and
+-- location back in.
+--
+-- Run before create_attribution.sql.
+
+INSTALL spatial;
+LOAD spatial;
+
+CREATE SCHEMA IF NOT EXISTS emissions;
+CREATE TABLE IF NOT EXISTS emissions.pending (id VARCHAR PRIMARY KEY);
+
+-- Databases attributed before emissions.candidate_pairs existed have no pairs
+-- for their plumes yet: queue every plume once to fill it
+INSERT OR IGNORE INTO emissions.pending
+SELECT id FROM emissions.sources
+WHERE NOT EXISTS (
+    SELECT 1 FROM duckdb_tables() WHERE schema_name = 'emissions' AND table_name = 'candidate_pairs'
+);
+
+CREATE TABLE IF NOT EXISTS emissions.candidate_pairs (
+  id VARCHAR NOT NULL,                     -- plume id (emissions.sources)
+  source VARCHAR NOT NULL,                 -- 'rrc' or 'ogim'
+  facility_id VARCHAR,                     -- well API (county-unique) or OGIM facility id
+  facility_row BIGINT NOT NULL,            -- rowid in rrc.well_operator or infra.all_facilities
+  operator_id INTEGER,                     -- canonical operator (create_operators.sql)
+  distance_km DOUBLE NOT NULL
+);
+
+-- The pairs with their facility's type, operator and location
+CREATE OR REPLACE VIEW emissions.candidate_pair_details AS
+SELECT
+    c.id,
+    c.source,
+    c.facility_id,
+    'well' as infra_type,
+    NULL::VARCHAR as facility_subtype,
+    w.operator_name as operator,
+    w.operator_number,
+    c.operator_id,
+    ST_Y(w.geom) as latitude,
+    ST_X(w.geom) as longitude,
+    c.distance_km
+FROM emissions.candidate_pairs c
+JOIN rrc.well_operator w ON w.rowid = c.facility_row
+WHERE c.source = 'rrc'
+UNION ALL
+SELECT
+    c.id,
+    c.source,
+    c.facility_id,
+    f.infra_type,
+    f.facility_subtype,
+    f.operator,
+    NULL::INTEGER as operator_number,
+    c.operator_id,
+    f.latitude,
+    f.longitude,
+    c.distance_km
+FROM emissions.candidate_pairs c
+JOIN infra.all_facilities f ON f.rowid = c.facility_row
+WHERE c.source = 'ogim';
@@ -2,93 +2,145 @@
 -- Wells with RRC P-4 data use RRC operator attribution
 -- Wells without P-4 data fall back to OGIM operator data
 -- All other infrastructure uses OGIM operator data
+-- Rows carry the canonical operator_id of either source (create_operators.sql)
+--
+-- Only plumes queued in emissions.pending (new or changed, see
+-- load_emissions.sql) are attributed; their rows are merged into the
+-- persistent emissions.attributed table and the queue is cleared.
+--
+-- The radius search runs once per plume: the pairs it finds are merged into
+-- emissions.candidate_pairs (candidate_pairs.sql, which must run first), which
+-- the exports, the sensitivity sweep and the LNG report read instead of
+-- repeating the spatial join.
+--
+-- Confidence scores use the default profile of scoring_profiles.sql, which
+-- must run first; score_attribution.sql re-scores without this search.
 
 INSTALL spatial;
 LOAD spatial;
 
-DROP TABLE IF EXISTS emissions.attributed;
-
-CREATE TABLE emissions.attributed AS
+-- Every RRC well link and OGIM facility within range of the queued CH4 plumes
+CREATE OR REPLACE TEMP TABLE pending_pairs AS
 WITH
--- ============================================================================
--- TEXAS ATTRIBUTION (RRC-based with purchaser data)
--- ============================================================================
--- Wells that successfully joined to P-4 (have RRC operator data)
-texas_wells_with_rrc AS (
-    SELECT
-        loc.geom,
-        loc.api_county,
-        loc.api_unique,
-        op_org.organization_name as operator_name,
-        p4.operator_number,
-        p4.oil_gas_code,
-        p4.district,
-        p4.lease_rrcid,
-        p4.field_number
-    FROM wellbore.location loc
-    JOIN wellbore.wellid wb ON loc.api_county = wb.api_county
-                            AND loc.api_unique = wb.api_unique
-    JOIN p4.root p4 ON wb.oil_gas_code = p4.oil_gas_code
-                    AND wb.district = p4.district
-                    AND (wb.lease_number = p4.lease_rrcid OR wb.gas_rrcid = p4.lease_rrcid)
-    LEFT JOIN p5.org op_org ON p4.operator_number = op_org.operator_number
-    WHERE loc.geom IS NOT NULL
-),
-
--- Create a set of API numbers for wells handled by RRC
+-- Set of API keys for wells handled by RRC
 rrc_handled_wells AS (
-    SELECT DISTINCT api_county || '-' || api_unique as well_api
-    FROM texas_wells_with_rrc
+    SELECT DISTINCT api_key
+    FROM rrc.well_operator
 ),
 
--- All plumes (will be filtered separately for RRC vs OGIM)
+-- Plumes to search around
 all_plumes AS (
-    SELECT id, geom, emission_auto, emission_uncertainty_auto, datetime
+    SELECT id, geom, grid_x, grid_y
     FROM emissions.sources
     WHERE gas = 'CH4'
+      AND id IN (SELECT id FROM emissions.pending)
 ),
 
--- Spatial join: All plumes to RRC wells within search radius
-rrc_plume_well_pairs AS (
+-- Each plume repeated for its grid cell and the eight around it, so the
+-- spatial joins below are equi-joins on the cell; grid cells are larger than
+-- the search radius, so every facility in range is matched exactly once
+plume_cells AS (
+    SELECT e.*, e.grid_x + dx as cell_x, e.grid_y + dy as cell_y
+    FROM all_plumes e
+    CROSS JOIN (VALUES (-1), (0), (1)) offsets_x(dx)
+    CROSS JOIN (VALUES (-1), (0), (1)) offsets_y(dy)
+),
+
+-- Wells that successfully joined to P-4 (have RRC operator data), built at
+-- stage 1 by create_well_operator.sql: one pair per well-lease link
+rrc_pairs AS (
     SELECT
         e.id,
-        e.emission_auto,
-        e.emission_uncertainty_auto,
-        e.datetime,
-        e.geom as plume_geom,
-        w.api_county || '-' || w.api_unique as well_api,
-        w.operator_name,
+        'rrc' as source,
+        w.api_county || '-' || w.api_unique as facility_id,
+        w.rowid as facility_row,
+        'well' as infra_type,
+        NULL::VARCHAR as facility_subtype,
+        w.operator_name as operator,
         w.operator_number,
-        w.oil_gas_code,
-        w.district,
-        w.lease_rrcid,
-        w.field_number,
+        w.operator_id,
+        ST_Y(w.geom) as latitude,
+        ST_X(w.geom) as longitude,
         ST_Distance_Sphere(e.geom, w.geom) / 1000.0 as distance_km
-    FROM all_plumes e
-    CROSS JOIN texas_wells_with_rrc w
+    FROM plume_cells e
+    JOIN rrc.well_operator w ON w.grid_x = e.cell_x AND w.grid_y = e.cell_y
     WHERE ST_X(w.geom) BETWEEN ST_X(e.geom) - 0.015 AND ST_X(e.geom) + 0.015
       AND ST_Y(w.geom) BETWEEN ST_Y(e.geom) - 0.015 AND ST_Y(e.geom) + 0.015
       AND ST_DWithin(e.geom, w.geom, 0.015)  -- ~1.5km
 ),
 
+-- OGIM facilities, excluding wells that are already handled by RRC
+ogim_pairs AS (
+    SELECT
+        e.id,
+        'ogim' as source,
+        f.facility_id,
+        f.rowid as facility_row,
+        f.infra_type,
+        f.facility_subtype,
+        f.operator,
+        NULL::INTEGER as operator_number,
+        oa.operator_id,
+        f.latitude,
+        f.longitude,
+        ST_Distance_Sphere(e.geom, f.geom) / 1000.0 as distance_km
+    FROM plume_cells e
+    JOIN infra.all_facilities f ON f.grid_x = e.cell_x AND f.grid_y = e.cell_y
+    LEFT JOIN operators.ogim_alias oa ON f.operator = oa.operator
+    WHERE ST_X(f.geom) BETWEEN ST_X(e.geom) - 0.015 AND ST_X(e.geom) + 0.015
+      AND ST_Y(f.geom) BETWEEN ST_Y(e.geom) - 0.015 AND ST_Y(e.geom) + 0.015
+      AND ST_DWithin(e.geom, f.geom, 0.015)
+      AND NOT (f.infra_type = 'well' AND EXISTS (
+          SELECT 1 FROM rrc_handled_wells rrc WHERE rrc.api_key = f.api_key
+      ))
+)
+
+SELECT * FROM rrc_pairs
+UNION ALL
+SELECT * FROM ogim_pairs;
+
+CREATE OR REPLACE TEMP TABLE pending_attributed AS
+WITH
+-- Plumes to attribute, with the columns carried into their rows
+all_plumes AS (
+    SELECT id, geom, emission_auto, emission_uncertainty_auto, datetime
+    FROM emissions.sources
+    WHERE gas = 'CH4'
+      AND id IN (SELECT id FROM emissions.pending)
+),
+
+-- Parameters of the published confidence score (scoring_profiles.sql)
+scoring AS (
+    SELECT * FROM emissions.scoring_profile WHERE profile_id = default_scoring_profile()
+),
+
+-- ============================================================================
+-- TEXAS ATTRIBUTION (RRC-based with purchaser data)
+-- ============================================================================
+-- All plumes to RRC wells within search radius
+rrc_plume_well_pairs AS (
+    SELECT
+        id,
+        facility_id as well_api,
+        operator as operator_name,
+        operator_number,
+        operator_id,
+        distance_km
+    FROM pending_pairs
+    WHERE source = 'rrc'
+),
+
 -- Nearest RRC well per plume
 rrc_nearest_wells AS (
     SELECT DISTINCT ON (id)
         id,
-        emission_auto,
-        emission_uncertainty_auto,
-        datetime,
-        plume_geom,
         well_api,
         operator_name,
         operator_number,
-        oil_gas_code,
-        district,
-        lease_rrcid,
-        field_number,
+        operator_id,
         distance_km
     FROM rrc_plume_well_pairs
-    ORDER BY id, distance_km
+    ORDER BY id, distance_km, well_api, operator_number, operator_name  -- ties broken deterministically
 ),
 
 -- Total RRC well counts per plume
@@ -114,17 +166,18 @@ rrc_operator_counts AS (
 rrc_operator_rows AS (
     SELECT
         nw.id,
-        nw.emission_auto as rate_kg_hr,
-        nw.emission_uncertainty_auto as rate_uncertainty_kg_hr,
-        nw.datetime,
-        ST_Y(nw.plume_geom) as latitude,
-        ST_X(nw.plume_geom) as longitude,
+        e.emission_auto as rate_kg_hr,
+        e.emission_uncertainty_auto as rate_uncertainty_kg_hr,
+        e.datetime,
+        ST_Y(e.geom) as latitude,
+        ST_X(e.geom) as longitude,
         nw.well_api as nearest_facility_id,
         'well' as nearest_facility_type,
         NULL as facility_subtype,
         'operator' as entity_type,
         nw.operator_name as entity_name,
         nw.operator_number as entity_id,
+        nw.operator_id,
         nw.distance_km as distance_to_nearest_facility_km,
         wc.total_wells_nearby as total_facilities_nearby,
         wc.total_wells_nearby as wells_nearby,
@@ -132,16 +185,10 @@ rrc_operator_rows AS (
         0 as processing_nearby,
         0 as tanks_nearby,
         oc.operator_wells as operator_facilities_of_type,
-        ROUND(
-            -- Operator Dominance (0-50)
-            (oc.operator_wells::FLOAT / NULLIF(wc.total_wells_nearby, 0)) * 50 +
-            -- Distance (0-35)
-            GREATEST(0, 35 * (1 - (nw.distance_km / 1.5))) +
-            -- Density (5-15): inverse log scale, fewer facilities = higher score
-            LEAST(15, GREATEST(5, 15 - LOG(GREATEST(1, wc.total_wells_nearby)) * 3)),
-            1
-        ) as confidence_score
+        confidence_score(p, oc.operator_wells, wc.total_wells_nearby, nw.distance_km) as confidence_score
     FROM rrc_nearest_wells nw
+    JOIN all_plumes e ON e.id = nw.id
+    CROSS JOIN scoring p
     LEFT JOIN rrc_well_counts wc ON nw.id = wc.id
     LEFT JOIN rrc_operator_counts oc ON nw.id = oc.id AND nw.operator_number = oc.operator_number
 ),
@@ -149,30 +196,18 @@ rrc_operator_rows AS (
 -- ============================================================================
 -- OGIM ATTRIBUTION (Nationwide, excludes wells already handled by RRC)
 -- ============================================================================
--- Find OGIM facilities within search radius of plumes
--- Exclude wells that are already handled by RRC using NOT EXISTS
+-- OGIM facilities within search radius of plumes
 ogim_nearby_facilities AS (
     SELECT
-        e.id as emission_id,
-        e.geom as emission_geom,
-        e.emission_auto,
-        e.emission_uncertainty_auto,
-        e.datetime,
-        f.facility_id,
-        f.infra_type,
-        f.operator,
-        f.facility_subtype,
-        f.geom as facility_geom,
-        ST_Distance_Sphere(e.geom, f.geom) / 1000.0 as distance_km
-    FROM all_plumes e
-    CROSS JOIN infra.all_facilities f
-    WHERE ST_X(f.geom) BETWEEN ST_X(e.geom) - 0.015 AND ST_X(e.geom) + 0.015
-      AND ST_Y(f.geom) BETWEEN ST_Y(e.geom) - 0.015 AND ST_Y(e.geom) + 0.015
-      AND ST_DWithin(e.geom, f.geom, 0.015)
-      -- Exclude wells that are already handled by RRC
-      AND NOT (f.infra_type = 'well' AND EXISTS (
-          SELECT 1 FROM rrc_handled_wells rrc WHERE rrc.well_api = f.facility_id
-      ))
+        id as emission_id,
+        facility_id,
+        infra_type,
+        operator,
+        operator_id,
+        facility_subtype,
+        distance_km
+    FROM pending_pairs
+    WHERE source = 'ogim'
 ),
 
 -- Total facility counts for all plumes
@@ -208,13 +243,10 @@ ogim_operator_stats AS (
 ogim_best_matches AS (
     SELECT DISTINCT ON (nf.emission_id)
         nf.emission_id,
-        nf.emission_auto,
-        nf.emission_uncertainty_auto,
-        nf.datetime,
-        nf.emission_geom,
         nf.facility_id,
         nf.infra_type,
         nf.operator,
+        nf.operator_id,
         nf.facility_subtype,
         nf.distance_km,
         totals.total_facilities_nearby,
@@ -227,34 +259,32 @@ ogim_best_matches AS (
         totals.stations_nearby,
         totals.lng_nearby,
         totals.refineries_nearby,
-        op_stats.operator_facilities_of_type,
-        GREATEST(0, 35 * (1 - (nf.distance_km / 1.5))) as distance_score,
-        LEAST(50, 50 * (CAST(op_stats.operator_facilities_of_type AS FLOAT) / NULLIF(totals.total_facilities_nearby, 0))) as operator_dominance_score,
-        LEAST(15, GREATEST(5, 15 - LOG(GREATEST(1, totals.total_facilities_nearby)) * 3)) as density_score
+        op_stats.operator_facilities_of_type
     FROM ogim_nearby_facilities nf
     INNER JOIN ogim_totals totals ON nf.emission_id = totals.emission_id
     INNER JOIN ogim_operator_stats op_stats
         ON nf.emission_id = op_stats.emission_id
         AND nf.operator = op_stats.operator
         AND nf.infra_type = op_stats.infra_type
-    ORDER BY nf.emission_id, nf.distance_km ASC
+    ORDER BY nf.emission_id, nf.distance_km ASC, nf.facility_id, nf.infra_type, nf.operator  -- ties broken deterministically
 ),
 
 -- OGIM operator rows (one row per plume)
 ogim_operator_rows AS (
     SELECT
         bm.emission_id as id,
-        bm.emission_auto as rate_kg_hr,
-        bm.emission_uncertainty_auto as rate_uncertainty_kg_hr,
-        bm.datetime,
-        ST_Y(bm.emission_geom) as latitude,
-        ST_X(bm.emission_geom) as longitude,
+        e.emission_auto as rate_kg_hr,
+        e.emission_uncertainty_auto as rate_uncertainty_kg_hr,
+        e.datetime,
+        ST_Y(e.geom) as latitude,
+        ST_X(e.geom) as longitude,
         bm.facility_id as nearest_facility_id,
         bm.infra_type as nearest_facility_type,
         bm.facility_subtype,
         'operator' as entity_type,
         bm.operator as entity_name,
         NULL as entity_id,  -- OGIM doesn't have numeric IDs
+        bm.operator_id,
         bm.distance_km as distance_to_nearest_facility_km,
         bm.total_facilities_nearby,
         bm.wells_nearby,
@@ -262,11 +292,10 @@ ogim_operator_rows AS (
         bm.processing_nearby,
         bm.tanks_nearby,
         bm.operator_facilities_of_type,
-        ROUND(
-            bm.distance_score + bm.operator_dominance_score + bm.density_score,
-            1
-        ) as confidence_score
+        confidence_score(p, bm.operator_facilities_of_type, bm.total_facilities_nearby, bm.distance_km) as confidence_score
     FROM ogim_best_matches bm
+    JOIN all_plumes e ON e.id = bm.emission_id
+    CROSS JOIN scoring p
 )
 
 -- Combine all attribution rows (RRC wells with P-4 data + OGIM for everything else)
@@ -277,13 +306,37 @@ FROM (
     UNION ALL
     SELECT * FROM ogim_operator_rows
 ) combined
-ORDER BY id, distance_to_nearest_facility_km;
+ORDER BY id, distance_to_nearest_facility_km, nearest_facility_type, nearest_facility_id, entity_name;
+
+-- Merge into the persistent attribution and candidate pair tables: replace
+-- rows of re-attributed plumes and drop rows of plumes no longer in
+-- emissions.sources
+CREATE TABLE IF NOT EXISTS emissions.attributed AS
+SELECT * FROM pending_attributed WITH NO DATA;
+
+BEGIN TRANSACTION;
+-- Without the default scoring profile no plume has a row: abort the merge,
+-- keeping the queue, rather than drop the queued plumes' rows
+SELECT error('Default scoring profile ' || default_scoring_profile() || ' is missing: run queries/scoring_profiles.sql')
+WHERE NOT EXISTS (SELECT 1 FROM emissions.scoring_profile WHERE profile_id = default_scoring_profile());
+DELETE FROM emissions.attributed
+WHERE id IN (SELECT id FROM emissions.pending)
+   OR id NOT IN (SELECT id FROM emissions.sources);
+INSERT INTO emissions.attributed SELECT * FROM pending_attributed;
+DELETE FROM emissions.candidate_pairs
+WHERE id IN (SELECT id FROM emissions.pending)
+   OR id NOT IN (SELECT id FROM emissions.sources);
+INSERT INTO emissions.candidate_pairs
+SELECT id, source, facility_id, facility_row, operator_id, distance_km FROM pending_pairs;
+DELETE FROM emissions.pending;
+COMMIT;
 
 -- Create indexes
-CREATE INDEX idx_attributed_entity_name ON emissions.attributed (entity_name);
-CREATE INDEX idx_attributed_entity_type ON emissions.attributed (entity_type);
-CREATE INDEX idx_attributed_facility_type ON emissions.attributed (nearest_facility_type);
-CREATE INDEX idx_attributed_confidence ON emissions.attributed (confidence_score);
+CREATE INDEX IF NOT EXISTS idx_attributed_entity_name ON emissions.attributed (entity_name);
+CREATE INDEX IF NOT EXISTS idx_attributed_operator_id ON emissions.attributed (operator_id);
+CREATE INDEX IF NOT EXISTS idx_attributed_entity_type ON emissions.attributed (entity_type);
+CREATE INDEX IF NOT EXISTS idx_attributed_facility_type ON emissions.attributed (nearest_facility_type);
+CREATE INDEX IF NOT EXISTS idx_attributed_confidence ON emissions.attributed (confidence_score);
 
 -- Summary statistics
 SELECT
@@ -291,7 +344,7 @@ SELECT
     COUNT(DISTINCT id) as attributed_plumes,
     ROUND(AVG(confidence_score), 1) as avg_confidence,
     ROUND(AVG(distance_to_nearest_facility_km), 2) as avg_distance_km,
-    COUNT(DISTINCT entity_name) as unique_operators
+    COUNT(DISTINCT operator_id) as unique_operators
 FROM emissions.attributed
 WHERE entity_name IS NOT NULL
 GROUP BY nearest_facility_type
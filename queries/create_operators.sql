@@ -0,0 +1,105 @@
+-- Canonical operator identities across Texas RRC P-5 and OGIM
+-- Every P-5 operator number and every OGIM operator string is an alias of one
+-- integer operator_id; names that normalize to the same key (upper case,
+-- punctuation and company suffixes stripped) share it. Ids are never
+-- reassigned: each run only adds operators for keys not seen before and
+-- points new or renamed aliases at them, so rrc-update keeps existing ids.
+-- Run after load_p5.sql and load_ogim.sql, before create_well_operator.sql.
+
+-- Normalized company name: upper case, without parenthetical notes ("f/k/a
+-- ...", short names), punctuation or legal-form suffixes
+CREATE OR REPLACE MACRO normalize_entity_name(name) AS
+  trim(regexp_replace(
+    regexp_replace(
+      regexp_replace(
+        regexp_replace(upper(name), '\([^)]*\)?', ' ', 'g'),
+        '[^A-Z0-9]+', ' ', 'g'),
+      '\b(LLC|L L C|INC|INCORPORATED|CORP|CORPORATION|CO|COMPANY|LP|L P|LLP|LTD|LIMITED|PLC|THE)\b', ' ', 'g'),
+    ' +', ' ', 'g'));
+
+CREATE SCHEMA IF NOT EXISTS operators;
+
+CREATE TABLE IF NOT EXISTS operators.operator (
+  operator_id INTEGER PRIMARY KEY,
+  operator_key VARCHAR NOT NULL UNIQUE,    -- normalize_entity_name of its aliases
+  canonical_name VARCHAR                   -- P-5 name if any, else the commonest OGIM spelling
+);
+
+-- P-5 operator number -> operator
+CREATE TABLE IF NOT EXISTS operators.p5_alias (
+  operator_number INTEGER PRIMARY KEY,
+  operator_id INTEGER NOT NULL
+);
+
+-- OGIM operator string (infra.all_facilities.operator as written) -> operator
+CREATE TABLE IF NOT EXISTS operators.ogim_alias (
+  operator VARCHAR PRIMARY KEY,
+  operator_id INTEGER NOT NULL
+);
+
+-- Every current alias with its normalized key
+CREATE OR REPLACE TEMP TABLE operator_names AS
+SELECT *
+FROM (
+    SELECT
+        'p5' as source,
+        operator_number,
+        NULL::VARCHAR as operator,
+        organization_name as name,
+        NULL::BIGINT as facilities,
+        normalize_entity_name(organization_name) as operator_key
+    FROM (
+        SELECT DISTINCT ON (operator_number) operator_number, organization_name
+        FROM p5.org
+        ORDER BY operator_number, organization_name
+    ) org
+    UNION ALL
+    SELECT 'ogim', NULL, operator, operator, COUNT(*), normalize_entity_name(operator)
+    FROM infra.all_facilities
+    WHERE operator IS NOT NULL
+    GROUP BY operator
+) names
+WHERE operator_key IS NOT NULL
+  AND operator_key != '';
+
+-- New operators, numbered after the existing ones in key order
+INSERT INTO operators.operator
+SELECT
+    (SELECT COALESCE(MAX(operator_id), 0) FROM operators.operator)
+        + row_number() OVER (ORDER BY operator_key) as operator_id,
+    operator_key,
+    canonical_name
+FROM (
+    SELECT
+        operator_key,
+        COALESCE(
+            first(name ORDER BY operator_number) FILTER (WHERE source = 'p5'),
+            first(name ORDER BY facilities DESC, name) FILTER (WHERE source = 'ogim')
+        ) as canonical_name
+    FROM operator_names
+    WHERE operator_key NOT IN (SELECT operator_key FROM operators.operator)
+    GROUP BY operator_key
+) new_operators;
+
+-- Point every alias at its key's operator (renamed P-5 numbers move)
+INSERT OR REPLACE INTO operators.p5_alias
+SELECT n.operator_number, o.operator_id
+FROM operator_names n
+JOIN operators.operator o ON n.operator_key = o.operator_key
+WHERE n.source = 'p5';
+
+INSERT OR REPLACE INTO operators.ogim_alias
+SELECT n.operator, o.operator_id
+FROM operator_names n
+JOIN operators.operator o ON n.operator_key = o.operator_key
+WHERE n.source = 'ogim';
+
+-- Show summary
+SELECT 'Operators' as metric, COUNT(*) as count FROM operators.operator
+UNION ALL
+SELECT 'P-5 operator numbers', COUNT(*) FROM operators.p5_alias
+UNION ALL
+SELECT 'OGIM operator strings', COUNT(*) FROM operators.ogim_alias
+UNION ALL
+SELECT 'Operators with both P-5 and OGIM aliases', COUNT(*)
+FROM (SELECT operator_id FROM operators.p5_alias INTERSECT SELECT operator_id FROM operators.ogim_alias);
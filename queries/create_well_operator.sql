@@ -0,0 +1,46 @@
+-- Materialize the RRC well -> operator mapping used by attribution
+-- One row per located well bore and P-4 lease it links to (a well can link to
+-- more than one lease). Only changes when the RRC data is reloaded, so it is
+-- built once at stage 1 instead of in every attribution run. operator_id is
+-- the canonical operator (create_operators.sql, run first).
+
+INSTALL spatial;
+LOAD spatial;
+
+DROP SCHEMA IF EXISTS rrc CASCADE;
+CREATE SCHEMA rrc;
+
+CREATE TABLE rrc.well_operator AS
+SELECT
+    api_key(loc.api_county, loc.api_unique) as api_key,
+    loc.api_county,
+    loc.api_unique,
+    loc.geom,
+    loc.grid_x,
+    loc.grid_y,
+    op_org.organization_name as operator_name,
+    p4.operator_number,
+    op.operator_id,
+    p4.oil_gas_code,
+    p4.district,
+    p4.lease_rrcid,
+    p4.field_number
+FROM wellbore.location loc
+JOIN wellbore.wellid wb ON loc.api_county = wb.api_county
+                        AND loc.api_unique = wb.api_unique
+JOIN p4.root p4 ON wb.oil_gas_code = p4.oil_gas_code
+                AND wb.district = p4.district
+                AND (wb.lease_number = p4.lease_rrcid OR wb.gas_rrcid = p4.lease_rrcid)
+LEFT JOIN p5.org op_org ON p4.operator_number = op_org.operator_number
+LEFT JOIN operators.p5_alias op ON p4.operator_number = op.operator_number
+WHERE loc.geom IS NOT NULL;
+
+CREATE INDEX idx_well_operator_geom ON rrc.well_operator USING RTREE (geom);
+CREATE INDEX idx_well_operator_api_key ON rrc.well_operator (api_key);
+
+-- Show summary
+SELECT 'Well-lease links' as metric, COUNT(*) as count FROM rrc.well_operator
+UNION ALL
+SELECT 'Wells with RRC operator', COUNT(DISTINCT api_key) FROM rrc.well_operator
+UNION ALL
+SELECT 'Operators', COUNT(DISTINCT operator_number) FROM rrc.well_operator;
@@ -1,6 +1,9 @@
 -- Export infrastructure within 1.5km of super-emitter plumes
+-- The candidate pairs attribution considered (emissions.candidate_pairs of
+-- candidate_pairs.sql): RRC wells with their P-4 operator, OGIM facilities
+-- for everything else
 WITH plume_locations AS (
-  SELECT id, latitude, longitude
+  SELECT id
   FROM emissions.attributed
   WHERE rate_kg_hr >= 100
     AND confidence_score >= 75
@@ -8,23 +11,15 @@ WITH plume_locations AS (
   ORDER BY datetime DESC
   LIMIT 500
 )
-SELECT
-  p.id as plume_id,
-  f.facility_id,
-  f.infra_type,
-  f.operator,
-  f.facility_subtype,
-  ST_Y(f.geom) as latitude,
-  ST_X(f.geom) as longitude,
-  ROUND(ST_Distance_Sphere(
-    ST_Point(p.longitude, p.latitude),
-    f.geom
-  ), 0) as distance_m
-FROM plume_locations p
-CROSS JOIN infra.all_facilities f
-WHERE ST_DWithin(
-  ST_Point(p.longitude, p.latitude),
-  f.geom,
-  0.015
-)
-ORDER BY p.id, distance_m
+SELECT DISTINCT
+  c.id as plume_id,
+  c.facility_id,
+  c.infra_type,
+  c.operator,
+  c.facility_subtype,
+  c.latitude,
+  c.longitude,
+  ROUND(c.distance_km * 1000, 0) as distance_m
+FROM emissions.candidate_pair_details c
+WHERE c.id IN (SELECT id FROM plume_locations)
+ORDER BY plume_id, distance_m, facility_id, operator
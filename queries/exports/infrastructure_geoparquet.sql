@@ -0,0 +1,26 @@
+-- Export infrastructure within 1.5km of every attributed plume as GeoParquet
+--
+-- Each facility of the candidate pairs of infrastructure.sql for all plumes,
+-- not just the top 500, once however many plumes it is near, in Hilbert curve
+-- order of the facility locations (see plumes_geoparquet.sql). Which plumes a
+-- facility is near, and how far, is infrastructure_links.sql. A facility_id
+-- can have several rows: a well on more than one lease, with each lease's
+-- operator.
+WITH facilities AS (
+  SELECT DISTINCT
+    c.facility_id,
+    c.infra_type,
+    c.operator,
+    c.facility_subtype,
+    c.latitude,
+    c.longitude,
+    ST_Point(c.longitude, c.latitude) as geom
+  FROM emissions.candidate_pair_details c
+  WHERE c.id IN (SELECT id FROM emissions.attributed)
+)
+SELECT
+  * EXCLUDE (geom),
+  ST_AsWKB(geom) as geometry,
+  {'xmin': longitude, 'ymin': latitude, 'xmax': longitude, 'ymax': latitude} as bbox
+FROM facilities
+ORDER BY ST_Hilbert(geom, (SELECT ST_Extent(ST_Extent_Agg(geom)) FROM facilities)), facility_id, infra_type, operator
@@ -0,0 +1,11 @@
+-- Export the plume-facility pairs behind infrastructure_geoparquet.sql
+--
+-- One thin row per attributed plume and facility within 1.5km of it, by
+-- plume: join facility_id to data/infrastructure.parquet for the facility.
+SELECT DISTINCT
+  c.id as plume_id,
+  c.facility_id,
+  ROUND(c.distance_km * 1000, 0) as distance_m
+FROM emissions.candidate_pairs c
+WHERE c.id IN (SELECT id FROM emissions.attributed)
+ORDER BY plume_id, distance_m, facility_id
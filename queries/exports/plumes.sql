@@ -2,6 +2,7 @@
 SELECT
   id,
   entity_name as operator,
+  operator_id,
   rate_kg_hr,
   datetime,
   latitude,
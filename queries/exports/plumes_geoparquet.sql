@@ -0,0 +1,16 @@
+-- Export every attributed plume as GeoParquet, in Hilbert curve order
+--
+-- No top-500 cut as in plumes.sql: scripts/export_geoparquet.py writes the
+-- rows in small row groups, and the Hilbert order keeps each row group to a
+-- compact area, so the min/max statistics of the bbox covering column let
+-- clients fetch only the row groups in view with HTTP range requests.
+WITH plumes AS (
+  SELECT *, ST_Point(longitude, latitude) as geom
+  FROM emissions.attributed
+)
+SELECT
+  * EXCLUDE (geom),
+  ST_AsWKB(geom) as geometry,
+  {'xmin': longitude, 'ymin': latitude, 'xmax': longitude, 'ymax': latitude} as bbox
+FROM plumes
+ORDER BY ST_Hilbert(geom, (SELECT ST_Extent(ST_Extent_Agg(geom)) FROM plumes)), id
@@ -1,15 +1,11 @@
 -- LNG Feedgas Supply Attribution Query
--- Joins attributed plumes with operators AND purchasers, then fuzzy-matches to LNG sellers
+-- Joins attributed plumes with operators AND purchasers, then looks up their
+-- fuzzy matches to LNG sellers (cached by match_lng_sellers.sql, run it first)
 -- Returns one row per emission source with summarized LNG supplier matches
 
--- Load LNG contracts
-WITH lng_contracts AS (
-    SELECT * FROM read_csv_auto('data/supply-contracts-gemini-2-5-pro.csv')
-),
-
 -- Get best plume attribution (one row per plume) with operator
 -- Filter to high-confidence matches (>= 75) and select best match per plume
-plume_info AS (
+WITH plume_info AS (
     SELECT DISTINCT ON (id)
         id,
         rate_kg_hr,
@@ -30,30 +26,33 @@ plume_info AS (
     ORDER BY id, confidence_score DESC, distance_to_nearest_facility_km ASC
 ),
 
--- Get Texas well details for purchaser lookup
+-- Get Texas well details for purchaser lookup: the API number of the RRC
+-- well the plume was attributed to, from its candidate pair
+-- (candidate_pairs.sql), or parsed from the id of an OGIM well
 texas_wells AS (
     SELECT DISTINCT
         a.id,
-        a.nearest_facility_id,
-        SPLIT_PART(a.nearest_facility_id, '-', 1) as api_county,
-        SPLIT_PART(a.nearest_facility_id, '-', 2) as api_unique
+        COALESCE(w.api_key, parse_api_key(a.nearest_facility_id)) as api_key
     FROM emissions.attributed a
+    LEFT JOIN emissions.candidate_pairs c
+        ON c.id = a.id
+        AND c.source = 'rrc'
+        AND c.facility_id = a.nearest_facility_id
+    LEFT JOIN rrc.well_operator w ON w.rowid = c.facility_row
     WHERE a.nearest_facility_type = 'well'
-      AND a.nearest_facility_id LIKE '%-%'  -- Texas API format
+      AND COALESCE(w.api_key, parse_api_key(a.nearest_facility_id)) IS NOT NULL  -- Texas API format
 ),
 
 -- Join to wellbore data to get RRC identifiers
 well_rrc_ids AS (
     SELECT
         tw.id,
-        tw.nearest_facility_id,
         wb.oil_gas_code,
         wb.district,
         COALESCE(wb.lease_number, wb.gas_rrcid) as lease_rrcid
     FROM texas_wells tw
     JOIN wellbore.wellid wb
-        ON tw.api_county = wb.api_county
-        AND tw.api_unique = wb.api_unique
+        ON tw.api_key = api_key(wb.api_county, wb.api_unique)
 ),
 
 -- Get purchasers for Texas wells
@@ -89,19 +88,18 @@ all_entities AS (
     FROM texas_purchasers
 ),
 
--- Fuzzy match all entities (operators + purchasers) to LNG sellers
+-- Fuzzy matches of all entities (operators + purchasers) to LNG sellers
 entity_matches AS (
     SELECT
         e.id,
         e.entity_type,
         e.entity_name,
-        c.Seller as matched_seller,
-        c.LNG_Project,
-        ROUND(jaro_winkler_similarity(UPPER(e.entity_name), UPPER(c.Seller)), 3) as similarity_score
+        s.seller as matched_seller,
+        ROUND(m.similarity, 3) as similarity_score
     FROM all_entities e
-    CROSS JOIN lng_contracts c
+    JOIN lng.entity_seller_match m ON m.entity_key = normalize_entity_name(e.entity_name)
+    JOIN lng.sellers s ON s.seller_key = m.seller_key
     WHERE e.entity_name IS NOT NULL
-      AND jaro_winkler_similarity(UPPER(e.entity_name), UPPER(c.Seller)) > 0.85
 ),
 
 -- Deduplicate matches (unique entity_type + entity_name + matched_seller combinations)
@@ -1,11 +1,20 @@
 -- Load plumes data from Carbon Mapper CSV
+-- Upserts by plume id, so it can run against a database from a previous run:
+-- plumes that are new, or whose modified time or emission version changed, are
+-- (re)loaded and queued in emissions.pending for create_attribution.sql, and
+-- plumes no longer in the export are removed. On an empty database every plume
+-- is new.
 
 -- Load spatial extension (if not already loaded)
 INSTALL spatial;
 LOAD spatial;
 
--- Load CSV directly into emissions.sources table
-INSERT INTO emissions.sources
+-- Plume ids awaiting (re)attribution
+CREATE TABLE IF NOT EXISTS emissions.pending (
+  id VARCHAR PRIMARY KEY
+);
+
+CREATE OR REPLACE TEMP TABLE incoming AS
 SELECT
     plume_id as id,
     ST_Point(plume_longitude, plume_latitude) as geom,
@@ -33,12 +42,36 @@ SELECT
     TRY_CAST(published_at AS TIMESTAMP) as published_at,
     TRY_CAST(modified AS TIMESTAMP) as modified,
     emission_version,
-    processing_software
+    processing_software,
+    grid_cell(plume_longitude) as grid_x,
+    grid_cell(plume_latitude) as grid_y
 FROM read_csv_auto('data/plumes_latest.csv', header=true);
 
+-- Queue new and changed plumes
+INSERT OR IGNORE INTO emissions.pending
+SELECT i.id
+FROM incoming i
+WHERE NOT EXISTS (
+    SELECT 1 FROM emissions.sources s
+    WHERE s.id = i.id
+      AND s.modified IS NOT DISTINCT FROM i.modified
+      AND s.emission_version IS NOT DISTINCT FROM i.emission_version
+);
+
+-- Replace changed plumes and drop plumes missing from the export
+DELETE FROM emissions.sources
+WHERE id IN (SELECT id FROM emissions.pending)
+   OR id NOT IN (SELECT id FROM incoming);
+
+INSERT INTO emissions.sources
+SELECT * FROM incoming
+WHERE id IN (SELECT id FROM emissions.pending);
+
 -- Show summary
 SELECT 'Total plumes' as metric, COUNT(*) as count FROM emissions.sources
 UNION ALL
+SELECT 'New or changed plumes', COUNT(*) FROM emissions.pending
+UNION ALL
 SELECT 'CH4 plumes', COUNT(*) FROM emissions.sources WHERE gas = 'CH4'
 UNION ALL
 SELECT 'CO2 plumes', COUNT(*) FROM emissions.sources WHERE gas = 'CO2'
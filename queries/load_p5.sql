@@ -1,20 +1,5 @@
--- Load P-5 Organization Report data into DuckDB
-
--- Load Record Type 'A ': Organization information
-INSERT INTO p5.org
-SELECT * FROM read_csv_auto('/tmp/p5_org.csv');
-
--- Load Record Type 'F ': Specialty codes
-INSERT INTO p5.specialty
-SELECT * FROM read_csv_auto('/tmp/p5_specialty.csv');
-
--- Load Record Type 'K ': Officer information
-INSERT INTO p5.officer
-SELECT * FROM read_csv_auto('/tmp/p5_officer.csv');
-
--- Load Record Type 'U ': Activity indicators
-INSERT INTO p5.activity
-SELECT * FROM read_csv_auto('/tmp/p5_activity.csv');
+-- Summarize P-5 Organization Report data in DuckDB
+-- Rows are appended directly by scripts/create_p5_db.py as Arrow record batches
 
 -- Show summary
 SELECT 'Organization records' as metric, COUNT(*) as count FROM p5.org
@@ -1,49 +1,6 @@
--- Load Well Bore data into DuckDB
--- Note: Tables are created in schema.sql, this just inserts data
-
--- Load Well Bore root table
-INSERT INTO wellbore.root
-SELECT * FROM read_csv_auto('/tmp/wellbore_root.csv');
-
--- Load Well Bore location table (use all_varchar then cast to handle embedded quotes)
-INSTALL spatial;
-LOAD spatial;
-
-INSERT INTO wellbore.location
-SELECT
-    CAST(api_county AS INTEGER) as api_county,
-    CAST(api_unique AS INTEGER) as api_unique,
-    CAST(loc_county AS INTEGER) as loc_county,
-    abstract,
-    survey,
-    block_number,
-    section,
-    alt_section,
-    alt_abstract,
-    CAST(feet_from_sur_sect_1 AS INTEGER) as feet_from_sur_sect_1,
-    direc_from_sur_sect_1,
-    CAST(feet_from_sur_sect_2 AS INTEGER) as feet_from_sur_sect_2,
-    direc_from_sur_sect_2,
-    CAST(wgs84_latitude AS DOUBLE) as wgs84_latitude,
-    -ABS(CAST(wgs84_longitude AS DOUBLE)) as wgs84_longitude,  -- Texas longitudes are negative (western hemisphere)
-    -- Create geometry point, handling zero coordinates
-    CASE
-        WHEN CAST(wgs84_latitude AS DOUBLE) != 0 AND CAST(wgs84_longitude AS DOUBLE) != 0
-        THEN ST_Point(-ABS(CAST(wgs84_longitude AS DOUBLE)), CAST(wgs84_latitude AS DOUBLE))
-        ELSE NULL
-    END as geom,
-    CAST(plane_zone AS INTEGER) as plane_zone,
-    CAST(plane_coordinate_east AS DOUBLE) as plane_coordinate_east,
-    CAST(plane_coordinate_north AS DOUBLE) as plane_coordinate_north,
-    verification_flag
-FROM read_csv('/tmp/wellbore_location.csv',
-    header=true,
-    all_varchar=true,
-    ignore_errors=true);
-
--- Load Well Bore Well-ID table (links API to RRC lease IDs)
-INSERT INTO wellbore.wellid
-SELECT * FROM read_csv_auto('/tmp/wellbore_wellid.csv');
+-- Summarize Well Bore data in DuckDB
+-- Rows (including location geometries) are appended directly by
+-- scripts/create_wellbore_db.py as Arrow record batches
 
 -- Show summary
 SELECT 'Well bores' as metric, COUNT(*) as count FROM wellbore.root
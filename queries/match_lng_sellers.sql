@@ -0,0 +1,99 @@
+-- Match operator and purchaser names to LNG contract sellers
+-- Names are normalized once (upper case, punctuation and company suffixes
+-- stripped) and each name is only scored against sellers sharing a word or
+-- its first two letters, instead of every entity x contract pair. Matches are
+-- cached by normalized name in lng.entity_seller_match, so a run only scores
+-- names it has not seen before; the cache is reset when the seller list
+-- changes. Run before generate_output.sql; normalize_entity_name is defined at
+-- stage 1 by create_operators.sql.
+
+-- Blocking keys of a normalized name: its first two letters (Jaro-Winkler
+-- weights the prefix, so close matches share it) and its distinctive words;
+-- industry words shared by most names would put everything in one block
+CREATE OR REPLACE TEMP MACRO blocking_keys(name_key) AS
+  list_distinct(list_append(
+    list_filter(string_split(name_key, ' '), lambda word: length(word) >= 3 AND NOT list_contains([
+      'AMERICA', 'COMMODITIES', 'ENERGY', 'EXPLORATION', 'GAS', 'HOLDINGS', 'LINE', 'MARKETING',
+      'MIDSTREAM', 'NATURAL', 'NORTH', 'OIL', 'OPERATING', 'PARTNERS', 'PETROLEUM', 'PIPE',
+      'PIPELINE', 'PRODUCTION', 'PRODUCTS', 'RESOURCES', 'SERVICES', 'SUPPLY', 'TEXAS',
+      'TRADING', 'USA'], word)),
+    'prefix:' || left(name_key, 2)));
+
+CREATE SCHEMA IF NOT EXISTS lng;
+
+CREATE TABLE IF NOT EXISTS lng.sellers (
+  seller VARCHAR,                          -- Seller as written in the contracts CSV
+  seller_key VARCHAR                       -- normalize_entity_name(seller)
+);
+
+-- Normalized names already scored, matched or not
+CREATE TABLE IF NOT EXISTS lng.matched_names (
+  entity_key VARCHAR PRIMARY KEY
+);
+
+CREATE TABLE IF NOT EXISTS lng.entity_seller_match (
+  entity_key VARCHAR NOT NULL,             -- normalize_entity_name(entity name)
+  seller_key VARCHAR NOT NULL,
+  similarity DOUBLE,                       -- Jaro-Winkler of the normalized names
+  PRIMARY KEY (entity_key, seller_key)
+);
+
+CREATE OR REPLACE TEMP TABLE contract_sellers AS
+SELECT DISTINCT Seller as seller, normalize_entity_name(Seller) as seller_key
+FROM read_csv_auto('data/supply-contracts-gemini-2-5-pro.csv')
+WHERE Seller IS NOT NULL;
+
+-- A changed seller list invalidates every cached match
+DELETE FROM lng.matched_names
+WHERE EXISTS (SELECT * FROM contract_sellers EXCEPT SELECT * FROM lng.sellers)
+   OR EXISTS (SELECT * FROM lng.sellers EXCEPT SELECT * FROM contract_sellers);
+DELETE FROM lng.entity_seller_match
+WHERE entity_key NOT IN (SELECT entity_key FROM lng.matched_names);
+DELETE FROM lng.sellers;
+INSERT INTO lng.sellers SELECT * FROM contract_sellers;
+
+-- Names not scored yet: attributed operators and Texas gas purchasers
+CREATE OR REPLACE TEMP TABLE new_names AS
+SELECT DISTINCT entity_key
+FROM (
+    SELECT normalize_entity_name(entity_name) as entity_key
+    FROM emissions.attributed
+    UNION ALL
+    SELECT normalize_entity_name(org.organization_name)
+    FROM p4.gpn gpn
+    JOIN p5.org org ON gpn.gpn_number = org.operator_number
+    WHERE gpn.type_code = 'H'  -- H = purchaser
+) names
+WHERE entity_key IS NOT NULL
+  AND entity_key != ''
+  AND entity_key NOT IN (SELECT entity_key FROM lng.matched_names);
+
+-- Score new names against the sellers in the same blocks
+INSERT INTO lng.entity_seller_match
+WITH
+entity_blocks AS (
+    SELECT entity_key, unnest(blocking_keys(entity_key)) as block
+    FROM new_names
+),
+seller_blocks AS (
+    SELECT DISTINCT seller_key, unnest(blocking_keys(seller_key)) as block
+    FROM lng.sellers
+    WHERE seller_key != ''
+),
+candidates AS (
+    SELECT DISTINCT e.entity_key, s.seller_key
+    FROM entity_blocks e
+    JOIN seller_blocks s ON e.block = s.block
+)
+SELECT entity_key, seller_key, jaro_winkler_similarity(entity_key, seller_key) as similarity
+FROM candidates
+WHERE jaro_winkler_similarity(entity_key, seller_key) > 0.85;
+
+INSERT INTO lng.matched_names SELECT entity_key FROM new_names;
+
+-- Show summary
+SELECT 'Names scored this run' as metric, COUNT(*) as count FROM new_names
+UNION ALL
+SELECT 'Names in cache', COUNT(*) FROM lng.matched_names
+UNION ALL
+SELECT 'Cached name-seller matches', COUNT(*) FROM lng.entity_seller_match;
@@ -5,6 +5,21 @@
 INSTALL spatial;
 LOAD spatial;
 
+-- Fixed 0.02 degree grid used to bucket points for the attribution spatial join
+-- Cells are larger than the 0.015 degree search radius, so every facility near
+-- a plume lies in the plume's own cell or one of its eight neighbours
+CREATE OR REPLACE MACRO grid_cell(coord) AS CAST(FLOOR(coord / 0.02) AS INTEGER);
+
+-- Integer key of a well's API number (3-digit county, 5-digit unique number)
+CREATE OR REPLACE MACRO api_key(county, unique_number) AS county * 100000 + unique_number;
+
+-- api_key of a facility id in 'county-unique' form, the id attribution uses
+-- for RRC wells; NULL for any other id
+CREATE OR REPLACE MACRO parse_api_key(facility_id) AS
+  CASE WHEN regexp_full_match(facility_id, '(0|[1-9][0-9]{0,2})-(0|[1-9][0-9]{0,4})')
+  THEN api_key(CAST(split_part(facility_id, '-', 1) AS INTEGER), CAST(split_part(facility_id, '-', 2) AS INTEGER))
+  END;
+
 DROP SCHEMA IF EXISTS p4 CASCADE;
 CREATE SCHEMA p4;
 
@@ -105,6 +120,13 @@ CREATE TABLE p4.lease_name (
   -- Note: Foreign keys removed due to data quality issues in source files
 );
 
+-- Raw-record fingerprint per lease, for incremental refreshes
+-- Written by scripts/create_p4_db.py; a lease is re-parsed only when it changes
+CREATE TABLE p4.fingerprint (
+  key VARCHAR NOT NULL,                    -- oil_gas_code-district-lease_rrcid
+  fingerprint VARCHAR NOT NULL             -- BLAKE2b of the lease's raw records
+);
+
 
 -- ============================================================================
 -- Texas RRC Well Bore Database Schema
@@ -168,6 +190,8 @@ CREATE TABLE wellbore.location (
   wgs84_latitude DOUBLE,
   wgs84_longitude DOUBLE,
   geom GEOMETRY,                           -- Point geometry derived from lat/lon
+  grid_x INTEGER,                          -- grid_cell(longitude), NULL without geom
+  grid_y INTEGER,                          -- grid_cell(latitude), NULL without geom
 
   -- Texas State Plane Coordinates
   plane_zone INTEGER,
@@ -202,6 +226,13 @@ CREATE TABLE wellbore.wellid (
   -- Note: Foreign keys removed due to data quality issues in source files
 );
 
+-- Raw-record fingerprint per well bore, for incremental refreshes
+-- Written by scripts/create_wellbore_db.py; a well is re-parsed only when it changes
+CREATE TABLE wellbore.fingerprint (
+  key VARCHAR NOT NULL,                    -- api_county-api_unique
+  fingerprint VARCHAR NOT NULL             -- BLAKE2b of the well bore's raw records
+);
+
 
 -- ============================================================================
 -- P-5 Organization Report (operator/gatherer names and info)
@@ -347,5 +378,9 @@ CREATE TABLE emissions.sources (
   published_at TIMESTAMP,                  -- When plume was published
   modified TIMESTAMP,                      -- Last modification time
   emission_version VARCHAR,                -- Emission calculation version
-  processing_software VARCHAR              -- Processing software version
+  processing_software VARCHAR,             -- Processing software version
+
+  -- Spatial join bucket
+  grid_x INTEGER,                          -- grid_cell(longitude)
+  grid_y INTEGER                           -- grid_cell(latitude)
 );
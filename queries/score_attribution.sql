@@ -0,0 +1,42 @@
+-- Confidence scores of every attributed plume under every scoring profile
+-- (scoring_profiles.sql), tagged with the profile id
+--
+-- Scores depend only on the candidates attribution found for a plume
+-- (emissions.candidate_pairs): the nearest facility's
+-- distance, the facilities nearby and how many of the nearest facility's type
+-- its operator runs.
+-- emissions.attributed keeps those counts, so this stage re-scores every
+-- plume in seconds, without the spatial join. The default profile's scores
+-- are written back to emissions.attributed.confidence_score, so changing the
+-- default needs no re-attribution either.
+
+CREATE OR REPLACE TABLE emissions.attribution_scores AS
+SELECT
+    a.id,
+    p.profile_id,
+    dominance_score(p, a.operator_facilities_of_type, a.total_facilities_nearby) as operator_dominance_score,
+    distance_score(p, a.distance_to_nearest_facility_km) as distance_score,
+    density_score(p, a.total_facilities_nearby) as density_score,
+    confidence_score(p, a.operator_facilities_of_type, a.total_facilities_nearby, a.distance_to_nearest_facility_km) as confidence_score
+FROM emissions.attributed a
+CROSS JOIN emissions.scoring_profile p
+ORDER BY p.profile_id, a.id;
+
+UPDATE emissions.attributed a
+SET confidence_score = s.confidence_score
+FROM emissions.attribution_scores s
+WHERE s.id = a.id
+  AND s.profile_id = default_scoring_profile()
+  AND s.confidence_score IS DISTINCT FROM a.confidence_score;
+
+-- Summary by profile
+SELECT
+    s.profile_id,
+    s.profile_id = default_scoring_profile() as is_default,
+    COUNT(*) as plumes,
+    ROUND(AVG(s.confidence_score), 1) as avg_confidence,
+    COUNT(*) FILTER (WHERE s.confidence_score >= 75) as high_confidence,
+    COUNT(*) FILTER (WHERE s.confidence_score < 50) as low_confidence
+FROM emissions.attribution_scores s
+GROUP BY s.profile_id
+ORDER BY s.profile_id;
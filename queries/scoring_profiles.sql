@@ -0,0 +1,54 @@
+-- Scoring profiles: versioned parameters of the attribution confidence score
+--
+-- confidence_score = ROUND(dominance + distance + density, 1), where
+--   dominance = dominance_weight * operator facilities of the nearest one's
+--               type / facilities nearby
+--   distance  = distance_weight * (1 - distance / distance_decay_km), >= 0
+--   density   = density_max - LOG(facilities nearby) * density_log_slope,
+--               clamped to [density_min, density_max]
+--
+-- A published profile is never changed: add a row with a new profile_id
+-- instead, and point default_scoring_profile() at it to make it the score of
+-- emissions.attributed. queries/score_attribution.sql scores every plume
+-- under every profile in seconds, without re-running the spatial join.
+
+CREATE SCHEMA IF NOT EXISTS emissions;
+
+CREATE TABLE IF NOT EXISTS emissions.scoring_profile (
+  profile_id VARCHAR PRIMARY KEY,
+  description VARCHAR,
+  dominance_weight FLOAT NOT NULL,        -- FLOAT, as the share it multiplies
+  distance_weight DOUBLE NOT NULL,
+  distance_decay_km DOUBLE NOT NULL,      -- distance at which the distance score reaches 0
+  density_max DOUBLE NOT NULL,
+  density_min DOUBLE NOT NULL,
+  density_log_slope DOUBLE NOT NULL
+);
+
+INSERT OR REPLACE INTO emissions.scoring_profile VALUES
+  ('v1', 'Operator dominance 0-50, distance 0-35 over 1.5 km, density 5-15', 50, 35, 1.5, 15, 5, 3);
+
+-- Profile whose scores are published in emissions.attributed
+CREATE OR REPLACE MACRO default_scoring_profile() AS 'v1';
+
+-- Score components of one candidate under profile p (a scoring_profile row)
+CREATE OR REPLACE MACRO dominance_score(p, operator_facilities, total_facilities) AS
+  p.dominance_weight * (operator_facilities::FLOAT / NULLIF(total_facilities, 0));
+
+CREATE OR REPLACE MACRO distance_score(p, distance_km) AS
+  GREATEST(0, p.distance_weight * (1 - (distance_km / p.distance_decay_km)));
+
+CREATE OR REPLACE MACRO density_score(p, total_facilities) AS
+  LEAST(p.density_max, GREATEST(p.density_min, p.density_max - LOG(GREATEST(1, total_facilities)) * p.density_log_slope));
+
+CREATE OR REPLACE MACRO confidence_score(p, operator_facilities, total_facilities, distance_km) AS
+  ROUND(
+    dominance_score(p, operator_facilities, total_facilities) +
+    distance_score(p, distance_km) +
+    density_score(p, total_facilities),
+    1
+  );
+
+SELECT profile_id, profile_id = default_scoring_profile() as is_default, description
+FROM emissions.scoring_profile
+ORDER BY profile_id;
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""Append parsed RRC records to DuckDB tables as typed Arrow record batches."""
+
+import duckdb
+import pyarrow as pa
+
+DEFAULT_DATABASE = "data/infrastructure.duckdb"
+
+
+def rows_to_table(rows, schema: pa.Schema) -> pa.Table:
+    """Build an Arrow table from row tuples in schema order."""
+    if not rows:
+        return schema.empty_table()
+    columns = zip(*rows)
+    arrays = [pa.array(column, type=field.type) for column, field in zip(columns, schema)]
+    return pa.Table.from_arrays(arrays, schema=schema)
+
+
+def columns_to_table(columns: dict, schema: pa.Schema) -> pa.Table:
+    """Build an Arrow table from a dict of column arrays keyed by field name."""
+    arrays = [pa.array(columns[field.name], type=field.type) for field in schema]
+    return pa.Table.from_arrays(arrays, schema=schema)
+
+
+class TableSink:
+    """Buffer rows for one table and append them to DuckDB in Arrow batches.
+
+    Rows are appended either one at a time (in schema order) or as a dict of
+    column arrays from a batch decoder. Each flush registers the batch with
+    DuckDB and runs `select_sql` against it, so no text round-trip is needed.
+    """
+
+    def __init__(self, con: duckdb.DuckDBPyConnection, table: str, schema: pa.Schema,
+                 select_sql: str = "SELECT * FROM batch", batch_rows: int = 100_000):
+        self.con = con
+        self.table = table
+        self.schema = schema
+        self.select_sql = select_sql
+        self.batch_rows = batch_rows
+        self.rows = []
+        self.count = 0
+
+    def append_row(self, row):
+        """Buffer a single row, flushing once the batch is full."""
+        self.rows.append(row)
+        if len(self.rows) >= self.batch_rows:
+            self.flush()
+
+    def append_columns(self, columns: dict):
+        """Append a dict of column arrays (keyed by schema field name)."""
+        self.append_table(columns_to_table(columns, self.schema))
+
+    def append_table(self, batch: pa.Table):
+        """Append an Arrow table that already matches the sink schema."""
+        self.flush()
+        self._insert(batch)
+
+    def flush(self):
+        """Write any buffered rows."""
+        if not self.rows:
+            return
+        batch = rows_to_table(self.rows, self.schema)
+        self.rows = []
+        self._insert(batch)
+
+    def _insert(self, batch: pa.Table):
+        if batch.num_rows == 0:
+            return
+        self.con.register('batch', batch)
+        try:
+            self.con.execute(f"INSERT INTO {self.table} {self.select_sql}")
+        finally:
+            self.con.unregister('batch')
+        self.count += batch.num_rows
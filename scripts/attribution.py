@@ -0,0 +1,572 @@
+#!/usr/bin/env python3
+"""In-memory KD-tree plume attribution, an alternative to queries/create_attribution.sql.
+
+Loads RRC wells (rrc.well_operator) and OGIM facilities (infra.all_facilities)
+once, finds the facilities within the search radius of every plume with a
+KD-tree, and scores the nearest one with the same rules as the SQL engine,
+under the database's default scoring profile (queries/scoring_profiles.sql).
+Results and the candidate pairs are merged into emissions.attributed and
+emissions.candidate_pairs the same way, so the two engines are
+interchangeable (see scripts/check_attribution.py).
+
+Usage:
+  attribution.py [--all] [database]
+
+By default only plumes queued in emissions.pending are attributed, as in the
+SQL engine; --all re-attributes every plume.
+"""
+
+import itertools
+import sys
+import time
+from pathlib import Path
+
+import duckdb
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+from scipy.spatial import cKDTree
+
+# Search parameters, as in queries/create_attribution.sql; scoring ones come
+# from the default profile of queries/scoring_profiles.sql (load_scoring_profile)
+SEARCH_RADIUS = 0.015   # degrees, planar (ST_DWithin on lon/lat points)
+EARTH_RADIUS_M = 6371000.0  # as used by ST_Distance_Sphere
+PLUME_BATCH = 50_000
+
+ATTRIBUTED_SCHEMA = pa.schema([
+    ('id', pa.string()),
+    ('rate_kg_hr', pa.float64()),
+    ('rate_uncertainty_kg_hr', pa.float64()),
+    ('datetime', pa.timestamp('us')),
+    ('latitude', pa.float64()),
+    ('longitude', pa.float64()),
+    ('nearest_facility_id', pa.string()),
+    ('nearest_facility_type', pa.string()),
+    ('facility_subtype', pa.string()),
+    ('entity_type', pa.string()),
+    ('entity_name', pa.string()),
+    ('entity_id', pa.int32()),
+    ('operator_id', pa.int32()),
+    ('distance_to_nearest_facility_km', pa.float64()),
+    ('total_facilities_nearby', pa.int64()),
+    ('wells_nearby', pa.int64()),
+    ('compressors_nearby', pa.int64()),
+    ('processing_nearby', pa.int64()),
+    ('tanks_nearby', pa.int64()),
+    ('operator_facilities_of_type', pa.int64()),
+    ('confidence_score', pa.float64()),
+])
+
+# Rows of emissions.candidate_pairs (queries/candidate_pairs.sql)
+PAIRS_SCHEMA = pa.schema([
+    ('id', pa.string()),
+    ('source', pa.string()),
+    ('facility_id', pa.string()),
+    ('facility_row', pa.int64()),
+    ('operator_id', pa.int32()),
+    ('distance_km', pa.float64()),
+])
+
+CANDIDATE_PAIRS_SQL = Path(__file__).parent.parent / "queries" / "candidate_pairs.sql"
+
+# OGIM facility counts reported per plume, by infra_type
+TYPE_COUNTS = {
+    'wells_nearby': 'well',
+    'compressors_nearby': 'compressor',
+    'processing_nearby': 'processing',
+    'tanks_nearby': 'tank_battery',
+}
+
+RRC_WELLS_SQL = """
+SELECT
+    ST_X(geom) as x,
+    ST_Y(geom) as y,
+    rowid as facility_row,
+    api_key,
+    api_county || '-' || api_unique as well_api,
+    operator_name,
+    operator_number,
+    operator_id
+FROM rrc.well_operator
+"""
+
+OGIM_FACILITIES_SQL = """
+SELECT
+    ST_X(geom) as x,
+    ST_Y(geom) as y,
+    f.rowid as facility_row,
+    facility_id,
+    infra_type,
+    f.operator,
+    facility_subtype,
+    oa.operator_id
+FROM infra.all_facilities f
+LEFT JOIN operators.ogim_alias oa ON f.operator = oa.operator
+-- Exclude wells that are already handled by RRC
+WHERE NOT (f.infra_type = 'well' AND EXISTS (
+    SELECT 1 FROM rrc.well_operator rrc WHERE rrc.api_key = f.api_key
+))
+"""
+
+PLUMES_SQL = """
+SELECT
+    id,
+    ST_X(geom) as x,
+    ST_Y(geom) as y,
+    emission_auto,
+    emission_uncertainty_auto,
+    datetime
+FROM emissions.sources
+WHERE gas = 'CH4'
+"""
+
+SCORING_PROFILE_SQL = """
+SELECT profile_id, dominance_weight, distance_weight, distance_decay_km, density_max, density_min, density_log_slope
+FROM emissions.scoring_profile
+WHERE profile_id = default_scoring_profile()
+"""
+
+MERGE_SQL = """
+BEGIN TRANSACTION;
+DELETE FROM emissions.attributed
+WHERE id IN (SELECT id FROM emissions.pending)
+   OR id NOT IN (SELECT id FROM emissions.sources);
+INSERT INTO emissions.attributed SELECT * FROM attributed_batch;
+DELETE FROM emissions.candidate_pairs
+WHERE id IN (SELECT id FROM emissions.pending)
+   OR id NOT IN (SELECT id FROM emissions.sources);
+INSERT INTO emissions.candidate_pairs SELECT * FROM pairs_batch;
+DELETE FROM emissions.pending;
+COMMIT;
+CREATE INDEX IF NOT EXISTS idx_attributed_entity_name ON emissions.attributed (entity_name);
+CREATE INDEX IF NOT EXISTS idx_attributed_operator_id ON emissions.attributed (operator_id);
+CREATE INDEX IF NOT EXISTS idx_attributed_entity_type ON emissions.attributed (entity_type);
+CREATE INDEX IF NOT EXISTS idx_attributed_facility_type ON emissions.attributed (nearest_facility_type);
+CREATE INDEX IF NOT EXISTS idx_attributed_confidence ON emissions.attributed (confidence_score);
+"""
+
+
+def sphere_distance_km(x1, y1, x2, y2):
+    """ST_Distance_Sphere(ST_Point(x1, y1), ST_Point(x2, y2)) / 1000.0, bit for bit.
+
+    ST_Distance_Sphere reads a point's x as latitude, so for the (longitude,
+    latitude) points used in attribution this reproduces the SQL engine's
+    distances, axis order included.
+    """
+    lat1, lon1, lat2, lon2 = (np.asarray(v) * np.pi / 180.0 for v in (x1, y1, x2, y2))
+    a = np.sin((lat2 - lat1) / 2.0) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2.0) ** 2
+    return EARTH_RADIUS_M * 2.0 * np.arctan2(np.sqrt(a), np.sqrt(1.0 - a)) / 1000.0
+
+
+def round_score(values: np.ndarray) -> np.ndarray:
+    """ROUND(value, 1) as DuckDB does it: half away from zero."""
+    scaled = values * 10.0
+    return np.trunc(scaled + np.copysign(0.5, scaled)) / 10.0
+
+
+def confidence_score(profile: dict, operator_facilities: np.ndarray, total: np.ndarray,
+                     distance_km: np.ndarray) -> np.ndarray:
+    """The confidence_score() macro of queries/scoring_profiles.sql under a profile, bit for bit."""
+    # Dominance is FLOAT arithmetic in SQL (dominance_weight and the share are FLOAT)
+    dominance = np.float32(profile['dominance_weight']) * (operator_facilities.astype(np.float32) /
+                                                          total.astype(np.float32))
+    distance = np.maximum(0, profile['distance_weight'] * (1 - (distance_km / profile['distance_decay_km'])))
+    density = np.minimum(profile['density_max'], np.maximum(
+        profile['density_min'],
+        profile['density_max'] - np.log10(np.maximum(1, total).astype(np.float64)) * profile['density_log_slope']))
+    return round_score(dominance.astype(np.float64) + distance + density)
+
+
+def _tie_rank(table: pa.Table, columns: list) -> np.ndarray:
+    """Position of each row when sorted by columns (nulls last), for tie-breaks."""
+    order = pc.sort_indices(table.select(columns),
+                            sort_keys=[(c, 'ascending', 'at_end') for c in columns]).to_numpy()
+    rank = np.empty(len(order), dtype=np.int64)
+    rank[order] = np.arange(len(order))
+    return rank
+
+
+def _codes(values: pa.ChunkedArray) -> np.ndarray:
+    """Integer code per value, -1 for nulls."""
+    encoded = pc.dictionary_encode(values).combine_chunks()
+    return encoded.indices.fill_null(-1).to_numpy(zero_copy_only=False).astype(np.int64)
+
+
+def _first_per_group(groups: np.ndarray, *sort_keys) -> np.ndarray:
+    """Index of the first row per group after sorting by sort_keys (most significant first)."""
+    new_group = np.ones(len(groups), dtype=bool)
+    new_group[1:] = groups[1:] != groups[:-1]
+    if len(groups) and not np.all(groups[1:] >= groups[:-1]):
+        order = np.lexsort(tuple(reversed((groups,) + sort_keys)))
+        new_group[1:] = groups[order][1:] != groups[order][:-1]
+        return order[new_group]
+
+    # Groups already sorted (as FacilitySet.pairs returns plumes): narrow each
+    # group to its minimum of every key in turn with segment reductions, which
+    # is linear where a lexsort of millions of pairs is not
+    starts = np.flatnonzero(new_group)
+    group_index = np.cumsum(new_group) - 1
+    candidate = np.ones(len(groups), dtype=bool)
+    for key in sort_keys:
+        masked = np.where(candidate, key, key.max(initial=0))
+        candidate &= key == np.minimum.reduceat(masked, starts)[group_index]
+    first = np.flatnonzero(candidate)
+    keep = np.ones(len(first), dtype=bool)
+    keep[1:] = groups[first][1:] != groups[first][:-1]
+    return first[keep]
+
+
+def _distinct_per_plume(p: np.ndarray, keys: np.ndarray, single: np.ndarray, plumes: int) -> np.ndarray:
+    """Number of distinct keys per plume among pairs.
+
+    single marks pairs whose key occurs in one facility row only, so can't
+    repeat within a plume; just the other pairs need deduplicating.
+    """
+    counts = np.bincount(p[single], minlength=plumes)
+    repeated = ~single
+    if repeated.any():
+        plume_key = np.unique(p[repeated] * (1 << 32) + keys[repeated])
+        counts += np.bincount(plume_key >> 32, minlength=plumes)
+    return counts
+
+
+class FacilitySet:
+    """Facility points with a KD-tree over (longitude, latitude) in degrees.
+
+    The tree is built in the SQL engine's own coordinate space so the radius
+    test is the same planar ST_DWithin; distances are then computed exactly
+    as ST_Distance_Sphere does.
+    """
+
+    def __init__(self, table: pa.Table, tie_columns: list):
+        self.table = table.filter(pc.and_(pc.is_valid(table['x']), pc.is_valid(table['y'])))
+        self.x = self.table['x'].to_numpy()
+        self.y = self.table['y'].to_numpy()
+        self.tree = cKDTree(np.column_stack([self.x, self.y])) if len(self.x) else None
+        self.tie_rank = _tie_rank(self.table, tie_columns)
+        self._arrays = {}
+
+    def __len__(self):
+        return len(self.x)
+
+    def _cached(self, key, compute) -> np.ndarray:
+        # Whole-column arrays are computed once, so a query touching a few
+        # facilities (e.g. from scripts/point_attribution.py) doesn't pay for
+        # converting every row
+        if key not in self._arrays:
+            self._arrays[key] = compute()
+        return self._arrays[key]
+
+    def codes(self, column: str) -> np.ndarray:
+        """Integer code per row of a column, -1 for nulls."""
+        return self._cached(('codes', column), lambda: _codes(self.table[column]))
+
+    def distinct(self, column: str) -> int:
+        """Number of distinct non-null values of a column."""
+        return self._cached(('distinct', column), lambda: int(self.codes(column).max(initial=-1)) + 1)
+
+    def ints(self, column: str) -> np.ndarray:
+        """An integer column as int64, -1 for nulls."""
+        return self._cached(('ints', column),
+                            lambda: pc.fill_null(self.table[column], -1).to_numpy().astype(np.int64))
+
+    def single(self, column: str) -> np.ndarray:
+        """Whether each row's value of an integer column occurs in no other row."""
+        def compute():
+            _, inverse, counts = np.unique(self.ints(column), return_inverse=True, return_counts=True)
+            return counts[inverse] == 1
+        return self._cached(('single', column), compute)
+
+    def equals(self, column: str, value) -> np.ndarray:
+        """Whether each row's column equals value (False for nulls)."""
+        return self._cached(('equals', column, value),
+                            lambda: pc.fill_null(pc.equal(self.table[column], value), False).to_numpy())
+
+    def pairs(self, px: np.ndarray, py: np.ndarray):
+        """(plume index, facility index, distance km) for every facility in range."""
+        if self.tree is None or len(px) == 0:
+            empty = np.array([], dtype=np.int64)
+            return empty, empty, np.array([], dtype=np.float64)
+
+        # Slightly wider ball, then the exact bounding-box and ST_DWithin tests
+        hits = self.tree.query_ball_point(np.column_stack([px, py]), SEARCH_RADIUS * (1 + 1e-9), workers=-1)
+        lengths = np.fromiter(map(len, hits), dtype=np.int64, count=len(hits))
+        p = np.repeat(np.arange(len(px)), lengths)
+        f = np.fromiter(itertools.chain.from_iterable(hits), dtype=np.int64, count=len(p))
+
+        fx, fy, ex, ey = self.x[f], self.y[f], px[p], py[p]
+        dx, dy = fx - ex, fy - ey
+        keep = ((fx >= ex - SEARCH_RADIUS) & (fx <= ex + SEARCH_RADIUS) &
+                (fy >= ey - SEARCH_RADIUS) & (fy <= ey + SEARCH_RADIUS) &
+                (np.sqrt(dx * dx + dy * dy) <= SEARCH_RADIUS))
+        p, f = p[keep], f[keep]
+        return p, f, sphere_distance_km(px[p], py[p], self.x[f], self.y[f])
+
+
+def load_rrc_wells(con) -> FacilitySet:
+    return FacilitySet(con.execute(RRC_WELLS_SQL).to_arrow_table(),
+                       ['well_api', 'operator_number', 'operator_name'])
+
+
+def load_ogim_facilities(con) -> FacilitySet:
+    return FacilitySet(con.execute(OGIM_FACILITIES_SQL).to_arrow_table(),
+                       ['facility_id', 'infra_type', 'operator'])
+
+
+def load_scoring_profile(con) -> dict:
+    """The default scoring profile's parameters, by column name."""
+    try:
+        cursor = con.execute(SCORING_PROFILE_SQL)
+        row = cursor.fetchone()
+    except duckdb.CatalogException:
+        row = None
+    if row is None:
+        raise SystemExit("No default scoring profile in the database; run queries/scoring_profiles.sql")
+    return dict(zip([column[0] for column in cursor.description], row))
+
+
+def load_plumes(con, all_plumes: bool = False) -> pa.Table:
+    sql = PLUMES_SQL if all_plumes else PLUMES_SQL + " AND id IN (SELECT id FROM emissions.pending)"
+    return con.execute(sql + " ORDER BY id").to_arrow_table()
+
+
+def rrc_candidates(wells: FacilitySet, found: tuple, plumes: int, profile: dict) -> dict:
+    """Nearest RRC well per plume with operator dominance, as rrc_operator_rows.
+
+    found is wells.pairs() of the batch's plumes.
+    """
+    p, f, d = found
+    if len(p) == 0:
+        return None
+
+    api = wells.ints('api_key')[f]
+    operator = wells.ints('operator_number')[f]
+    single = wells.single('api_key')[f]
+
+    best = _first_per_group(p, d, wells.tie_rank[f])
+    plume, well = p[best], f[best]
+    best_operator = operator[best]
+
+    # Distinct wells per plume, and of those the nearest well's operator's
+    total = _distinct_per_plume(p, api, single, plumes)
+    plume_operator = np.full(plumes, -2, dtype=np.int64)
+    plume_operator[plume] = best_operator
+    of_operator = operator == plume_operator[p]
+    operator_wells = _distinct_per_plume(p[of_operator], api[of_operator], single[of_operator],
+                                         plumes)[plume].astype(np.float64)
+    operator_wells[best_operator < 0] = np.nan  # LEFT JOIN on a NULL operator finds no counts
+
+    totals = total[plume]
+    score = confidence_score(profile, operator_wells, totals, d[best])
+
+    return {
+        'plume': plume,
+        'distance': d[best],
+        'facility_id': wells.table['well_api'].take(well),
+        'facility_type': pa.array(['well'] * len(plume), pa.string()),
+        'facility_subtype': pa.nulls(len(plume), pa.string()),
+        'entity_name': wells.table['operator_name'].take(well),
+        'entity_id': wells.table['operator_number'].take(well),
+        'operator_id': wells.table['operator_id'].take(well),
+        'total': totals,
+        'wells': totals,
+        'compressors': np.zeros(len(plume), dtype=np.int64),
+        'processing': np.zeros(len(plume), dtype=np.int64),
+        'tanks': np.zeros(len(plume), dtype=np.int64),
+        'operator_facilities': operator_wells,
+        'score': score,
+    }
+
+
+def ogim_candidates(facilities: FacilitySet, found: tuple, plumes: int, profile: dict) -> dict:
+    """Nearest OGIM facility per plume with operator dominance, as ogim_operator_rows.
+
+    found is facilities.pairs() of the batch's plumes.
+    """
+    p, f, d = found
+    if len(p) == 0:
+        return None
+
+    infra_type = facilities.codes('infra_type')
+    operator = facilities.codes('operator')
+    total = np.bincount(p, minlength=plumes)
+
+    # Facilities of the nearest one's type and operator (an inner join in SQL,
+    # so facilities without an operator can't be the best match)
+    group = (infra_type[f] + 1) * (facilities.distinct('operator') + 1) + operator[f] + 1
+    with_operator = (operator[f] >= 0) & (infra_type[f] >= 0)
+    best = _first_per_group(p[with_operator], d[with_operator], facilities.tie_rank[f][with_operator])
+    best = np.flatnonzero(with_operator)[best]
+    plume, facility = p[best], f[best]
+    plume_group = np.full(plumes, -1, dtype=np.int64)
+    plume_group[plume] = group[best]
+    operator_count = np.bincount(p[group == plume_group[p]], minlength=plumes)[plume]
+
+    totals = total[plume]
+    score = confidence_score(profile, operator_count, totals, d[best])
+
+    counts = {}
+    for column, name in TYPE_COUNTS.items():
+        counts[column] = np.bincount(p[facilities.equals('infra_type', name)[f]], minlength=plumes)[plume]
+
+    return {
+        'plume': plume,
+        'distance': d[best],
+        'facility_id': facilities.table['facility_id'].take(facility),
+        'facility_type': facilities.table['infra_type'].take(facility),
+        'facility_subtype': facilities.table['facility_subtype'].take(facility),
+        'entity_name': facilities.table['operator'].take(facility),
+        'entity_id': pa.nulls(len(plume), pa.int32()),
+        'operator_id': facilities.table['operator_id'].take(facility),
+        'total': totals,
+        'wells': counts['wells_nearby'],
+        'compressors': counts['compressors_nearby'],
+        'processing': counts['processing_nearby'],
+        'tanks': counts['tanks_nearby'],
+        'operator_facilities': operator_count.astype(np.float64),
+        'score': score,
+    }
+
+
+def _concat(*candidates) -> dict:
+    candidates = [c for c in candidates if c is not None]
+    merged = {}
+    for key in candidates[0]:
+        values = [c[key] for c in candidates]
+        if isinstance(values[0], (pa.Array, pa.ChunkedArray)):
+            kind = values[0].type
+            chunks = [chunk.cast(kind) for v in values for chunk in pa.chunked_array(v).chunks]
+            merged[key] = pa.chunked_array(chunks, type=kind).combine_chunks()
+        else:
+            merged[key] = np.concatenate(values)
+    return merged
+
+
+def pair_table(ids: pa.Array, source: str, facilities: FacilitySet, found: tuple, id_column: str) -> pa.Table:
+    """candidate_pairs rows of one source from its FacilitySet.pairs() result."""
+    p, f, d = found
+    return pa.table({
+        'id': ids.take(p),
+        'source': pa.repeat(pa.scalar(source), len(p)),
+        'facility_id': facilities.table[id_column].take(f),
+        'facility_row': facilities.table['facility_row'].take(f),
+        'operator_id': facilities.table['operator_id'].take(f).cast(pa.int32()),
+        'distance_km': d,
+    }, schema=PAIRS_SCHEMA)
+
+
+def attribute(plumes: pa.Table, wells: FacilitySet, facilities: FacilitySet, profile: dict,
+              pairs: list = None) -> pa.Table:
+    """One attribution row per plume with a facility in range (closest of RRC and OGIM).
+
+    Scores use profile (see load_scoring_profile). If pairs is a list, the
+    batch's candidate pairs are appended to it (a PAIRS_SCHEMA table per source).
+    """
+    px = plumes['x'].to_numpy()
+    py = plumes['y'].to_numpy()
+    rrc_found = wells.pairs(px, py)
+    ogim_found = facilities.pairs(px, py)
+    if pairs is not None:
+        pairs.append(pair_table(plumes['id'], 'rrc', wells, rrc_found, 'well_api'))
+        pairs.append(pair_table(plumes['id'], 'ogim', facilities, ogim_found, 'facility_id'))
+    candidates = [c for c in (rrc_candidates(wells, rrc_found, len(px), profile),
+                              ogim_candidates(facilities, ogim_found, len(px), profile)) if c]
+    if not candidates:
+        return ATTRIBUTED_SCHEMA.empty_table()
+    rows = _concat(*candidates)
+
+    # Closest candidate per plume, ties broken like the SQL engine's final ORDER BY
+    tie = _tie_rank(pa.table({
+        'facility_type': rows['facility_type'],
+        'facility_id': rows['facility_id'],
+        'entity_name': rows['entity_name'],
+    }), ['facility_type', 'facility_id', 'entity_name'])
+    chosen = _first_per_group(rows['plume'], rows['distance'], tie)
+    plume = rows['plume'][chosen]
+    take = pa.array(chosen)
+
+    def nullable(values):
+        values = values[chosen]
+        return pa.array(values, mask=np.isnan(values), type=pa.float64())
+
+    return pa.table({
+        'id': plumes['id'].take(plume),
+        'rate_kg_hr': plumes['emission_auto'].take(plume),
+        'rate_uncertainty_kg_hr': plumes['emission_uncertainty_auto'].take(plume),
+        'datetime': plumes['datetime'].take(plume).cast(pa.timestamp('us')),
+        'latitude': pa.array(py[plume]),
+        'longitude': pa.array(px[plume]),
+        'nearest_facility_id': rows['facility_id'].take(take),
+        'nearest_facility_type': rows['facility_type'].take(take),
+        'facility_subtype': rows['facility_subtype'].take(take),
+        'entity_type': pa.array(['operator'] * len(chosen), pa.string()),
+        'entity_name': rows['entity_name'].take(take),
+        'entity_id': rows['entity_id'].take(take).cast(pa.int32()),
+        'operator_id': rows['operator_id'].take(take).cast(pa.int32()),
+        'distance_to_nearest_facility_km': pa.array(rows['distance'][chosen]),
+        'total_facilities_nearby': pa.array(rows['total'][chosen].astype(np.int64)),
+        'wells_nearby': pa.array(rows['wells'][chosen].astype(np.int64)),
+        'compressors_nearby': pa.array(rows['compressors'][chosen].astype(np.int64)),
+        'processing_nearby': pa.array(rows['processing'][chosen].astype(np.int64)),
+        'tanks_nearby': pa.array(rows['tanks'][chosen].astype(np.int64)),
+        'operator_facilities_of_type': nullable(rows['operator_facilities']).cast(pa.int64()),
+        'confidence_score': nullable(rows['score']),
+    }, schema=ATTRIBUTED_SCHEMA)
+
+
+def write_attributed(con, table: pa.Table, pairs: pa.Table, all_plumes: bool = False):
+    """Merge attribution rows and candidate pairs into their tables and clear the queue."""
+    con.register('attributed_batch', table)
+    con.register('pairs_batch', pairs)
+    try:
+        con.execute("CREATE TABLE IF NOT EXISTS emissions.attributed AS SELECT * FROM attributed_batch WITH NO DATA")
+        if all_plumes:
+            con.execute("DELETE FROM emissions.attributed")
+            con.execute("DELETE FROM emissions.candidate_pairs")
+        con.execute(MERGE_SQL)
+    finally:
+        con.unregister('attributed_batch')
+        con.unregister('pairs_batch')
+
+
+def run(con, all_plumes: bool = False) -> pa.Table:
+    """Attribute pending (or all) CH4 plumes and write them to emissions.attributed."""
+    con.execute("INSTALL spatial; LOAD spatial;")
+    con.execute(CANDIDATE_PAIRS_SQL.read_text())
+
+    start = time.time()
+    profile = load_scoring_profile(con)
+    wells = load_rrc_wells(con)
+    facilities = load_ogim_facilities(con)
+    plumes = load_plumes(con, all_plumes)
+    print(f"  Loaded {len(wells):,} RRC well links, {len(facilities):,} OGIM facilities "
+          f"and {plumes.num_rows:,} plumes in {time.time() - start:.1f}s (scoring profile {profile['profile_id']})")
+
+    start = time.time()
+    pairs = []
+    batches = [attribute(plumes.slice(offset, PLUME_BATCH), wells, facilities, profile, pairs)
+               for offset in range(0, plumes.num_rows, PLUME_BATCH)]
+    table = pa.concat_tables(batches) if batches else ATTRIBUTED_SCHEMA.empty_table()
+    pairs = pa.concat_tables(pairs) if pairs else PAIRS_SCHEMA.empty_table()
+    print(f"  Attributed {table.num_rows:,} plumes from {pairs.num_rows:,} candidate pairs "
+          f"in {time.time() - start:.1f}s")
+
+    write_attributed(con, table, pairs, all_plumes)
+    return table
+
+
+def main():
+    all_plumes = '--all' in sys.argv
+    args = [arg for arg in sys.argv[1:] if arg != '--all']
+    database = args[0] if args else "data/data.duckdb"
+
+    print(f"Attributing {'all' if all_plumes else 'pending'} plumes in {database} (KD-tree engine)...")
+    con = duckdb.connect(database)
+    try:
+        run(con, all_plumes)
+    finally:
+        con.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+"""Benchmark plume attribution as the plume catalogue grows.
+
+Builds a synthetic database with the tables attribution reads: RRC wells
+(p4.root, p5.org, wellbore.location/wellid, then rrc.well_operator via
+queries/create_well_operator.sql), infra.all_facilities and
+emissions.sources. Wells sit in dense Permian-like clusters (by default
+1,000 wells within 1.5 km); OGIM facilities are split between the clusters
+and open country; most plumes fall on clusters. Attribution is then run for
+each plume count in its own process, and wall time, peak RSS and the
+per-operator timings of the main queries (DuckDB's EXPLAIN ANALYZE
+profiles of the candidate pair search and the scoring) are reported.
+
+Usage:
+  bench_attribution.py [--plumes=1000,10000,100000] [--wells=N] [--cluster-wells=N]
+                       [--facilities=N] [--engine=sql|kdtree|both] [--seed=N] [--json=FILE]
+"""
+
+import json
+import os
+import re
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import duckdb
+
+from bench_parsers import measure
+from run_stage import operator_timings
+
+SCRIPTS = Path(__file__).parent
+QUERIES = SCRIPTS.parent / "queries"
+
+# Radius of a well cluster, in degrees (~1.5 km)
+CLUSTER_RADIUS = 0.0135
+# Texas, roughly
+BOUNDS = (-104.5, 26.0, -94.0, 36.0)
+TOP_OPERATORS = 8
+
+RANDOM_MACROS = """
+CREATE OR REPLACE TEMP MACRO uniform(i, salt) AS (hash(i, salt, getvariable('seed')) >> 11) / 9007199254740992.0;
+CREATE OR REPLACE TEMP MACRO disc_x(i, salt) AS
+    sqrt(uniform(i, salt || 'r')) * cos(2 * pi() * uniform(i, salt || 't'));
+CREATE OR REPLACE TEMP MACRO disc_y(i, salt) AS
+    sqrt(uniform(i, salt || 'r')) * sin(2 * pi() * uniform(i, salt || 't'));
+"""
+
+CLUSTERS_SQL = """
+CREATE TEMP TABLE clusters AS
+SELECT
+    c as cluster,
+    {xmin} + uniform(c, 'cx') * ({xmax} - {xmin}) as x,
+    {ymin} + uniform(c, 'cy') * ({ymax} - {ymin}) as y
+FROM range({clusters}) t(c);
+"""
+
+RRC_SQL = """
+INSERT INTO p5.org (operator_number, organization_name)
+SELECT o, 'OPERATOR ' || o FROM range(1, {operators} + 1) t(o);
+
+-- One lease per 4 wells, each run by one of the cluster's few operators
+INSERT INTO p4.root (oil_gas_code, district, lease_rrcid, field_number, operator_number)
+SELECT 'O', 8, l, l, 1 + ((l - 1) * 4 // {cluster_wells} * 3 + hash(l, getvariable('seed')) % 5) % {operators}
+FROM range(1, {leases} + 1) t(l);
+
+CREATE TEMP TABLE wells AS
+SELECT
+    w,
+    1 + w % 254 * 2 as api_county,
+    1 + w // 254 as api_unique,
+    c.x + disc_x(w, 'w') * {radius} as x,
+    c.y + disc_y(w, 'w') * {radius} as y
+FROM range({wells}) t(w)
+JOIN clusters c ON c.cluster = w // {cluster_wells};
+
+INSERT INTO wellbore.location BY NAME
+SELECT api_county, api_unique, api_county as loc_county, y as wgs84_latitude, x as wgs84_longitude,
+       ST_Point(x, y) as geom, grid_cell(x) as grid_x, grid_cell(y) as grid_y
+FROM wells;
+
+INSERT INTO wellbore.wellid BY NAME
+SELECT api_county, api_unique, 'O' as oil_gas_code, 8 as district, 1 + w // 4 as lease_number, 0 as gas_rrcid
+FROM wells;
+"""
+
+FACILITIES_SQL = """
+CREATE SCHEMA infra;
+CREATE TABLE infra.all_facilities AS
+WITH placed AS (
+    SELECT
+        f,
+        ['well', 'well', 'well', 'well', 'compressor', 'processing', 'tank_battery',
+         'injection_disposal', 'station_other', 'petroleum_terminal'][1 + (hash(f, 'type') % 10)::INTEGER] as infra_type,
+        CASE WHEN uniform(f, 'open') < 0.5
+             THEN {xmin} + uniform(f, 'fx') * ({xmax} - {xmin})
+             ELSE c.x + disc_x(f, 'f') * {radius} END as x,
+        CASE WHEN uniform(f, 'open') < 0.5
+             THEN {ymin} + uniform(f, 'fy') * ({ymax} - {ymin})
+             ELSE c.y + disc_y(f, 'f') * {radius} END as y
+    FROM range({facilities}) t(f)
+    JOIN clusters c ON c.cluster = hash(f, getvariable('seed')) % {clusters}
+)
+SELECT
+    -- Every tenth OGIM well duplicates an RRC well, as Texas wells do in OGIM
+    CASE WHEN infra_type = 'well' AND f % 10 = 0 AND f < {wells}
+         THEN (1 + f % 254 * 2) || '-' || (1 + f // 254)
+         ELSE 'F' || f END as facility_id,
+    infra_type,
+    'OGIM OPERATOR ' || hash(f, 'operator') % 500 as operator,
+    NULL::VARCHAR as facility_subtype,
+    NULL::VARCHAR as status,
+    NULL::VARCHAR as ogim_status,
+    y as latitude,
+    x as longitude,
+    ST_Point(x, y) as geom,
+    grid_cell(x) as grid_x,
+    grid_cell(y) as grid_y,
+    parse_api_key(facility_id) as api_key
+FROM placed;
+CREATE INDEX idx_infrastructure_geom ON infra.all_facilities USING RTREE (geom);
+CREATE INDEX idx_infrastructure_operator ON infra.all_facilities (operator);
+CREATE INDEX idx_infrastructure_type ON infra.all_facilities (infra_type);
+"""
+
+# 80% of plumes over a cluster, the rest anywhere; plume i is the same at any
+# plume count, so larger runs are supersets of smaller ones
+PLUMES_SQL = """
+INSERT INTO emissions.sources BY NAME
+WITH placed AS (
+    SELECT
+        p,
+        CASE WHEN uniform(p, 'open') < 0.2
+             THEN {xmin} + uniform(p, 'px') * ({xmax} - {xmin})
+             ELSE c.x + disc_x(p, 'p') * {radius} END as x,
+        CASE WHEN uniform(p, 'open') < 0.2
+             THEN {ymin} + uniform(p, 'py') * ({ymax} - {ymin})
+             ELSE c.y + disc_y(p, 'p') * {radius} END as y
+    FROM range({plumes}) t(p)
+    JOIN clusters c ON c.cluster = hash(p, getvariable('seed')) % {clusters}
+)
+SELECT
+    'bench' || lpad(p::VARCHAR, 8, '0') as id,
+    ST_Point(x, y) as geom,
+    y as latitude,
+    x as longitude,
+    'CH4' as gas,
+    'Oil & Gas (1B2)' as ipcc_sector,
+    TIMESTAMP '2025-01-01' + to_minutes(p::BIGINT) as datetime,
+    50 + uniform(p, 'rate') * 2000 as emission_auto,
+    10 + uniform(p, 'sigma') * 100 as emission_uncertainty_auto,
+    grid_cell(x) as grid_x,
+    grid_cell(y) as grid_y
+FROM placed;
+CREATE TABLE IF NOT EXISTS emissions.pending (id VARCHAR PRIMARY KEY);
+INSERT INTO emissions.pending SELECT id FROM emissions.sources;
+CREATE INDEX idx_emissions_sources_geom ON emissions.sources USING RTREE (geom);
+"""
+
+
+def build_base(path: Path, wells: int, cluster_wells: int, facilities: int, seed: int) -> int:
+    """Create the synthetic infrastructure database; return its cluster count."""
+    clusters = max(1, -(-wells // cluster_wells))
+    params = {
+        'wells': wells, 'cluster_wells': cluster_wells, 'clusters': clusters,
+        'leases': -(-wells // 4), 'operators': max(10, clusters * 3), 'facilities': facilities,
+        'radius': CLUSTER_RADIUS, 'xmin': BOUNDS[0], 'ymin': BOUNDS[1], 'xmax': BOUNDS[2], 'ymax': BOUNDS[3],
+    }
+    con = duckdb.connect(str(path))
+    try:
+        con.execute((QUERIES / "schema.sql").read_text())
+        con.execute(f"SET VARIABLE seed = {seed}")
+        con.execute(RANDOM_MACROS)
+        con.execute(CLUSTERS_SQL.format(**params))
+        con.execute(RRC_SQL.format(**params))
+        con.execute(FACILITIES_SQL.format(**params))
+        con.execute((QUERIES / "create_operators.sql").read_text())
+        con.execute((QUERIES / "create_well_operator.sql").read_text())
+        con.execute((QUERIES / "scoring_profiles.sql").read_text())
+        con.execute((QUERIES / "candidate_pairs.sql").read_text())
+        # Persist the clusters so plumes can be placed on them later
+        con.execute("CREATE TABLE bench_clusters AS SELECT * FROM clusters")
+    finally:
+        con.close()
+    return clusters
+
+
+def add_plumes(path: Path, plumes: int, clusters: int, seed: int):
+    params = {
+        'plumes': plumes, 'clusters': clusters, 'radius': CLUSTER_RADIUS,
+        'xmin': BOUNDS[0], 'ymin': BOUNDS[1], 'xmax': BOUNDS[2], 'ymax': BOUNDS[3],
+    }
+    con = duckdb.connect(str(path))
+    try:
+        con.execute("LOAD spatial")
+        con.execute(f"SET VARIABLE seed = {seed}")
+        con.execute(RANDOM_MACROS)
+        con.execute("CREATE TEMP TABLE clusters AS SELECT * FROM bench_clusters")
+        con.execute(PLUMES_SQL.format(**params))
+    finally:
+        con.close()
+
+
+# Tables built by the main statements of create_attribution.sql
+PROFILED_TABLES = ('pending_pairs', 'pending_attributed')
+
+
+def profiled_attribution_sql(work_dir: Path) -> tuple:
+    """create_attribution.sql with JSON profiling around its main statements, and the profile paths."""
+    statements = re.split(r';[ \t]*\n', (QUERIES / "create_attribution.sql").read_text())
+    profile_paths = []
+    for table in PROFILED_TABLES:
+        main = [i for i, statement in enumerate(statements) if f'{table} AS' in statement]
+        if len(main) != 1:
+            raise SystemExit(f"Could not find the {table} statement in create_attribution.sql")
+        profile_path = work_dir / f"profile_{table}.json"
+        statements[main[0]] = (f"PRAGMA enable_profiling = 'json';\n"
+                               f"PRAGMA profiling_output = '{profile_path}';\n"
+                               f"{statements[main[0]]};\n"
+                               f"PRAGMA disable_profiling")
+        profile_paths.append(profile_path)
+    return ';\n'.join(statements), profile_paths
+
+
+def run_sql_engine(database: Path, work_dir: Path) -> dict:
+    duckdb_cli = shutil.which('duckdb')
+    if not duckdb_cli:
+        raise SystemExit("The duckdb CLI is needed to benchmark the SQL engine")
+    script = work_dir / "attribution.sql"
+    sql, profile_paths = profiled_attribution_sql(work_dir)
+    script.write_text(sql)
+    seconds, peak_rss_mb = measure([duckdb_cli, '-bail', str(database), '-f', str(script)])
+    profiles = [json.loads(path.read_text()) for path in profile_paths]
+    return {
+        'seconds': round(seconds, 3),
+        'peak_rss_mb': round(peak_rss_mb, 1),
+        'query_seconds': round(sum(profile.get('latency', 0.0) for profile in profiles), 3),
+        'operators': operator_timings(*profiles)[:TOP_OPERATORS],
+    }
+
+
+def run_kdtree_engine(database: Path, work_dir: Path) -> dict:
+    seconds, peak_rss_mb = measure([sys.executable, str(SCRIPTS / "attribution.py"), str(database)])
+    return {'seconds': round(seconds, 3), 'peak_rss_mb': round(peak_rss_mb, 1)}
+
+
+ENGINES = {
+    'sql': run_sql_engine,
+    'kdtree': run_kdtree_engine,
+}
+
+
+def main():
+    options = {'wells': 200_000, 'cluster-wells': 1_000, 'facilities': 500_000, 'seed': 0}
+    plume_counts = [1_000, 10_000, 100_000]
+    engines = ['sql']
+    json_path = None
+    for arg in sys.argv[1:]:
+        name, _, value = arg.lstrip('-').partition('=')
+        if name in options:
+            options[name] = int(value)
+        elif name == 'plumes':
+            plume_counts = [int(count) for count in value.split(',')]
+        elif name == 'engine' and value in ('sql', 'kdtree', 'both'):
+            engines = list(ENGINES) if value == 'both' else [value]
+        elif name == 'json':
+            json_path = Path(value)
+        else:
+            print(__doc__.strip())
+            sys.exit(1)
+
+    work_dir = Path(tempfile.mkdtemp(prefix="bench_attribution_"))
+    results = []
+    try:
+        base = work_dir / "bench_base.duckdb"
+        print(f"Building synthetic infrastructure ({options['wells']:,} RRC wells in clusters of "
+              f"{options['cluster-wells']:,}, {options['facilities']:,} OGIM facilities)...")
+        start = time.time()
+        clusters = build_base(base, options['wells'], options['cluster-wells'], options['facilities'],
+                              options['seed'])
+        print(f"  {clusters:,} clusters in {time.time() - start:.1f}s")
+
+        for plumes in plume_counts:
+            for engine in engines:
+                database = work_dir / "bench_run.duckdb"
+                shutil.copy(base, database)
+                add_plumes(database, plumes, clusters, options['seed'])
+                result = {'engine': engine, 'plumes': plumes, **ENGINES[engine](database, work_dir)}
+                con = duckdb.connect(str(database), read_only=True)
+                result['attributed'] = con.execute("SELECT COUNT(*) FROM emissions.attributed").fetchone()[0]
+                con.close()
+                database.unlink()
+                results.append(result)
+
+                print(f"  {engine:<7} {plumes:>10,} plumes {result['seconds']:9.2f}s "
+                      f"{plumes / result['seconds']:>10,.0f} plumes/s {result['peak_rss_mb']:>8,.0f} MB "
+                      f"({result['attributed']:,} attributed)")
+                for operator in result.get('operators', []):
+                    print(f"      {operator['seconds']:8.3f}s {operator['rows']:>14,} rows  {operator['operator']}")
+    finally:
+        shutil.rmtree(work_dir)
+
+    if json_path:
+        report = {**options, 'cpus': os.cpu_count(), 'runs': results}
+        json_path.write_text(json.dumps(report, indent=2) + "\n")
+        print(f"Output: {json_path}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""Benchmark the RRC parsers on synthetic dumps (see synthetic_rrc.py).
+
+Runs create_p4_db.py, create_p5_db.py and create_wellbore_db.py in each of
+their modes against freshly generated files, each in its own process and
+database, and reports wall time, records/sec and peak RSS. Results can be
+saved as JSON and compared against an earlier run to catch regressions.
+
+Usage:
+  bench_parsers.py [--wells=N] [--seed=N] [--json=FILE] [--baseline=FILE] [--keep=DIR]
+
+With --baseline, exits with status 1 if any run's records/sec fell by more
+than 20% against the baseline file.
+"""
+
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import duckdb
+
+import synthetic_rrc
+
+SCRIPTS = Path(__file__).parent
+SCHEMA_SQL = SCRIPTS.parent / "queries" / "schema.sql"
+REGRESSION_TOLERANCE = 0.2
+
+# (name, input file, command line after the interpreter, database to run in)
+# Runs sharing a database see each other's output: incremental runs refresh
+# the full build before them, with nothing changed.
+RUNS = [
+    ('p4', 'p4f606.ebc.gz', ['create_p4_db.py'], 'bench_p4.duckdb'),
+    ('p4 --batch', 'p4f606.ebc.gz', ['create_p4_db.py', '--batch'], 'bench_p4_batch.duckdb'),
+    ('p4 --batch --incremental', 'p4f606.ebc.gz', ['create_p4_db.py', '--batch', '--incremental'], 'bench_p4_batch.duckdb'),
+    ('p5', 'orf850.ebc.gz', ['create_p5_db.py'], 'bench_p5.duckdb'),
+    ('wellbore', 'dbf900.ebc.gz', ['create_wellbore_db.py'], 'bench_wellbore.duckdb'),
+    ('wellbore --jobs=2', 'dbf900.ebc.gz', ['create_wellbore_db.py', '--jobs=2'], 'bench_wellbore_jobs.duckdb'),
+    ('wellbore --incremental', 'dbf900.ebc.gz', ['create_wellbore_db.py', '--incremental'], 'bench_wellbore.duckdb'),
+    ('rrc_index build', 'dbf900.ebc.gz', ['rrc_index.py', 'build'], None),
+    ('wellbore --jobs=2 (indexed)', 'dbf900.ebc.gz', ['create_wellbore_db.py', '--jobs=2'], 'bench_wellbore_indexed.duckdb'),
+]
+
+
+def create_database(path: Path):
+    con = duckdb.connect(str(path))
+    try:
+        con.execute(SCHEMA_SQL.read_text())
+    finally:
+        con.close()
+
+
+def measure(command: list) -> tuple:
+    """Run a command to completion; return (seconds, peak RSS in MB)."""
+    start = time.perf_counter()
+    process = subprocess.Popen(command, stdout=subprocess.DEVNULL)
+    _, status, usage = os.wait4(process.pid, 0)
+    seconds = time.perf_counter() - start
+    process.returncode = os.waitstatus_to_exitcode(status)
+    if process.returncode != 0:
+        raise SystemExit(f"{' '.join(command)} failed with status {process.returncode}")
+    return seconds, usage.ru_maxrss / 1024  # ru_maxrss is in KB on Linux
+
+
+def run_all(work_dir: Path, records: dict) -> list:
+    results = []
+    for name, input_file, command, database in RUNS:
+        args = [sys.executable, str(SCRIPTS / command[0])] + command[1:] + [str(work_dir / input_file)]
+        if database:
+            if not (work_dir / database).exists():
+                create_database(work_dir / database)
+            args.append(str(work_dir / database))
+
+        seconds, peak_rss_mb = measure(args)
+        results.append({
+            'name': name,
+            'records': records[input_file],
+            'seconds': round(seconds, 3),
+            'records_per_sec': round(records[input_file] / seconds),
+            'peak_rss_mb': round(peak_rss_mb, 1),
+        })
+        print(f"  {name:<30} {seconds:8.2f}s {records[input_file] / seconds:>12,.0f} rec/s "
+              f"{peak_rss_mb:>8,.0f} MB")
+    return results
+
+
+def regressions(results: list, baseline: list) -> list:
+    previous = {run['name']: run for run in baseline}
+    return [
+        (run['name'], previous[run['name']]['records_per_sec'], run['records_per_sec'])
+        for run in results
+        if run['name'] in previous
+        and run['records_per_sec'] < previous[run['name']]['records_per_sec'] * (1 - REGRESSION_TOLERANCE)
+    ]
+
+
+def main():
+    options = {'wells': synthetic_rrc.DEFAULT_WELLS, 'seed': 0}
+    paths = {}
+    for arg in sys.argv[1:]:
+        name, _, value = arg.lstrip('-').partition('=')
+        if name in options:
+            options[name] = int(value)
+        elif name in ('json', 'baseline', 'keep'):
+            paths[name] = Path(value)
+        else:
+            print(__doc__.strip())
+            sys.exit(1)
+
+    work_dir = Path(tempfile.mkdtemp(prefix="bench_parsers_"))
+    try:
+        print(f"Generating synthetic RRC dumps ({options['wells']:,} wells)...")
+        records = synthetic_rrc.write_all(work_dir, options['wells'], options['seed'])
+        for input_file, count in records.items():
+            print(f"  {input_file}: {count:,} records")
+
+        print("Benchmarking parsers...")
+        results = run_all(work_dir, records)
+
+        if 'keep' in paths:
+            shutil.copytree(work_dir, paths['keep'], dirs_exist_ok=True)
+    finally:
+        shutil.rmtree(work_dir)
+
+    report = {'wells': options['wells'], 'seed': options['seed'], 'cpus': os.cpu_count(), 'runs': results}
+    if 'json' in paths:
+        paths['json'].write_text(json.dumps(report, indent=2) + "\n")
+        print(f"Output: {paths['json']}")
+
+    if 'baseline' in paths:
+        baseline = json.loads(paths['baseline'].read_text())
+        if baseline['wells'] != options['wells']:
+            raise SystemExit(f"Baseline was run with --wells={baseline['wells']}, not {options['wells']}")
+        slower = regressions(results, baseline['runs'])
+        for name, before, after in slower:
+            print(f"✗ {name}: {before:,} → {after:,} rec/s")
+        if slower:
+            sys.exit(1)
+        print("✓ No throughput regressions against baseline")
+
+
+if __name__ == '__main__':
+    main()
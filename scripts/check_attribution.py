@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""Check that the KD-tree and SQL attribution engines produce identical rows.
+
+Runs both engines over every CH4 plume in a copy of the database and compares
+emissions.attributed and emissions.candidate_pairs row for row (EXCEPT ALL in
+both directions). The point index of scripts/point_attribution.py is then
+asked about every plume's location and must give the same facility, operator
+and score. Exits with status 1 on any difference.
+
+Usage:
+  check_attribution.py [database]
+"""
+
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import duckdb
+import pyarrow as pa
+
+import attribution
+from point_attribution import RESULT_COLUMNS, PointIndex
+
+SQL_ENGINE = Path(__file__).parent.parent / "queries" / "create_attribution.sql"
+SCORING_PROFILES = Path(__file__).parent.parent / "queries" / "scoring_profiles.sql"
+CANDIDATE_PAIRS = Path(__file__).parent.parent / "queries" / "candidate_pairs.sql"
+
+QUEUE_ALL_SQL = """
+CREATE TABLE IF NOT EXISTS emissions.pending (id VARCHAR PRIMARY KEY);
+DELETE FROM emissions.pending;
+INSERT INTO emissions.pending SELECT id FROM emissions.sources;
+"""
+
+
+def run_sql_engine(con):
+    con.execute(QUEUE_ALL_SQL)
+    con.execute(SCORING_PROFILES.read_text())
+    con.execute(CANDIDATE_PAIRS.read_text())
+    con.execute(SQL_ENGINE.read_text())
+
+
+def run_kdtree_engine(con):
+    con.execute(QUEUE_ALL_SQL)
+    attribution.run(con)
+
+
+def differences(con, a: str, b: str) -> tuple:
+    """Rows only in a and rows only in b."""
+    return tuple(con.execute(f"SELECT COUNT(*) FROM (SELECT * FROM {x} EXCEPT ALL SELECT * FROM {y})").fetchone()[0]
+                 for x, y in ((a, b), (b, a)))
+
+
+def point_index_differences(con) -> int:
+    """Rows of sql_attributed that the point index answers differently, either way."""
+    index = PointIndex(attribution.load_rrc_wells(con), attribution.load_ogim_facilities(con),
+                       attribution.load_scoring_profile(con))
+    plumes = con.execute("SELECT id, ST_Y(geom), ST_X(geom) FROM emissions.sources WHERE gas = 'CH4'").fetchall()
+    results = index.attribute([{'id': plume_id, 'lat': lat, 'lon': lon} for plume_id, lat, lon in plumes])
+    schema = pa.schema([('id', pa.string())] + [attribution.ATTRIBUTED_SCHEMA.field(c) for c in RESULT_COLUMNS])
+    con.register('point_attributed', pa.Table.from_pylist(
+        [r for r in results if r['nearest_facility_id'] is not None], schema=schema))
+    columns = ', '.join(schema.names)
+    differences = sum(con.execute(
+        f"SELECT COUNT(*) FROM (SELECT {columns} FROM {a} EXCEPT ALL SELECT {columns} FROM {b})"
+    ).fetchone()[0] for a, b in (('sql_attributed', 'point_attributed'), ('point_attributed', 'sql_attributed')))
+    con.unregister('point_attributed')
+    return differences
+
+
+def main():
+    database = sys.argv[1] if len(sys.argv) > 1 else "data/data.duckdb"
+
+    with tempfile.TemporaryDirectory() as tmp:
+        copy = Path(tmp) / "check.duckdb"
+        shutil.copy(database, copy)
+        con = duckdb.connect(str(copy))
+        con.execute("INSTALL spatial; LOAD spatial;")
+        # Both engines rebuild every row, so start from the current column layout
+        con.execute("DROP TABLE IF EXISTS emissions.attributed")
+        con.execute("DROP TABLE IF EXISTS emissions.candidate_pairs CASCADE")
+
+        start = time.time()
+        run_sql_engine(con)
+        print(f"SQL engine: {time.time() - start:.1f}s")
+        con.execute("CREATE TEMP TABLE sql_attributed AS SELECT * FROM emissions.attributed")
+        con.execute("CREATE TEMP TABLE sql_pairs AS SELECT * FROM emissions.candidate_pairs")
+
+        start = time.time()
+        run_kdtree_engine(con)
+        print(f"KD-tree engine: {time.time() - start:.1f}s")
+
+        rows = con.execute("SELECT COUNT(*) FROM emissions.attributed").fetchone()[0]
+        pairs = con.execute("SELECT COUNT(*) FROM emissions.candidate_pairs").fetchone()[0]
+        missing, extra = differences(con, 'sql_attributed', 'emissions.attributed')
+        missing_pairs, extra_pairs = differences(con, 'sql_pairs', 'emissions.candidate_pairs')
+        point_differences = point_index_differences(con)
+        con.close()
+
+    print(f"{rows:,} rows; {missing:,} only from SQL, {extra:,} only from KD-tree, "
+          f"{point_differences:,} different from the point index")
+    print(f"{pairs:,} candidate pairs; {missing_pairs:,} only from SQL, {extra_pairs:,} only from KD-tree")
+    if missing or extra or missing_pairs or extra_pairs or point_differences:
+        print("✗ Attribution engines differ")
+        sys.exit(1)
+    print("✓ Attribution engines agree")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,148 +1,241 @@
 #!/usr/bin/env python3
-"""Parse Texas RRC P-4 EBCDIC data and output to CSV files matching the schema."""
+"""Parse Texas RRC P-4 EBCDIC data and load it into the p4 schema in DuckDB."""
 
 import gzip
 import sys
-import csv
-from parse_p4 import parse_root_record, parse_info_record, parse_gpn_record, parse_lease_name_record
+
+import duckdb
+import pyarrow as pa
+
+from arrow_sink import DEFAULT_DATABASE, TableSink
+from parse_p4 import (RECORD_LENGTH, ROOT_RECORD_ID, parse_root_record, parse_info_record, parse_gpn_record,
+                      parse_lease_name_record, iter_batches)
+from rrc_groups import GroupSelector, Refresh, changed_only, fingerprint_stream, refetch_skipped
+from rrc_index import p4_key
+
+ROOT_SCHEMA = pa.schema([
+    ('oil_gas_code', pa.string()),
+    ('district', pa.int32()),
+    ('lease_rrcid', pa.int32()),
+    ('field_number', pa.int32()),
+    ('on_off_schedule_indicator', pa.string()),
+    ('operator_number', pa.int32()),
+])
+
+INFO_SCHEMA = pa.schema([
+    ('oil_gas_code', pa.string()),
+    ('district', pa.int32()),
+    ('lease_rrcid', pa.int32()),
+    ('sequence_date_key', pa.int32()),
+    ('effective_date_key', pa.int32()),
+    ('effective_year', pa.int32()),
+    ('effective_month', pa.int32()),
+    ('effective_day', pa.int32()),
+    ('approval_year', pa.int32()),
+    ('approval_month', pa.int32()),
+    ('approval_day', pa.int32()),
+    ('new_well', pa.string()),
+    ('change_of_gatherer', pa.string()),
+    ('change_of_purchaser', pa.string()),
+    ('change_of_nominator', pa.string()),
+    ('chg_purch_system_no', pa.string()),
+    ('change_of_field', pa.string()),
+    ('change_of_operator', pa.string()),
+    ('change_of_lease_name', pa.string()),
+    ('consolidation_lease', pa.string()),
+    ('subdivision_lease', pa.string()),
+    ('reclassification', pa.string()),
+    ('special_form_filed', pa.string()),
+    ('oil_field_transfer', pa.string()),
+    ('type_record', pa.string()),
+    ('info_field_number', pa.int32()),
+    ('info_operator_number', pa.int32()),
+    ('p5_number_filing_on_tape', pa.int32()),
+])
+
+GPN_SCHEMA = pa.schema([
+    ('oil_gas_code', pa.string()),
+    ('district', pa.int32()),
+    ('lease_rrcid', pa.int32()),
+    ('sequence_date_key', pa.int32()),
+    ('product_code', pa.string()),
+    ('type_code', pa.string()),
+    ('percentage_key', pa.float64()),  # DECIMAL(5,4), cast on insert
+    ('gpn_number', pa.int32()),
+    ('purch_system_no', pa.int32()),
+    ('current_p4_filing', pa.string()),
+    ('actual_percent', pa.float64()),  # DECIMAL(5,4), cast on insert
+    ('inter_flag', pa.string()),
+    ('intra_flag', pa.string()),
+])
+
+LEASE_NAME_SCHEMA = pa.schema([
+    ('oil_gas_code', pa.string()),
+    ('district', pa.int32()),
+    ('lease_rrcid', pa.int32()),
+    ('sequence_date_key', pa.int32()),
+    ('effect_date_key', pa.int32()),
+    ('lease_name', pa.string()),
+])
+
+TABLES = {
+    'root': ('p4.root', ROOT_SCHEMA),
+    'info': ('p4.info', INFO_SCHEMA),
+    'gpn': ('p4.gpn', GPN_SCHEMA),
+    'lease_name': ('p4.lease_name', LEASE_NAME_SCHEMA),
+}
+
+# Lease key as produced by rrc_index.p4_key, for matching rows to fingerprints
+LEASE_KEY_SQL = "oil_gas_code || '-' || district || '-' || lease_rrcid"
+
+
+def create_sinks(con, staging: bool = False):
+    """Arrow sinks for each p4 table, keyed like the batch decoder output."""
+    return {
+        name: TableSink(con, Refresh.staging_table(table) if staging else table, schema)
+        for name, (table, schema) in TABLES.items()
+    }
+
+
+def load_batches(f, sinks, select=None):
+    """Load all records using the vectorized block decoder."""
+    for batch in iter_batches(f, select=select):
+        for table, sink in sinks.items():
+            sink.append_columns(batch[table])
+        print(f"  Processed {sinks['root'].count:,} leases...")
+
+
+def load_records(f, sinks):
+    """Load all records one at a time (reference implementation)."""
+    current_lease_key = None
+    info_records = []  # Buffer info records for current lease
+    gpn_records = []   # Buffer gpn records for current lease
+    lease_name_records = []  # Buffer lease name records for current lease
+
+    record_count = 0
+
+    def write_lease():
+        """Write all buffered records for the current lease."""
+        # Each table's row is the lease key followed by the record view's
+        # fields, which are in schema order
+        for info in info_records:
+            sinks['info'].append_row(current_lease_key + info.astuple())
+
+        for sequence_date_key, gpn in gpn_records:
+            sinks['gpn'].append_row(current_lease_key + (sequence_date_key,) + gpn.astuple())
+
+        for ln in lease_name_records:
+            sinks['lease_name'].append_row(current_lease_key + ln.astuple())
+
+    while True:
+        record = f.read(92)
+        if not record or len(record) < 92:
+            break
+
+        record_count += 1
+        if record_count % 100000 == 0:
+            print(f"  Processed {record_count:,} records...")
+
+        record_id = record[0:2].decode('cp500')
+
+        if record_id == '01':
+            # Write previous lease if we have one
+            if current_lease_key is not None:
+                write_lease()
+
+            # Start new lease
+            root = parse_root_record(record)
+            current_lease_key = (root.oil_gas_code, root.district, root.lease_rrcid)
+
+            sinks['root'].append_row(root.astuple())
+
+            info_records = []
+            gpn_records = []
+            lease_name_records = []
+
+        elif record_id == '02' and current_lease_key:
+            info = parse_info_record(record)
+            info_records.append(info)
+
+        elif record_id == '03' and current_lease_key and info_records:
+            gpn = parse_gpn_record(record)
+            # Associate with most recent info record
+            gpn_records.append((info_records[-1].sequence_date_key, gpn))
+
+        elif record_id == '07' and current_lease_key:
+            ln = parse_lease_name_record(record)
+            if ln.lease_name:  # Only store non-empty names
+                lease_name_records.append(ln)
+
+    # Write final lease
+    if current_lease_key is not None:
+        write_lease()
+
+
+def load(con, input_file: str, batch: bool = True, incremental: bool = False) -> dict:
+    """Parse a P-4 file into the p4 tables of an open DuckDB connection.
+
+    With incremental=True the tables must hold a previous full build; only
+    leases whose raw records changed are decoded and replaced, and leases
+    missing from the file are deleted. Incremental loads use the batch decoder.
+    """
+    refresh = Refresh(con, 'p4.fingerprint', [table for table, _ in TABLES.values()], LEASE_KEY_SQL)
+    previous = refresh.previous() if incremental else {}
+    if incremental:
+        refresh.create_staging()
+    sinks = create_sinks(con, staging=incremental)
+    selector = GroupSelector(RECORD_LENGTH, ROOT_RECORD_ID, p4_key, changed_only(previous) if incremental else None)
+
+    with gzip.open(input_file, 'rb') as f:
+        if batch or incremental:
+            load_batches(f, sinks, selector)
+            fingerprints = selector.fingerprints()
+        else:
+            load_records(f, sinks)
+            f.seek(0)
+            fingerprints = fingerprint_stream(f, RECORD_LENGTH, ROOT_RECORD_ID, p4_key)
+
+    if incremental:
+        # Duplicated leases whose first copy was skipped need a second pass
+        wanted = refetch_skipped(selector, previous)
+        if wanted:
+            with gzip.open(input_file, 'rb') as f:
+                load_batches(f, sinks, GroupSelector(RECORD_LENGTH, ROOT_RECORD_ID, p4_key, wanted))
+
+    for sink in sinks.values():
+        sink.flush()
+
+    if incremental:
+        stats = refresh.apply(previous, fingerprints)
+        print(f"  Leases: {stats['new']:,} new, {stats['changed']:,} changed, "
+              f"{stats['deleted']:,} deleted, {stats['unchanged']:,} unchanged")
+    else:
+        refresh.replace_fingerprints(fingerprints)
+
+    return {table: sink.count for table, sink in sinks.items()}
 
 
 def main():
-    input_file = sys.argv[1] if len(sys.argv) > 1 else "data/p4f606.ebc.gz"
-    root_csv = sys.argv[2] if len(sys.argv) > 2 else "/tmp/root.csv"
-    info_csv = sys.argv[3] if len(sys.argv) > 3 else "/tmp/info.csv"
-    gpn_csv = sys.argv[4] if len(sys.argv) > 4 else "/tmp/gpn.csv"
-    lease_name_csv = sys.argv[5] if len(sys.argv) > 5 else "/tmp/lease_name.csv"
-
-    print(f"Parsing {input_file}...")
-
-    with gzip.open(input_file, 'rb') as f, \
-         open(root_csv, 'w', newline='') as root_out, \
-         open(info_csv, 'w', newline='') as info_out, \
-         open(gpn_csv, 'w', newline='') as gpn_out, \
-         open(lease_name_csv, 'w', newline='') as lease_name_out:
-
-        root_writer = csv.writer(root_out)
-        info_writer = csv.writer(info_out)
-        gpn_writer = csv.writer(gpn_out)
-        lease_name_writer = csv.writer(lease_name_out)
-
-        # Write headers
-        root_writer.writerow(['oil_gas_code', 'district', 'lease_rrcid', 'field_number',
-                              'on_off_schedule_indicator', 'operator_number'])
-
-        info_writer.writerow(['oil_gas_code', 'district', 'lease_rrcid', 'sequence_date_key',
-                              'effective_date_key', 'effective_year', 'effective_month', 'effective_day',
-                              'approval_year', 'approval_month', 'approval_day',
-                              'new_well', 'change_of_gatherer', 'change_of_purchaser', 'change_of_nominator',
-                              'chg_purch_system_no', 'change_of_field', 'change_of_operator', 'change_of_lease_name',
-                              'consolidation_lease', 'subdivision_lease', 'reclassification', 'special_form_filed',
-                              'oil_field_transfer', 'type_record', 'info_field_number', 'info_operator_number',
-                              'p5_number_filing_on_tape'])
-
-        gpn_writer.writerow(['oil_gas_code', 'district', 'lease_rrcid', 'sequence_date_key',
-                            'product_code', 'type_code', 'percentage_key', 'gpn_number', 'purch_system_no',
-                            'current_p4_filing', 'actual_percent', 'inter_flag', 'intra_flag'])
-
-        lease_name_writer.writerow(['oil_gas_code', 'district', 'lease_rrcid', 'sequence_date_key',
-                                    'effect_date_key', 'lease_name'])
-
-        current_lease_key = None
-        info_records = []  # Buffer info records for current lease
-        gpn_records = []   # Buffer gpn records for current lease
-        lease_name_records = []  # Buffer lease name records for current lease
-
-        record_count = 0
-        root_count = 0
-        info_count = 0
-        gpn_count = 0
-        lease_name_count = 0
-
-        def write_lease():
-            """Write all buffered records for the current lease."""
-            nonlocal info_count, gpn_count, lease_name_count
-
-            for info in info_records:
-                info_writer.writerow([
-                    current_lease_key[0], current_lease_key[1], current_lease_key[2],
-                    info.sequence_date_key, info.effective_date_key,
-                    info.effective_year, info.effective_month, info.effective_day,
-                    info.approval_year, info.approval_month, info.approval_day,
-                    info.new_well, info.change_of_gatherer, info.change_of_purchaser, info.change_of_nominator,
-                    info.chg_purch_system_no, info.change_of_field, info.change_of_operator, info.change_of_lease_name,
-                    info.consolidation_lease, info.subdivision_lease, info.reclassification, info.special_form_filed,
-                    info.oil_field_transfer, info.type_record, info.info_field_number, info.info_operator_number,
-                    info.p5_number_filing_on_tape
-                ])
-                info_count += 1
-
-            for gpn in gpn_records:
-                gpn_writer.writerow([
-                    current_lease_key[0], current_lease_key[1], current_lease_key[2],
-                    gpn[0],  # sequence_date_key
-                    gpn[1].product_code, gpn[1].type_code, gpn[1].percentage_key, gpn[1].gpn_number,
-                    gpn[1].purch_system_no, gpn[1].current_p4_filing, gpn[1].actual_percent,
-                    gpn[1].inter_flag, gpn[1].intra_flag
-                ])
-                gpn_count += 1
-
-            for ln in lease_name_records:
-                lease_name_writer.writerow([
-                    current_lease_key[0], current_lease_key[1], current_lease_key[2],
-                    ln.sequence_date_key, ln.effect_date_key, ln.lease_name
-                ])
-                lease_name_count += 1
-
-        while True:
-            record = f.read(92)
-            if not record or len(record) < 92:
-                break
-
-            record_count += 1
-            if record_count % 100000 == 0:
-                print(f"  Processed {record_count:,} records...")
-
-            record_id = record[0:2].decode('cp500')
-
-            if record_id == '01':
-                # Write previous lease if we have one
-                if current_lease_key is not None:
-                    write_lease()
-
-                # Start new lease
-                root = parse_root_record(record)
-                current_lease_key = (root.oil_gas_code, root.district, root.lease_rrcid)
-
-                root_writer.writerow([
-                    root.oil_gas_code, root.district, root.lease_rrcid,
-                    root.field_number, root.on_off_schedule_indicator, root.operator_number
-                ])
-                root_count += 1
-
-                info_records = []
-                gpn_records = []
-                lease_name_records = []
-
-            elif record_id == '02' and current_lease_key:
-                info = parse_info_record(record)
-                info_records.append(info)
-
-            elif record_id == '03' and current_lease_key and info_records:
-                gpn = parse_gpn_record(record)
-                # Associate with most recent info record
-                gpn_records.append((info_records[-1].sequence_date_key, gpn))
-
-            elif record_id == '07' and current_lease_key:
-                ln = parse_lease_name_record(record)
-                if ln.lease_name:  # Only store non-empty names
-                    lease_name_records.append(ln)
-
-        # Write final lease
-        if current_lease_key is not None:
-            write_lease()
-
-    print(f"\nParsed {root_count:,} root records, {info_count:,} info records, {gpn_count:,} GPN records, and {lease_name_count:,} lease name records")
-    print(f"Output: {root_csv}, {info_csv}, {gpn_csv}, {lease_name_csv}")
+    # --batch selects the vectorized block decoder; the record-by-record
+    # path is kept as the reference implementation. --incremental refreshes
+    # an existing build in place, rewriting only changed leases.
+    batch = '--batch' in sys.argv
+    incremental = '--incremental' in sys.argv
+    args = [arg for arg in sys.argv[1:] if arg not in ('--batch', '--incremental')]
+    input_file = args[0] if len(args) > 0 else "data/p4f606.ebc.gz"
+    database = args[1] if len(args) > 1 else DEFAULT_DATABASE
+
+    print(f"Parsing {input_file}{' (incremental)' if incremental else ''}...")
+
+    con = duckdb.connect(database)
+    try:
+        counts = load(con, input_file, batch=batch, incremental=incremental)
+    finally:
+        con.close()
+
+    print(f"\nLoaded {counts['root']:,} root records, {counts['info']:,} info records, "
+          f"{counts['gpn']:,} GPN records, and {counts['lease_name']:,} lease name records")
+    print(f"Output: {database} (p4 schema)")
 
 
 if __name__ == '__main__':
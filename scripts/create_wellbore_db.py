@@ -1,109 +1,316 @@
 #!/usr/bin/env python3
-"""Parse Texas RRC Well Bore EBCDIC data and output to CSV files."""
+"""Parse Texas RRC Well Bore EBCDIC data and load it into the wellbore schema in DuckDB."""
 
 import gzip
+import os
 import sys
-import csv
-from parse_wellbore import parse_root_record, parse_new_location_record, parse_well_id_record
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import duckdb
+import numpy as np
+import pyarrow as pa
+
+from arrow_sink import DEFAULT_DATABASE, TableSink, columns_to_table, rows_to_table
+from parse_wellbore import (LOCATION_COORDINATES, NEW_LOCATION_LAYOUT, WELL_KEY, decode_location_coordinates,
+                            parse_root_record, parse_well_id_record)
+from record_view import record_view
+from rrc_groups import GroupSelector, Refresh, changed_only, group_digests, iter_aligned_blocks, refetch_skipped
+from rrc_index import chunk_ranges, has_index, open_indexed, read_range, wellbore_key
+
+ROOT_SCHEMA = pa.schema([
+    ('api_county', pa.int32()),
+    ('api_unique', pa.int32()),
+    ('field_district', pa.int32()),
+    ('res_county_code', pa.int32()),
+    ('orig_compl_century', pa.int32()),
+    ('orig_compl_year', pa.int32()),
+    ('orig_compl_month', pa.int32()),
+    ('orig_compl_day', pa.int32()),
+    ('total_depth', pa.int32()),
+    ('newest_drill_permit_nbr', pa.int32()),
+    ('fresh_water_flag', pa.string()),
+    ('plug_flag', pa.string()),
+    ('completion_data_ind', pa.string()),
+])
+
+LOCATION_SCHEMA = pa.schema([
+    ('api_county', pa.int32()),
+    ('api_unique', pa.int32()),
+    ('loc_county', pa.int32()),
+    ('abstract', pa.string()),
+    ('survey', pa.string()),
+    ('block_number', pa.string()),
+    ('section', pa.string()),
+    ('alt_section', pa.string()),
+    ('alt_abstract', pa.string()),
+    ('feet_from_sur_sect_1', pa.int32()),
+    ('direc_from_sur_sect_1', pa.string()),
+    ('feet_from_sur_sect_2', pa.int32()),
+    ('direc_from_sur_sect_2', pa.string()),
+    ('wgs84_latitude', pa.float64()),
+    ('wgs84_longitude', pa.float64()),
+    ('plane_zone', pa.int32()),
+    ('plane_coordinate_east', pa.float64()),
+    ('plane_coordinate_north', pa.float64()),
+    ('verification_flag', pa.string()),
+])
+
+# Location rows get their point geometry and grid cell (see schema.sql) on insert
+LOCATION_SELECT = """
+SELECT
+    api_county, api_unique, loc_county, abstract, survey,
+    block_number, section, alt_section, alt_abstract,
+    feet_from_sur_sect_1, direc_from_sur_sect_1,
+    feet_from_sur_sect_2, direc_from_sur_sect_2,
+    wgs84_latitude,
+    -ABS(wgs84_longitude) as wgs84_longitude,  -- Texas longitudes are negative (western hemisphere)
+    -- Create geometry point, handling zero coordinates
+    CASE
+        WHEN wgs84_latitude != 0 AND wgs84_longitude != 0
+        THEN ST_Point(-ABS(wgs84_longitude), wgs84_latitude)
+        ELSE NULL
+    END as geom,
+    CASE WHEN wgs84_latitude != 0 AND wgs84_longitude != 0 THEN grid_cell(-ABS(wgs84_longitude)) END as grid_x,
+    CASE WHEN wgs84_latitude != 0 AND wgs84_longitude != 0 THEN grid_cell(wgs84_latitude) END as grid_y,
+    plane_zone, plane_coordinate_east, plane_coordinate_north,
+    verification_flag
+FROM batch
+"""
+
+WELLID_SCHEMA = pa.schema([
+    ('api_county', pa.int32()),
+    ('api_unique', pa.int32()),
+    ('oil_gas_code', pa.string()),
+    ('district', pa.int32()),
+    ('lease_number', pa.int32()),
+    ('well_number', pa.string()),
+    ('gas_rrcid', pa.int32()),
+])
+
+
+RECORD_LENGTH = 247
+CHUNK_RECORDS = 65536  # ~16 MB of records per parallel work unit
+
+# EBCDIC '01' - record type of the well bore root that every child record follows
+ROOT_RECORD_ID = '01'.encode('cp500')
+LOCATION_RECORD_ID = '13'.encode('cp500')
+WELL_ID_RECORD_ID = '21'.encode('cp500')
+
+# Location records without their zoned decimal coordinates, which
+# parse_chunk decodes for the whole chunk at once
+_COORDINATES = {name for name, *_ in LOCATION_COORDINATES}
+LocationFields = record_view('LocationFields', tuple(field for field in NEW_LOCATION_LAYOUT
+                                                     if field[0] not in _COORDINATES), context=WELL_KEY)
+
+SCHEMAS = {
+    'root': ROOT_SCHEMA,
+    'location': LOCATION_SCHEMA,
+    'wellid': WELLID_SCHEMA,
+}
+
+# API key as produced by rrc_index.wellbore_key, for matching rows to fingerprints
+API_KEY_SQL = "api_county || '-' || api_unique"
+
+
+def parse_chunk(data: bytes) -> dict:
+    """Parse a run of well bore records into Arrow tables keyed by table name.
+
+    Chunks are cut on root-record boundaries, so child records never need
+    state from a previous chunk; any children before the first root are
+    skipped, as they are at the start of the file.
+    """
+    rows = {'root': [], 'location': [], 'wellid': []}
+    location_indexes = []
+    current_api = None
+
+    # Records are views into the chunk rather than copies of it; their
+    # fields are in schema order, so astuple() is the row
+    buffer = memoryview(data)
+    for offset in range(0, len(data) - RECORD_LENGTH + 1, RECORD_LENGTH):
+        record = buffer[offset:offset + RECORD_LENGTH]
+        record_id = data[offset:offset + 2]
+
+        if record_id == ROOT_RECORD_ID:
+            # Root record - start of new well bore
+            root = parse_root_record(record)
+            current_api = (root.api_county, root.api_unique)
+            rows['root'].append(root.astuple())
+
+        elif record_id == LOCATION_RECORD_ID and current_api:
+            # New location record
+            rows['location'].append(LocationFields(record, *current_api).astuple())
+            location_indexes.append(offset // RECORD_LENGTH)
+
+        elif record_id == WELL_ID_RECORD_ID and current_api:
+            # Well-ID record - links API to RRC lease identifiers
+            rows['wellid'].append(parse_well_id_record(record, *current_api).astuple())
+
+    tables = {table: rows_to_table(rows[table], SCHEMAS[table]) for table in ('root', 'wellid')}
+    tables['location'] = location_table(data, location_indexes, rows['location'])
+    return tables
+
+
+def location_table(data: bytes, indexes: list, rows: list) -> pa.Table:
+    """The location rows of a chunk, with coordinates decoded in one batch.
+
+    Malformed coordinates decode to NaN and are loaded as NULL.
+    """
+    records = np.frombuffer(data, dtype=np.uint8, count=len(data) // RECORD_LENGTH * RECORD_LENGTH)
+    coordinates = decode_location_coordinates(records.reshape(-1, RECORD_LENGTH)[indexes])
+    columns = dict(zip(LocationFields.FIELDS, zip(*rows))) if rows else \
+        {name: [] for name in LocationFields.FIELDS}
+    columns.update((name, pa.array(values, from_pandas=True)) for name, values in coordinates.items())
+    return columns_to_table(columns, LOCATION_SCHEMA)
+
+
+def _in_order(pool, calls, jobs: int):
+    """Submit calls to a pool, yielding results in submission order.
+
+    Only a bounded number of calls is in flight so memory stays flat.
+    """
+    in_flight = deque()
+    for fn, *args in calls:
+        in_flight.append(pool.submit(fn, *args))
+        if len(in_flight) >= 2 * jobs:
+            yield in_flight.popleft().result()
+    while in_flight:
+        yield in_flight.popleft().result()
+
+
+def iter_parsed_chunks(f, jobs: int, select):
+    """Parse chunks of a sequential stream, in a process pool if jobs > 1.
+
+    Each root-aligned chunk goes through `select` (a GroupSelector) first,
+    which fingerprints its well bores and drops any that need no parsing.
+    """
+    chunks = (select(chunk) for chunk in iter_aligned_blocks(f, RECORD_LENGTH, ROOT_RECORD_ID, CHUNK_RECORDS))
+    if jobs <= 1:
+        for chunk in chunks:
+            yield parse_chunk(chunk)
+        return
+
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        yield from _in_order(pool, ((parse_chunk, chunk) for chunk in chunks), jobs)
+
+
+# Per-worker handle on the indexed gzip file (see iter_indexed_chunks)
+_indexed_file = None
+
+
+def _open_indexed_file(input_file: str):
+    global _indexed_file
+    _indexed_file = open_indexed(input_file)
+
+
+def parse_range(start: int, end):
+    """Decompress and parse one root-aligned byte range in a worker.
+
+    Returns the parsed tables and the (key, digest) of each well bore.
+    """
+    data = read_range(_indexed_file, start, end, RECORD_LENGTH)
+    return parse_chunk(data), group_digests(data, RECORD_LENGTH, ROOT_RECORD_ID, wellbore_key)
+
+
+def iter_indexed_chunks(input_file: str, jobs: int, selector: GroupSelector):
+    """Parse root-aligned ranges in a process pool using the seek index.
+
+    Each worker seeks to its own range, so decompression is parallel too.
+    Well bore digests from the workers are recorded in `selector` in order.
+    """
+    ranges = chunk_ranges(input_file, CHUNK_RECORDS * RECORD_LENGTH)
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_open_indexed_file,
+                             initargs=(input_file,)) as pool:
+        for tables, digests in _in_order(pool, ((parse_range, start, end) for start, end in ranges), jobs):
+            for key, group_digest in digests:
+                selector.add(key, group_digest)
+            yield tables
+
+
+def load(con, input_file: str, jobs: int = 1, incremental: bool = False) -> dict:
+    """Parse a wellbore file into the wellbore tables of an open DuckDB connection.
+
+    With incremental=True the tables must hold a previous full build; only
+    well bores whose raw records changed are parsed and replaced, and wells
+    missing from the file are deleted.
+    """
+    con.execute("INSTALL spatial; LOAD spatial;")
+
+    tables = {'root': 'wellbore.root', 'location': 'wellbore.location', 'wellid': 'wellbore.wellid'}
+    refresh = Refresh(con, 'wellbore.fingerprint', list(tables.values()), API_KEY_SQL)
+    previous = refresh.previous() if incremental else {}
+    if incremental:
+        refresh.create_staging()
+        tables = {name: Refresh.staging_table(table) for name, table in tables.items()}
+
+    sinks = {
+        'root': TableSink(con, tables['root'], ROOT_SCHEMA),
+        'location': TableSink(con, tables['location'], LOCATION_SCHEMA, LOCATION_SELECT),
+        'wellid': TableSink(con, tables['wellid'], WELLID_SCHEMA),
+    }
+    selector = GroupSelector(RECORD_LENGTH, ROOT_RECORD_ID, wellbore_key,
+                             changed_only(previous) if incremental else None)
+
+    def load_parsed(parsed):
+        for parsed_tables in parsed:
+            for table, sink in sinks.items():
+                sink.append_table(parsed_tables[table])
+            print(f"  Processed {sinks['root'].count:,} well bores...")
+
+    with gzip.open(input_file, 'rb') as f:
+        # The indexed path parses every well, so it only serves full builds
+        if jobs > 1 and has_index(input_file) and not incremental:
+            load_parsed(iter_indexed_chunks(input_file, jobs, selector))
+        else:
+            load_parsed(iter_parsed_chunks(f, jobs, selector))
+
+    fingerprints = selector.fingerprints()
+    if incremental:
+        # Duplicated wells whose first copy was skipped need a second pass
+        wanted = refetch_skipped(selector, previous)
+        if wanted:
+            with gzip.open(input_file, 'rb') as f:
+                select = GroupSelector(RECORD_LENGTH, ROOT_RECORD_ID, wellbore_key, wanted)
+                load_parsed(iter_parsed_chunks(f, jobs, select))
+
+        stats = refresh.apply(previous, fingerprints)
+        print(f"  Well bores: {stats['new']:,} new, {stats['changed']:,} changed, "
+              f"{stats['deleted']:,} deleted, {stats['unchanged']:,} unchanged")
+    else:
+        refresh.replace_fingerprints(fingerprints)
+
+    return {table: sink.count for table, sink in sinks.items()}
 
 
 def main():
-    input_file = sys.argv[1] if len(sys.argv) > 1 else "data/dbf900.ebc.gz"
-    root_csv = sys.argv[2] if len(sys.argv) > 2 else "/tmp/wellbore_root.csv"
-    location_csv = sys.argv[3] if len(sys.argv) > 3 else "/tmp/wellbore_location.csv"
-    wellid_csv = sys.argv[4] if len(sys.argv) > 4 else "/tmp/wellbore_wellid.csv"
-
-    print(f"Parsing {input_file}...")
-
-    with gzip.open(input_file, 'rb') as f, \
-         open(root_csv, 'w', newline='') as root_out, \
-         open(location_csv, 'w', newline='') as location_out, \
-         open(wellid_csv, 'w', newline='') as wellid_out:
-
-        root_writer = csv.writer(root_out)
-        location_writer = csv.writer(location_out)
-        wellid_writer = csv.writer(wellid_out)
-
-        # Write headers
-        root_writer.writerow([
-            'api_county', 'api_unique', 'field_district', 'res_county_code',
-            'orig_compl_century', 'orig_compl_year', 'orig_compl_month', 'orig_compl_day',
-            'total_depth', 'newest_drill_permit_nbr',
-            'fresh_water_flag', 'plug_flag', 'completion_data_ind'
-        ])
-
-        location_writer.writerow([
-            'api_county', 'api_unique', 'loc_county', 'abstract', 'survey',
-            'block_number', 'section', 'alt_section', 'alt_abstract',
-            'feet_from_sur_sect_1', 'direc_from_sur_sect_1',
-            'feet_from_sur_sect_2', 'direc_from_sur_sect_2',
-            'wgs84_latitude', 'wgs84_longitude',
-            'plane_zone', 'plane_coordinate_east', 'plane_coordinate_north',
-            'verification_flag'
-        ])
-
-        wellid_writer.writerow([
-            'api_county', 'api_unique', 'oil_gas_code', 'district',
-            'lease_number', 'well_number', 'gas_rrcid'
-        ])
-
-        current_api = None
-        record_count = 0
-        root_count = 0
-        location_count = 0
-        wellid_count = 0
-
-        while True:
-            record = f.read(247)
-            if not record or len(record) < 247:
-                break
-
-            record_count += 1
-            if record_count % 100000 == 0:
-                print(f"  Processed {record_count:,} records...")
-
-            record_id = record[0:2].decode('cp500')
-
-            if record_id == '01':
-                # Root record - start of new well bore
-                root = parse_root_record(record)
-                current_api = (root.api_county, root.api_unique)
-
-                root_writer.writerow([
-                    root.api_county, root.api_unique, root.field_district, root.res_county_code,
-                    root.orig_compl_century, root.orig_compl_year, root.orig_compl_month, root.orig_compl_day,
-                    root.total_depth, root.newest_drill_permit_nbr,
-                    root.fresh_water_flag, root.plug_flag, root.completion_data_ind
-                ])
-                root_count += 1
-
-            elif record_id == '13' and current_api:
-                # New location record
-                loc = parse_new_location_record(record, current_api[0], current_api[1])
-
-                location_writer.writerow([
-                    loc.api_county, loc.api_unique, loc.loc_county, loc.abstract, loc.survey,
-                    loc.block_number, loc.section, loc.alt_section, loc.alt_abstract,
-                    loc.feet_from_sur_sect_1, loc.direc_from_sur_sect_1,
-                    loc.feet_from_sur_sect_2, loc.direc_from_sur_sect_2,
-                    loc.wgs84_latitude, loc.wgs84_longitude,
-                    loc.plane_zone, loc.plane_coordinate_east, loc.plane_coordinate_north,
-                    loc.verification_flag
-                ])
-                location_count += 1
-
-            elif record_id == '21' and current_api:
-                # Well-ID record - links API to RRC lease identifiers
-                wellid = parse_well_id_record(record, current_api[0], current_api[1])
-
-                wellid_writer.writerow([
-                    wellid.api_county, wellid.api_unique, wellid.oil_gas_code, wellid.district,
-                    wellid.lease_number, wellid.well_number, wellid.gas_rrcid
-                ])
-                wellid_count += 1
-
-    print(f"\nParsed {root_count:,} well bore records, {location_count:,} location records, and {wellid_count:,} well-ID records")
-    print(f"Output: {root_csv}, {location_csv}, {wellid_csv}")
+    # --jobs=N parses chunks of the file in N worker processes; with a seek
+    # index (rrc_index.py build) the workers also decompress in parallel.
+    # --incremental refreshes an existing build, rewriting only changed wells.
+    jobs = 1
+    incremental = False
+    args = []
+    for arg in sys.argv[1:]:
+        if arg.startswith('--jobs='):
+            jobs = int(arg.split('=', 1)[1]) or os.cpu_count()
+        elif arg == '--incremental':
+            incremental = True
+        else:
+            args.append(arg)
+    input_file = args[0] if len(args) > 0 else "data/dbf900.ebc.gz"
+    database = args[1] if len(args) > 1 else DEFAULT_DATABASE
+
+    print(f"Parsing {input_file} ({jobs} job{'s' if jobs != 1 else ''}"
+          f"{', incremental' if incremental else ''})...")
+
+    con = duckdb.connect(database)
+    try:
+        counts = load(con, input_file, jobs=jobs, incremental=incremental)
+    finally:
+        con.close()
+
+    print(f"\nLoaded {counts['root']:,} well bore records, {counts['location']:,} location records, "
+          f"and {counts['wellid']:,} well-ID records")
+    print(f"Output: {database} (wellbore schema)")
 
 
 if __name__ == '__main__':
@@ -1,9 +1,35 @@
 #!/usr/bin/env python3
-"""Download Texas RRC EBCDIC data files from MFT server using Playwright."""
-
+"""Download Texas RRC EBCDIC data files from MFT server using Playwright.
+
+Each file is fetched in its own browser context, concurrently. The browser
+only finds the file on its MFT page and starts the download; the transfer
+itself is streamed over HTTP into `<file>.part`, resuming with Range requests
+after an interruption. A `<file>.part.json` marker is kept next to an
+unfinished download; the next run resumes it if the file was not
+republished in between.
+
+The file's row on the MFT page (name, size, date) is saved with its size
+and SHA-256 in `<file>.meta.json`; files whose row is unchanged are skipped.
+
+Usage:
+  download_rrc.py [--force] [--base-url=URL] [output_dir] [file ...]
+
+--base-url (or $RRC_MFT_URL) points at another MFT server, such as the
+stand-in of scripts/fake_mft.py.
+"""
+
+import asyncio
+import datetime
+import hashlib
+import http.client
+import json
+import os
+import re
 import sys
+import time
+import urllib.error
+import urllib.request
 from pathlib import Path
-from playwright.sync_api import sync_playwright
 
 # MFT link IDs for each dataset (from RRC downloads page)
 DATASETS = {
@@ -12,52 +38,210 @@ DATASETS = {
     'dbf900.ebc.gz': 'b070ce28-5c58-4fe2-9eb7-8b70befb7af9',   # Full Wellbore
 }
 
-
-def download_file(page, filename: str, link_id: str, output_dir: Path) -> Path:
-    """Download a single file from MFT."""
-    url = f'https://mft.rrc.texas.gov/link/{link_id}'
+DEFAULT_BASE_URL = 'https://mft.rrc.texas.gov'
+DOWNLOAD_TIMEOUT_MS = 300_000
+READ_TIMEOUT = 60           # seconds without data before a transfer counts as interrupted
+RETRIES = 5                 # resumed attempts per run before giving up
+RETRY_DELAY = 5             # seconds, times the attempt number
+CHUNK = 1 << 20
+
+
+def meta_path(path: Path) -> Path:
+    return path.with_name(path.name + '.meta.json')
+
+
+def part_path(path: Path) -> Path:
+    return path.with_name(path.name + '.part')
+
+
+def marker_path(path: Path) -> Path:
+    return path.with_name(path.name + '.part.json')
+
+
+def read_json(path: Path) -> dict:
+    return json.loads(path.read_text()) if path.exists() else {}
+
+
+def is_current(path: Path, listing: str) -> bool:
+    """Whether path is a complete download of the file the MFT row describes."""
+    meta = read_json(meta_path(path))
+    return (path.exists() and meta.get('listing') == listing
+            and meta.get('bytes') == path.stat().st_size)
+
+
+def sha256_file(path: Path) -> str:
+    sha256 = hashlib.sha256()
+    with open(path, 'rb') as f:
+        while chunk := f.read(CHUNK):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+def content_total(response, offset: int):
+    """Full size of the file being served, if the response says."""
+    if response.status == 206:
+        match = re.search(r'/(\d+)$', response.headers.get('Content-Range', ''))
+        return int(match.group(1)) if match else None
+    length = response.headers.get('Content-Length')
+    return int(length) if length is not None else None
+
+
+def fetch(url: str, part: Path, headers: dict = None) -> int:
+    """Stream url into part, resuming from part's size; return the final size.
+
+    Interrupted transfers are resumed with a Range request up to RETRIES
+    times. HTTP errors other than 416 (a part that is already complete, or
+    longer than the file) are raised at once.
+    """
+    headers = headers or {}
+    for attempt in range(1, RETRIES + 1):
+        offset = part.stat().st_size if part.exists() else 0
+        request = urllib.request.Request(url, headers={**headers, 'Range': f'bytes={offset}-'} if offset else headers)
+        try:
+            with urllib.request.urlopen(request, timeout=READ_TIMEOUT) as response:
+                if offset and response.status != 206:
+                    offset = 0  # range ignored: start over
+                total = content_total(response, offset)
+                with open(part, 'ab' if offset else 'wb') as f:
+                    while chunk := response.read(CHUNK):
+                        f.write(chunk)
+            size = part.stat().st_size
+            if total is None or size == total:
+                return size
+            raise http.client.IncompleteRead(b'', total - size)
+        except urllib.error.HTTPError as error:
+            if error.code != 416:
+                raise
+            # Range past the end: the part is already complete if it is as
+            # long as the file (the run stopped before finish()), else stale
+            total = re.fullmatch(r'bytes \*/(\d+)', error.headers.get('Content-Range', '').strip())
+            if total and part.exists() and part.stat().st_size == int(total.group(1)):
+                return part.stat().st_size
+            part.unlink(missing_ok=True)
+        except (OSError, http.client.HTTPException) as error:
+            print(f"  {part.name}: interrupted at {part.stat().st_size if part.exists() else 0:,} bytes "
+                  f"({error.__class__.__name__}), attempt {attempt}/{RETRIES}")
+            if attempt < RETRIES:
+                time.sleep(RETRY_DELAY * attempt)
+    raise IOError(f"{url}: download still incomplete after {RETRIES} attempts")
+
+
+def finish(output_path: Path, listing: str, url: str):
+    """Move a complete .part into place and record its metadata."""
+    part = part_path(output_path)
+    meta = {
+        'listing': listing,
+        'bytes': part.stat().st_size,
+        'sha256': sha256_file(part),
+        'url': url,
+        'downloaded_at': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+    }
+    part.replace(output_path)
+    meta_path(output_path).write_text(json.dumps(meta, indent=2) + "\n")
+    marker_path(output_path).unlink(missing_ok=True)
+
+
+async def click_download(page, row):
+    """Select the file's row and click Download; return the browser download."""
+    await row.click(force=True)
+    await page.wait_for_timeout(500)
+    async with page.expect_download(timeout=DOWNLOAD_TIMEOUT_MS) as download_info:
+        await page.locator('button:has-text("Download")').click(force=True)
+    return await download_info.value
+
+
+async def download_file(browser, base_url: str, filename: str, link_id: str, output_dir: Path,
+                        force: bool = False) -> str:
+    """Download a single file from MFT; return 'downloaded' or 'unchanged'."""
+    url = f'{base_url}/link/{link_id}'
     output_path = output_dir / filename
-
-    page.goto(url)
-    page.wait_for_load_state('networkidle')
-
-    # Select file row, then click Download
-    page.locator(f'a:has-text("{filename}")').locator('xpath=ancestor::tr').click(force=True)
-    page.wait_for_timeout(500)
-
-    with page.expect_download(timeout=300000) as download_info:
-        page.locator('button:has-text("Download")').click(force=True)
-
-    download = download_info.value
-    download.save_as(output_path)
-
-    size_mb = output_path.stat().st_size / 1024 / 1024
-    print(f"  {filename}: {size_mb:.1f} MB")
-
-    return output_path
+    part, marker = part_path(output_path), marker_path(output_path)
+
+    context = await browser.new_context(accept_downloads=True, viewport={'width': 1920, 'height': 1080})
+    try:
+        page = await context.new_page()
+        await page.goto(url)
+        await page.wait_for_load_state('networkidle')
+
+        # The file's row (name, size, date) identifies the published version
+        row = page.locator(f'a:has-text("{filename}")').locator('xpath=ancestor::tr')
+        listing = ' '.join((await row.inner_text()).split())
+        if not force and is_current(output_path, listing):
+            print(f"  {filename}: unchanged ({listing})")
+            return 'unchanged'
+
+        # A partial download of another version can't be resumed
+        if part.exists() and read_json(marker).get('listing') != listing:
+            part.unlink()
+
+        download = await click_download(page, row)
+        download_url = download.url
+        await download.cancel()
+        marker.write_text(json.dumps({'listing': listing, 'url': download_url}, indent=2) + "\n")
+
+        cookies = '; '.join(f"{c['name']}={c['value']}" for c in await context.cookies())
+        headers = {'Cookie': cookies} if cookies else {}
+        try:
+            await asyncio.to_thread(fetch, download_url, part, headers)
+        except urllib.error.HTTPError as error:
+            # The link only works inside the browser: let it download the
+            # whole file instead (no resume)
+            print(f"  {filename}: direct download refused (HTTP {error.code}), using the browser")
+            download = await click_download(page, row)
+            await download.save_as(part)
+
+        finish(output_path, listing, download_url)
+        print(f"  {filename}: {output_path.stat().st_size / 1024 / 1024:.1f} MB")
+        return 'downloaded'
+    finally:
+        await context.close()
+
+
+async def download_all(base_url: str, filenames: list, output_dir: Path, force: bool = False) -> dict:
+    """Download files concurrently; return each file's outcome or exception."""
+    from playwright.async_api import async_playwright
+
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=True)
+        try:
+            results = await asyncio.gather(
+                *(download_file(browser, base_url, filename, DATASETS[filename], output_dir, force)
+                  for filename in filenames),
+                return_exceptions=True)
+        finally:
+            await browser.close()
+    return dict(zip(filenames, results))
 
 
 def main():
-    output_dir = Path(sys.argv[1]) if len(sys.argv) > 1 else Path('data')
-    files_to_download = sys.argv[2:] if len(sys.argv) > 2 else list(DATASETS.keys())
+    force = '--force' in sys.argv
+    base_url = os.environ.get('RRC_MFT_URL', DEFAULT_BASE_URL)
+    args = []
+    for arg in sys.argv[1:]:
+        if arg.startswith('--base-url='):
+            base_url = arg.split('=', 1)[1]
+        elif arg != '--force':
+            args.append(arg)
+    output_dir = Path(args[0]) if args else Path('data')
+    files_to_download = args[1:] or list(DATASETS.keys())
+
+    unknown = [filename for filename in files_to_download if filename not in DATASETS]
+    for filename in unknown:
+        print(f"  Unknown file: {filename}", file=sys.stderr)
+    files_to_download = [filename for filename in files_to_download if filename in DATASETS]
 
     output_dir.mkdir(parents=True, exist_ok=True)
 
     print(f"Downloading {len(files_to_download)} file(s) from Texas RRC MFT...")
-
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True)
-        context = browser.new_context(accept_downloads=True, viewport={'width': 1920, 'height': 1080})
-        page = context.new_page()
-
-        for filename in files_to_download:
-            if filename not in DATASETS:
-                print(f"  Unknown file: {filename}", file=sys.stderr)
-                continue
-            download_file(page, filename, DATASETS[filename], output_dir)
-
-        browser.close()
-
+    results = asyncio.run(download_all(base_url.rstrip('/'), files_to_download, output_dir, force))
+
+    failed = {filename: error for filename, error in results.items() if isinstance(error, BaseException)}
+    for filename, error in failed.items():
+        partial = part_path(output_dir / filename)
+        kept = f" (partial download kept in {partial})" if partial.exists() else ""
+        print(f"  {filename}: failed: {error}{kept}", file=sys.stderr)
+    if failed:
+        sys.exit(1)
     print("Done")
 
 
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""Export a query as GeoParquet, in small row groups clients can range-read.
+
+The query (see queries/exports/*_geoparquet.sql) returns its rows in Hilbert
+curve order with a WKB `geometry` column and a `bbox` struct of xmin, ymin,
+xmax and ymax. Rows are written ROW_GROUP_ROWS at a time, so each row group
+covers a compact area, and the file's GeoParquet 1.1 metadata declares bbox
+as the geometry's covering: a client reading the footer can skip every row
+group whose bbox statistics miss its view and fetch the rest with HTTP range
+requests (DuckDB's COPY can't write row groups below 2,048 rows).
+
+Usage:
+  export_geoparquet.py [--row-group-rows=N] QUERY_FILE OUTPUT [database]
+"""
+
+import json
+import struct
+import sys
+import time
+from pathlib import Path
+
+import duckdb
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+ROW_GROUP_ROWS = 500
+
+# WKB geometry type codes (ISO Z/M/ZM variants add 1000/2000/3000)
+WKB_TYPES = {1: 'Point', 2: 'LineString', 3: 'Polygon', 4: 'MultiPoint',
+             5: 'MultiLineString', 6: 'MultiPolygon', 7: 'GeometryCollection'}
+WKB_SUFFIXES = {0: '', 1: ' Z', 2: ' M', 3: ' ZM'}
+
+
+def geometry_types(geometry) -> set:
+    """GeoParquet geometry type names of a WKB column."""
+    names = set()
+    for header in pc.unique(pc.binary_slice(geometry.drop_null(), 0, 5)).to_pylist():
+        (code,) = struct.unpack('<I' if header[0] == 1 else '>I', header[1:5])
+        names.add(WKB_TYPES[code % 1000] + WKB_SUFFIXES[code // 1000])
+    return names
+
+
+def batch_extent(batch) -> list:
+    """xmin, ymin, xmax, ymax of a batch's `bbox` column (None where all null)."""
+    bbox = batch.column('bbox')
+    return [pc.min(pc.struct_field(bbox, 'xmin')).as_py(), pc.min(pc.struct_field(bbox, 'ymin')).as_py(),
+            pc.max(pc.struct_field(bbox, 'xmax')).as_py(), pc.max(pc.struct_field(bbox, 'ymax')).as_py()]
+
+
+def geo_metadata(extent: list, types: set) -> dict:
+    """GeoParquet 1.1 metadata of a file with `geometry` and `bbox` columns."""
+    column = {
+        'encoding': 'WKB',
+        'geometry_types': sorted(types),
+        'covering': {'bbox': {key: ['bbox', key] for key in ('xmin', 'ymin', 'xmax', 'ymax')}},
+    }
+    if None not in extent:
+        column['bbox'] = extent
+    return {'version': '1.1.0', 'primary_column': 'geometry', 'columns': {'geometry': column}}
+
+
+def export(con, query: str, output: str, row_group_rows: int = ROW_GROUP_ROWS) -> int:
+    """Write a query's rows to a GeoParquet file; return the row count.
+
+    The result is streamed a row group at a time rather than fetched whole
+    (DuckDB spills its own sort to disk); the extent and geometry types of the
+    footer's metadata are accumulated along the way.
+    """
+    con.execute("INSTALL spatial; LOAD spatial;")
+    reader = con.execute(query).to_arrow_reader(row_group_rows)
+    extent, types, rows = [None] * 4, set(), 0
+
+    # Without the stored Arrow schema, readers take `geo` from the footer's
+    # key-value metadata, which is only known after the last row group
+    tmp = Path(f"{output}.tmp")
+    with pq.ParquetWriter(tmp, reader.schema, compression='zstd', store_schema=False) as writer:
+        for batch in reader:
+            writer.write_batch(batch, row_group_size=row_group_rows)
+            rows += batch.num_rows
+            types |= geometry_types(batch.column('geometry'))
+            for i, (value, pick) in enumerate(zip(batch_extent(batch), (min, min, max, max))):
+                if value is not None:
+                    extent[i] = value if extent[i] is None else pick(extent[i], value)
+        writer.add_key_value_metadata({'geo': json.dumps(geo_metadata(extent, types))})
+    tmp.replace(output)
+    return rows
+
+
+def main():
+    row_group_rows = ROW_GROUP_ROWS
+    args = []
+    for arg in sys.argv[1:]:
+        if arg.startswith('--row-group-rows='):
+            row_group_rows = int(arg.split('=', 1)[1])
+        else:
+            args.append(arg)
+    if len(args) < 2:
+        sys.exit(__doc__)
+    query, output = Path(args[0]), args[1]
+    database = args[2] if len(args) > 2 else "data/data.duckdb"
+
+    start = time.perf_counter()
+    con = duckdb.connect(database, read_only=True)
+    try:
+        rows = export(con, query.read_text(), output, row_group_rows)
+    finally:
+        con.close()
+    groups = pq.ParquetFile(output).metadata.num_row_groups
+    print(f"✓ {output}: {rows:,} rows in {groups:,} row groups ({time.perf_counter() - start:.1f}s)")
+
+
+if __name__ == '__main__':
+    main()
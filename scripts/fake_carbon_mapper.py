@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""Local stand-in for the Carbon Mapper plume CSV API, for testing fetch_plumes.py.
+
+Serves /api/v1/catalog/plume-csv from a plumes CSV in the export's format
+(e.g. data/plumes_latest.csv), honouring limit, offset, sort=asc, the
+datetime and modified_at ranges, exclude_columns and status. An optional
+`status` column in the file marks deleted plumes; other plumes count as
+published. The file is re-read on every request, so editing it between
+syncs simulates new, modified and deleted plumes.
+
+--fail-rate=P answers that share of requests with 503 to exercise retries.
+
+Usage:
+  fake_carbon_mapper.py [--port=8001] [--fail-rate=P] plumes.csv
+
+Then: fetch_plumes.py --base-url=http://localhost:8001 output.csv
+"""
+
+import csv
+import datetime
+import io
+import random
+import sys
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from fetch_plumes import ENDPOINT
+
+
+def parse_time(value: str) -> datetime.datetime:
+    moment = datetime.datetime.fromisoformat(value.replace('Z', '+00:00'))
+    return moment.replace(tzinfo=None) if moment.tzinfo is None else \
+        moment.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+
+
+def in_range(value: str, interval: str) -> bool:
+    """Whether a timestamp lies in a closed or open 'start/end' interval."""
+    if not value:
+        return False
+    moment = parse_time(value)
+    start, _, end = interval.partition('/') if '/' in interval else (interval, '', interval)
+    return ((start in ('', '..') or moment >= parse_time(start))
+            and (end in ('', '..') or moment <= parse_time(end)))
+
+
+class Handler(BaseHTTPRequestHandler):
+    plumes: Path
+    fail_rate: float = 0.0
+    requests = 0
+
+    def do_GET(self):
+        url = urllib.parse.urlsplit(self.path)
+        if url.path != ENDPOINT:
+            self.send_error(404)
+            return
+        Handler.requests += 1
+        if random.random() < self.fail_rate:
+            self.send_error(503)
+            return
+        params = urllib.parse.parse_qs(url.query)
+        first = lambda name, default=None: params.get(name, [default])[0]
+
+        with open(self.plumes, newline='') as f:
+            rows = list(csv.DictReader(f))
+        status = first('status', 'published')
+        rows = [row for row in rows
+                if (row.get('status') or 'published') == status
+                and all(in_range(row[column], first(name)) for name, column in
+                        (('datetime', 'datetime'), ('modified_at', 'modified')) if first(name))]
+        if first('sort', 'desc') == 'asc':
+            rows.sort(key=lambda row: (row['datetime'], row['plume_id']))
+        else:
+            rows.sort(key=lambda row: (row['datetime'], row['plume_id']), reverse=True)
+        offset, limit = int(first('offset', 0)), int(first('limit', 500))
+        rows = rows[offset:offset + limit]
+
+        excluded = set(params.get('exclude_columns', [])) | {'status'}
+        with open(self.plumes, newline='') as f:
+            columns = [column for column in next(csv.reader(f)) if column not in excluded]
+        out = io.StringIO()
+        writer = csv.DictWriter(out, columns, extrasaction='ignore')
+        writer.writeheader()
+        writer.writerows(rows)
+        body = out.getvalue().encode()
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/csv')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def main():
+    port = 8001
+    args = []
+    for arg in sys.argv[1:]:
+        if arg.startswith('--port='):
+            port = int(arg.split('=', 1)[1])
+        elif arg.startswith('--fail-rate='):
+            Handler.fail_rate = float(arg.split('=', 1)[1])
+        else:
+            args.append(arg)
+    if len(args) != 1:
+        print(__doc__.strip())
+        sys.exit(1)
+    Handler.plumes = Path(args[0])
+
+    server = ThreadingHTTPServer(('localhost', port), Handler)
+    print(f"Serving {Handler.plumes} as the Carbon Mapper API on http://localhost:{port}")
+    try:
+        server.serve_forever()
+    finally:
+        print(f"{Handler.requests} requests")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""Local stand-in for the Texas RRC MFT server, for testing download_rrc.py.
+
+Serves the files of a directory (e.g. the synthetic dumps of
+synthetic_rrc.py) the way the MFT link pages do: /link/<id> shows a table
+with the dataset's row (name, size, date) and a Download button, and the
+download itself honours Range requests. --fail-after=N cuts every response
+off after N bytes to simulate interrupted transfers.
+
+Usage:
+  fake_mft.py [--port=8000] [--fail-after=BYTES] directory
+
+Then: download_rrc.py --base-url=http://localhost:8000 output_dir
+"""
+
+import datetime
+import html
+import re
+import sys
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from download_rrc import DATASETS
+
+PAGE = """<!DOCTYPE html>
+<html><body>
+<table>
+  <tr><th>Name</th><th>Size</th><th>Modified</th></tr>
+  <tr onclick="selected = '{name}'"><td><a href="#">{name}</a></td><td>{size}</td><td>{modified}</td></tr>
+</table>
+<button onclick="if (selected) window.location = '/download/' + selected">Download</button>
+<script>let selected = null;</script>
+</body></html>
+"""
+
+
+class Handler(BaseHTTPRequestHandler):
+    directory: Path
+    fail_after: int = None
+
+    def do_GET(self):
+        link = re.fullmatch(r'/link/([0-9a-f-]+)', self.path)
+        download = re.fullmatch(r'/download/([\w.]+)', self.path)
+        if link:
+            self.send_page(link.group(1))
+        elif download and download.group(1) in DATASETS:
+            self.send_file(self.directory / download.group(1))
+        else:
+            self.send_error(404)
+
+    def send_page(self, link_id: str):
+        names = [name for name, dataset_id in DATASETS.items() if dataset_id == link_id]
+        if not names or not (self.directory / names[0]).exists():
+            self.send_error(404)
+            return
+        stat = (self.directory / names[0]).stat()
+        modified = datetime.datetime.fromtimestamp(stat.st_mtime).strftime('%m/%d/%Y %I:%M %p')
+        body = PAGE.format(name=html.escape(names[0]), size=f"{stat.st_size:,} bytes", modified=modified).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_file(self, path: Path):
+        if not path.exists():
+            self.send_error(404)
+            return
+        size = path.stat().st_size
+        start = 0
+        match = re.fullmatch(r'bytes=(\d+)-', self.headers.get('Range', ''))
+        if match:
+            start = int(match.group(1))
+            if start >= size:
+                self.send_response(416)
+                self.send_header('Content-Range', f"bytes */{size}")
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            self.send_response(206)
+            self.send_header('Content-Range', f"bytes {start}-{size - 1}/{size}")
+        else:
+            self.send_response(200)
+        self.send_header('Content-Type', 'application/octet-stream')
+        self.send_header('Content-Disposition', f'attachment; filename="{path.name}"')
+        self.send_header('Accept-Ranges', 'bytes')
+        self.send_header('Content-Length', str(size - start))
+        self.end_headers()
+
+        remaining = size - start if self.fail_after is None else min(size - start, self.fail_after)
+        with open(path, 'rb') as f:
+            f.seek(start)
+            while remaining > 0:
+                chunk = f.read(min(1 << 16, remaining))
+                self.wfile.write(chunk)
+                remaining -= len(chunk)
+        # With --fail-after the connection closes short of Content-Length
+        self.close_connection = True
+
+
+def main():
+    port = 8000
+    args = []
+    for arg in sys.argv[1:]:
+        if arg.startswith('--port='):
+            port = int(arg.split('=', 1)[1])
+        elif arg.startswith('--fail-after='):
+            Handler.fail_after = int(arg.split('=', 1)[1])
+        else:
+            args.append(arg)
+    if len(args) != 1:
+        print(__doc__.strip())
+        sys.exit(1)
+    Handler.directory = Path(args[0])
+
+    server = ThreadingHTTPServer(('localhost', port), Handler)
+    print(f"Serving {Handler.directory} as MFT on http://localhost:{port}")
+    server.serve_forever()
+
+
+if __name__ == '__main__':
+    main()
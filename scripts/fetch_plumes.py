@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""Sync this year's plumes from the Carbon Mapper API into a local CSV.
+
+Uses the paginated plume CSV endpoint (/api/v1/catalog/plume-csv, see
+resources/openapi.json). The first sync fetches every plume observed since
+January 1st; later syncs only ask for plumes modified since the newest
+`modified` time already in the store, plus the ids of plumes deleted since
+then, and merge them into the CSV by plume_id. Pages are fetched
+concurrently (--jobs at a time), each retried on connection errors, 429 and
+5xx responses.
+
+The sync state (datetime range and modified high-water mark) is kept in
+`<output>.sync.json`. A new year, or --full, starts over with a full sync.
+
+Usage:
+  fetch_plumes.py [--full] [--jobs=N] [--base-url=URL] [output_csv]
+
+--base-url (or $CARBON_MAPPER_URL) points at another server, such as the
+stand-in of scripts/fake_carbon_mapper.py. $CARBON_MAPPER_TOKEN, if set, is
+sent as a bearer token.
+"""
+
+import csv
+import datetime
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+
+import duckdb
+
+DEFAULT_BASE_URL = 'https://api.carbonmapper.org'
+ENDPOINT = '/api/v1/catalog/plume-csv'
+PAGE_SIZE = 1000            # the endpoint's maximum limit
+JOBS = 4
+TIMEOUT = 120
+RETRIES = 5
+RETRY_DELAY = 2             # seconds, times the attempt number
+RETRY_STATUS = {429, 500, 502, 503, 504}
+# Image links are not used downstream
+EXCLUDE_COLUMNS = ['plume_tif', 'plume_png', 'con_tif', 'rgb_tif', 'rgb_png']
+
+
+def state_path(output: Path) -> Path:
+    return output.with_name(output.name + '.sync.json')
+
+
+def rfc3339(moment: datetime.datetime) -> str:
+    return moment.astimezone(datetime.timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+def get(url: str, headers: dict) -> str:
+    """GET url, retrying transient failures; return the response body."""
+    for attempt in range(1, RETRIES + 1):
+        try:
+            with urllib.request.urlopen(urllib.request.Request(url, headers=headers), timeout=TIMEOUT) as response:
+                return response.read().decode('utf-8')
+        except urllib.error.HTTPError as error:
+            if error.code not in RETRY_STATUS or attempt == RETRIES:
+                raise
+            delay = float(error.headers.get('Retry-After') or RETRY_DELAY * attempt)
+        except OSError:
+            if attempt == RETRIES:
+                raise
+            delay = RETRY_DELAY * attempt
+        time.sleep(delay)
+
+
+def fetch_page(base_url: str, params: dict, offset: int, headers: dict) -> tuple:
+    """One page of plumes as (header, rows)."""
+    query = urllib.parse.urlencode({**params, 'limit': PAGE_SIZE, 'offset': offset}, doseq=True)
+    reader = csv.reader(io.StringIO(get(f"{base_url}{ENDPOINT}?{query}", headers)))
+    header = next(reader, None)
+    return header, [row for row in reader if row]
+
+
+def fetch_all(base_url: str, params: dict, headers: dict, jobs: int = JOBS) -> tuple:
+    """Every page of a query as (header, rows), up to `jobs` pages in flight.
+
+    Pages are requested in offset order until one comes back short; pages
+    already in flight past that point are empty and dropped.
+    """
+    pages = {}
+    last = None             # offset of the first short page
+    next_offset = 0
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        running = {}
+        while True:
+            while last is None and len(running) < jobs:
+                running[executor.submit(fetch_page, base_url, params, next_offset, headers)] = next_offset
+                next_offset += PAGE_SIZE
+            if not running:
+                break
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                offset = running.pop(future)
+                pages[offset] = future.result()
+                if len(pages[offset][1]) < PAGE_SIZE and (last is None or offset < last):
+                    last = offset
+
+    header = next((page[0] for page in pages.values() if page[0]), None)
+    rows = [row for offset in sorted(pages) if offset <= last for row in pages[offset][1]]
+    return header, rows
+
+
+def write_csv(path: Path, header: list, rows: list):
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        writer.writerows(rows)
+
+
+def merge(output: Path, delta: Path, deleted: list, datetime_from: str) -> int:
+    """Upsert the delta into the store by plume_id; return the store's row count.
+
+    Rows from the delta replace stored rows with the same plume_id; deleted
+    plumes and plumes observed before datetime_from are dropped.
+    """
+    con = duckdb.connect()
+    try:
+        con.execute("CREATE TEMP TABLE deleted (plume_id VARCHAR)")
+        if deleted:
+            con.executemany("INSERT INTO deleted VALUES (?)", [[plume_id] for plume_id in deleted])
+        sources = [f"SELECT *, 1 AS _delta FROM read_csv('{delta}', header = true, all_varchar = true)"]
+        if output.exists():
+            sources.append(f"SELECT *, 0 AS _delta FROM read_csv('{output}', header = true, all_varchar = true)")
+        tmp = output.with_name(output.name + '.tmp')
+        con.execute(f"""
+            COPY (
+                SELECT * EXCLUDE (_delta)
+                FROM ({' UNION ALL BY NAME '.join(sources)})
+                WHERE plume_id NOT IN (SELECT plume_id FROM deleted)
+                  AND TRY_CAST(datetime AS TIMESTAMP) >= '{datetime_from}'::TIMESTAMP
+                QUALIFY row_number() OVER (PARTITION BY plume_id ORDER BY _delta DESC) = 1
+                ORDER BY datetime, plume_id
+            ) TO '{tmp}' (HEADER)
+        """)
+        count = con.execute(f"SELECT COUNT(*) FROM read_csv('{tmp}', header = true, all_varchar = true)").fetchone()[0]
+    finally:
+        con.close()
+    tmp.replace(output)
+    return count
+
+
+def high_water(delta: Path, previous: str) -> str:
+    """Newest `modified` time in the delta as RFC 3339, or the previous mark."""
+    newest = duckdb.sql(f"""
+        SELECT strftime(MAX(TRY_CAST(modified AS TIMESTAMP)), '%Y-%m-%dT%H:%M:%SZ')
+        FROM read_csv('{delta}', header = true, all_varchar = true)
+    """).fetchone()[0]
+    return max(filter(None, [newest, previous]), default=None)
+
+
+def sync(output: Path, base_url: str, full: bool = False, jobs: int = JOBS) -> dict:
+    """Bring output up to date; return the new sync state."""
+    started = datetime.datetime.now(datetime.timezone.utc)
+    datetime_from = f"{started.year}-01-01T00:00:00Z"
+    state = json.loads(state_path(output).read_text()) if state_path(output).exists() else {}
+    incremental = (not full and output.exists() and state.get('datetime_from') == datetime_from
+                   and state.get('modified_through'))
+
+    headers = {'Accept': 'text/csv'}
+    if os.environ.get('CARBON_MAPPER_TOKEN'):
+        headers['Authorization'] = f"Bearer {os.environ['CARBON_MAPPER_TOKEN']}"
+    params = {'datetime': f"{datetime_from}/..", 'sort': 'asc', 'exclude_columns': EXCLUDE_COLUMNS}
+    deleted = []
+    if incremental:
+        # Fixed upper bound, so rows can't shift between pages mid-sync
+        modified = f"{state['modified_through']}/{rfc3339(started)}"
+        params['modified_at'] = modified
+        print(f"  Fetching plumes modified since {state['modified_through']}...")
+        _, deleted_rows = fetch_all(base_url, {**params, 'status': 'deleted'}, headers, jobs)
+        deleted = [row[0] for row in deleted_rows]
+    else:
+        print(f"  Fetching all plumes observed since {datetime_from}...")
+    header, rows = fetch_all(base_url, params, headers, jobs)
+    print(f"  {len(rows):,} new or modified plumes, {len(deleted):,} deleted")
+
+    new_state = {**state, 'datetime_from': datetime_from, 'synced_at': rfc3339(started)}
+    if header is None or (incremental and not rows and not deleted):
+        # Nothing changed: leave the store untouched (and its hash with it)
+        if header is None and not output.exists():
+            raise SystemExit("ERROR: Carbon Mapper returned no plumes")
+        state_path(output).write_text(json.dumps(new_state, indent=2) + "\n")
+        return new_state
+
+    with tempfile.TemporaryDirectory(prefix="fetch_plumes_") as tmp:
+        delta = Path(tmp) / "delta.csv"
+        write_csv(delta, header, rows)
+        new_state['modified_through'] = high_water(delta, state.get('modified_through') if incremental else None)
+        new_state['rows'] = merge(output, delta, deleted, datetime_from)
+    state_path(output).write_text(json.dumps(new_state, indent=2) + "\n")
+    return new_state
+
+
+def main():
+    full = '--full' in sys.argv
+    jobs = JOBS
+    base_url = os.environ.get('CARBON_MAPPER_URL', DEFAULT_BASE_URL)
+    args = []
+    for arg in sys.argv[1:]:
+        if arg.startswith('--jobs='):
+            jobs = int(arg.split('=', 1)[1])
+        elif arg.startswith('--base-url='):
+            base_url = arg.split('=', 1)[1]
+        elif arg != '--full':
+            args.append(arg)
+    output = Path(args[0]) if args else Path('data/plumes_latest.csv')
+    output.parent.mkdir(parents=True, exist_ok=True)
+
+    start = time.perf_counter()
+    state = sync(output, base_url.rstrip('/'), full, jobs)
+    print(f"✓ {output}: {state.get('rows', 0):,} plumes through {state.get('modified_through')} "
+          f"({time.perf_counter() - start:.1f}s)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""Load OGIM facilities from the GeoPackage into infra.all_facilities.
+
+Reads the OGIM layers with SQLite itself (the GeoPackage is a SQLite
+database), in fid ranges spread over --jobs worker processes, so only the
+seven columns used are decoded and the bounding box and status filters run
+inside the scan: the box goes through the layer's R-tree index when it has
+one, so rows outside the region are never read. The rows are handed to
+queries/load_ogim.sql as one Arrow table.
+
+The region defaults to Texas and Louisiana with a margin wider than the
+attribution radius. Set --bbox (or $OGIM_BBOX) to
+'min_lon,min_lat,max_lon,max_lat', or to 'all' for the whole GeoPackage.
+
+Usage:
+  load_ogim.py [--bbox=BOX] [--jobs=N] [gpkg] [database]
+"""
+
+import os
+import sqlite3
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import duckdb
+import pyarrow as pa
+
+from arrow_sink import DEFAULT_DATABASE, rows_to_table
+
+QUERY = Path(__file__).parent.parent / "queries" / "load_ogim.sql"
+
+CHUNK_FIDS = 250_000        # fid range read by one task
+
+# Texas and Louisiana (the polygons of load_emissions.sql) plus ~5 km
+DEFAULT_BBOX = (-106.7, 25.79, -88.7, 36.55)
+
+OPERATOR_FILTER = "OPERATOR IS NOT NULL AND OPERATOR != 'N/A'"
+
+# (layer, infra_type, facility id column, status filter)
+LAYERS = [
+    # Exclude proposed/permitted wells that haven't been drilled yet
+    # This prevents attribution to drilling permits rather than actual infrastructure
+    ('Oil_and_Natural_Gas_Wells', 'well', 'FAC_ID',
+     "(FAC_STATUS NOT IN ('PERMITTED', 'PROPOSED') OR FAC_STATUS IS NULL OR FAC_STATUS = 'N/A') "
+     "AND (OGIM_STATUS NOT IN ('PERMITTED', 'PROPOSED') OR OGIM_STATUS IS NULL OR OGIM_STATUS = 'N/A')"),
+    ('Gathering_and_Processing', 'processing', 'OGIM_ID', None),
+    ('Natural_Gas_Compressor_Stations', 'compressor', 'OGIM_ID',
+     "(FAC_STATUS = 'IN SERVICE' OR FAC_STATUS = 'N/A' OR FAC_STATUS IS NULL) "
+     "AND (OGIM_STATUS = 'OPERATIONAL' OR OGIM_STATUS = 'N/A' OR OGIM_STATUS IS NULL)"),
+    ('Tank_Battery', 'tank_battery', 'OGIM_ID', None),
+    ('Injection_and_Disposal', 'injection_disposal', 'OGIM_ID', None),
+    ('Petroleum_Terminals', 'petroleum_terminal', 'OGIM_ID', None),
+    ('Stations_Other', 'station_other', 'OGIM_ID', None),
+    ('LNG_Facilities', 'lng_facility', 'OGIM_ID', None),
+    ('Crude_Oil_Refineries', 'refinery', 'OGIM_ID', None),
+]
+
+LAYER_SCHEMA = pa.schema(
+    [(name, pa.string()) for name in (
+        'facility_id', 'infra_type', 'operator', 'facility_subtype', 'status', 'ogim_status'
+    )] +
+    [('latitude', pa.float64()), ('longitude', pa.float64())]
+)
+
+
+def parse_bbox(value: str):
+    """A bounding box from 'min_lon,min_lat,max_lon,max_lat'; None for 'all'."""
+    if value == 'all':
+        return None
+    bbox = tuple(float(part) for part in value.split(','))
+    if len(bbox) != 4:
+        raise ValueError(f"Bounding box needs four numbers: {value}")
+    return bbox
+
+
+def region():
+    """The bounding box configured by $OGIM_BBOX, or the default."""
+    return parse_bbox(os.environ['OGIM_BBOX']) if os.environ.get('OGIM_BBOX') else DEFAULT_BBOX
+
+
+def rtree_table(con, layer: str):
+    """The GeoPackage R-tree index of a layer's geometry, if it has one."""
+    try:
+        row = con.execute("""
+            SELECT 'rtree_' || table_name || '_' || column_name
+            FROM gpkg_extensions
+            WHERE table_name = ? AND extension_name = 'gpkg_rtree_index'
+        """, [layer]).fetchone()
+    except sqlite3.OperationalError:  # no extensions registered
+        return None
+    return row[0] if row else None
+
+
+def chunks(gpkg: str) -> list:
+    """(layer index, first fid, last fid) of each read task."""
+    con = sqlite3.connect(f"file:{gpkg}?mode=ro", uri=True)
+    try:
+        tasks = []
+        for index, (layer, *_) in enumerate(LAYERS):
+            first, last = con.execute(f'SELECT MIN(rowid), MAX(rowid) FROM "{layer}"').fetchone()
+            if first is not None:
+                tasks += [(index, lo, min(lo + CHUNK_FIDS - 1, last)) for lo in range(first, last + 1, CHUNK_FIDS)]
+    finally:
+        con.close()
+    return tasks
+
+
+def read_chunk(gpkg: str, index: int, first: int, last: int, bbox) -> pa.Table:
+    """The rows of one fid range of a layer that pass its filters, as a LAYER_SCHEMA table."""
+    layer, infra_type, id_column, status_filter = LAYERS[index]
+    con = sqlite3.connect(f"file:{gpkg}?mode=ro", uri=True)
+    try:
+        conditions = ["rowid BETWEEN ? AND ?", "LATITUDE IS NOT NULL", "LONGITUDE IS NOT NULL", OPERATOR_FILTER]
+        params = [first, last]
+        if status_filter:
+            conditions.append(status_filter)
+        if bbox:
+            min_lon, min_lat, max_lon, max_lat = bbox
+            conditions.append("LONGITUDE BETWEEN ? AND ? AND LATITUDE BETWEEN ? AND ?")
+            params += [min_lon, max_lon, min_lat, max_lat]
+            rtree = rtree_table(con, layer)
+            if rtree:
+                # R-tree ids are the feature table's primary key (its rowid)
+                conditions.append(f'rowid IN (SELECT id FROM "{rtree}" '
+                                  f'WHERE maxx >= ? AND minx <= ? AND maxy >= ? AND miny <= ?)')
+                params += [min_lon, max_lon, min_lat, max_lat]
+        rows = con.execute(f"""
+            SELECT CAST({id_column} AS TEXT), ?, OPERATOR, FAC_TYPE, FAC_STATUS, OGIM_STATUS, LATITUDE, LONGITUDE
+            FROM "{layer}"
+            WHERE {' AND '.join(conditions)}
+        """, [infra_type] + params).fetchall()
+    finally:
+        con.close()
+    return rows_to_table(rows, LAYER_SCHEMA)
+
+
+def load(con, gpkg: str, bbox=DEFAULT_BBOX, jobs: int = 1) -> dict:
+    """Rebuild infra.all_facilities from a GeoPackage; return facilities per type."""
+    tasks = chunks(gpkg)
+    if jobs <= 1:
+        tables = [read_chunk(gpkg, *task, bbox) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            tables = list(pool.map(read_chunk, *zip(*((gpkg, *task, bbox) for task in tasks))))
+
+    con.register('ogim_layers', pa.concat_tables(tables) if tables else LAYER_SCHEMA.empty_table())
+    try:
+        con.execute(QUERY.read_text())
+        counts = dict((infra_type, count) for infra_type, count, _ in con.fetchall())
+    finally:
+        con.unregister('ogim_layers')
+    return counts
+
+
+def main():
+    # --jobs=N reads fid ranges in N worker processes (0: one per CPU)
+    bbox = region()
+    jobs = 1
+    args = []
+    for arg in sys.argv[1:]:
+        if arg.startswith('--bbox='):
+            bbox = parse_bbox(arg.split('=', 1)[1])
+        elif arg.startswith('--jobs='):
+            jobs = int(arg.split('=', 1)[1]) or os.cpu_count()
+        else:
+            args.append(arg)
+    gpkg = args[0] if len(args) > 0 else "data/OGIM_v2.7.gpkg"
+    database = args[1] if len(args) > 1 else DEFAULT_DATABASE
+
+    print(f"Reading {len(LAYERS)} layers of {gpkg} ({jobs} job{'s' if jobs != 1 else ''}, "
+          f"{'all regions' if bbox is None else 'bbox ' + ','.join(str(v) for v in bbox)})...")
+    start = time.perf_counter()
+    con = duckdb.connect(database)
+    try:
+        counts = load(con, gpkg, bbox, jobs)
+    finally:
+        con.close()
+
+    for infra_type, count in counts.items():
+        print(f"  {infra_type}: {count:,}")
+    print(f"\nLoaded {sum(counts.values()):,} facilities in {time.perf_counter() - start:.1f}s")
+    print(f"Output: {database} (infra schema)")
+
+
+if __name__ == '__main__':
+    main()
@@ -2,193 +2,264 @@
 """Parse Texas RRC P4 EBCDIC data and output relevant fields."""
 
 import gzip
-import struct
+import io
 import sys
-from dataclasses import dataclass
-
-
-@dataclass
-class RootRecord:
-    """Record type 01: Lease/P-4 root information (current schedule state)"""
-    oil_gas_code: str  # pos 3
-    district: int  # pos 4-5
-    lease_rrcid: int  # pos 6-11
-    field_number: int  # pos 12-19
-    on_off_schedule_indicator: str  # pos 20
-    operator_number: int  # pos 21-26
-
-
-@dataclass
-class InfoRecord:
-    """Record type 02: P-4 information record (temporal filing)"""
-    sequence_date_key: int  # pos 3-10
-    effective_date_key: int  # pos 11-18
-    effective_year: int  # pos 19-22
-    effective_month: int  # pos 23-24
-    effective_day: int  # pos 25-26
-    approval_year: int  # pos 27-30
-    approval_month: int  # pos 31-32
-    approval_day: int  # pos 33-34
-    new_well: str  # pos 35
-    change_of_gatherer: str  # pos 36
-    change_of_purchaser: str  # pos 37
-    change_of_nominator: str  # pos 38
-    chg_purch_system_no: str  # pos 39
-    change_of_field: str  # pos 40
-    change_of_operator: str  # pos 41
-    change_of_lease_name: str  # pos 42
-    consolidation_lease: str  # pos 43
-    subdivision_lease: str  # pos 44
-    reclassification: str  # pos 45
-    special_form_filed: str  # pos 46
-    oil_field_transfer: str  # pos 47
-    type_record: str  # pos 51
-    info_field_number: int  # pos 52-59
-    info_operator_number: int  # pos 60-65
-    p5_number_filing_on_tape: int  # pos 66-71
-
-
-@dataclass
-class GpnRecord:
-    """Record type 03: Gatherer/Purchaser/Nominator"""
-    product_code: str  # pos 3
-    type_code: str  # pos 4
-    percentage_key: float  # pos 5-9: PIC 9(01)V9(04)
-    gpn_number: int  # pos 10-15
-    purch_system_no: int  # pos 16-19
-    current_p4_filing: str  # pos 20
-    actual_percent: float  # pos 21-25: PIC 9(01)V9(04)
-    inter_flag: str  # pos 26
-    intra_flag: str  # pos 27
-
-
-@dataclass
-class LeaseNameRecord:
-    """Record type 07: Lease name"""
-    sequence_date_key: int  # pos 3-10
-    effect_date_key: int  # pos 11-18
-    lease_name: str  # pos 19-50
+
+import numpy as np
+
+from record_view import record_view
+from rrc_groups import iter_aligned_blocks
+from rrc_index import read_group
+
+RECORD_LENGTH = 92
+
+# EBCDIC '01' - record type of the lease root that every child record follows
+ROOT_RECORD_ID = '01'.encode('cp500')
+
+# cp500 is a permutation of Latin-1, so a whole block can be translated with
+# bytes.translate() and then sliced as plain 8-bit characters
+CP500_TO_LATIN1 = bytes(range(256)).decode('cp500').encode('latin-1')
+
+# Single-character strings indexed by Latin-1 byte value (raw and stripped)
+_CHARS = np.array([chr(i) for i in range(256)], dtype=object)
+_STRIPPED_CHARS = np.array([chr(i).strip() for i in range(256)], dtype=object)
+
+
+# Fixed-width layouts, shared by the record views and the batch decoder:
+# (name, start, end, kind) with 'int' = int(), 'char' = raw character,
+# 'str' = stripped string, 'pct' = PIC 9(01)V9(04) as float
+ROOT_LAYOUT = (
+    ('oil_gas_code', 2, 3, 'str'),
+    ('district', 3, 5, 'int'),
+    ('lease_rrcid', 5, 11, 'int'),
+    ('field_number', 11, 19, 'int'),
+    ('on_off_schedule_indicator', 19, 20, 'char'),
+    ('operator_number', 20, 26, 'int'),
+)
+
+INFO_LAYOUT = (
+    ('sequence_date_key', 2, 10, 'int'),
+    ('effective_date_key', 10, 18, 'int'),
+    ('effective_year', 18, 22, 'int'),
+    ('effective_month', 22, 24, 'int'),
+    ('effective_day', 24, 26, 'int'),
+    ('approval_year', 26, 30, 'int'),
+    ('approval_month', 30, 32, 'int'),
+    ('approval_day', 32, 34, 'int'),
+    ('new_well', 34, 35, 'char'),
+    ('change_of_gatherer', 35, 36, 'char'),
+    ('change_of_purchaser', 36, 37, 'char'),
+    ('change_of_nominator', 37, 38, 'char'),
+    ('chg_purch_system_no', 38, 39, 'char'),
+    ('change_of_field', 39, 40, 'char'),
+    ('change_of_operator', 40, 41, 'char'),
+    ('change_of_lease_name', 41, 42, 'char'),
+    ('consolidation_lease', 42, 43, 'char'),
+    ('subdivision_lease', 43, 44, 'char'),
+    ('reclassification', 44, 45, 'char'),
+    ('special_form_filed', 45, 46, 'char'),
+    ('oil_field_transfer', 46, 47, 'char'),
+    ('type_record', 50, 51, 'char'),
+    ('info_field_number', 51, 59, 'int'),
+    ('info_operator_number', 59, 65, 'int'),
+    ('p5_number_filing_on_tape', 65, 71, 'int'),
+)
+
+GPN_LAYOUT = (
+    ('product_code', 2, 3, 'str'),
+    ('type_code', 3, 4, 'str'),
+    ('percentage_key', 4, 9, 'pct'),
+    ('gpn_number', 9, 15, 'int'),
+    ('purch_system_no', 15, 19, 'int'),
+    ('current_p4_filing', 19, 20, 'char'),
+    ('actual_percent', 20, 25, 'pct'),
+    ('inter_flag', 25, 26, 'char'),
+    ('intra_flag', 26, 27, 'char'),
+)
+
+LEASE_NAME_LAYOUT = (
+    ('sequence_date_key', 2, 10, 'int'),
+    ('effect_date_key', 10, 18, 'int'),
+    ('lease_name', 18, 50, 'str'),
+)
+
+RootRecord = record_view('RootRecord', ROOT_LAYOUT,
+                         doc="Record type 01: Lease/P-4 root information (current schedule state)")
+InfoRecord = record_view('InfoRecord', INFO_LAYOUT, doc="Record type 02: P-4 information record (temporal filing)")
+GpnRecord = record_view('GpnRecord', GPN_LAYOUT, doc="Record type 03: Gatherer/Purchaser/Nominator")
+LeaseNameRecord = record_view('LeaseNameRecord', LEASE_NAME_LAYOUT, doc="Record type 07: Lease name")
 
 
 def parse_root_record(data: bytes) -> RootRecord:
     """Parse record type 01."""
-    oil_gas_code = data[2:3].decode('cp500').strip()
-    district = int(data[3:5].decode('cp500'))
-    lease_rrcid = int(data[5:11].decode('cp500'))
-    field_number = int(data[11:19].decode('cp500'))
-    on_off_schedule_indicator = data[19:20].decode('cp500')
-    operator_number = int(data[20:26].decode('cp500'))
-
-    return RootRecord(
-        oil_gas_code=oil_gas_code,
-        district=district,
-        lease_rrcid=lease_rrcid,
-        field_number=field_number,
-        on_off_schedule_indicator=on_off_schedule_indicator,
-        operator_number=operator_number
-    )
+    return RootRecord(data)
 
 
 def parse_gpn_record(data: bytes) -> GpnRecord:
     """Parse record type 03."""
-    product_code = data[2:3].decode('cp500').strip()
-    type_code = data[3:4].decode('cp500').strip()
-    # PIC 9(01)V9(04) - 5 EBCDIC digits with implicit decimal after 1st
-    percentage_key = int(data[4:9].decode('cp500')) / 10000.0
-    gpn_number = int(data[9:15].decode('cp500'))
-    purch_system_no = int(data[15:19].decode('cp500'))
-    current_p4_filing = data[19:20].decode('cp500')
-    # PIC 9(01)V9(04) - 5 EBCDIC digits with implicit decimal after 1st
-    actual_percent = int(data[20:25].decode('cp500')) / 10000.0
-    inter_flag = data[25:26].decode('cp500')
-    intra_flag = data[26:27].decode('cp500')
-
-    return GpnRecord(
-        product_code=product_code,
-        type_code=type_code,
-        percentage_key=percentage_key,
-        gpn_number=gpn_number,
-        purch_system_no=purch_system_no,
-        current_p4_filing=current_p4_filing,
-        actual_percent=actual_percent,
-        inter_flag=inter_flag,
-        intra_flag=intra_flag
-    )
+    return GpnRecord(data)
 
 
 def parse_info_record(data: bytes) -> InfoRecord:
     """Parse record type 02."""
-    sequence_date_key = int(data[2:10].decode('cp500'))
-    effective_date_key = int(data[10:18].decode('cp500'))
-    effective_year = int(data[18:22].decode('cp500'))
-    effective_month = int(data[22:24].decode('cp500'))
-    effective_day = int(data[24:26].decode('cp500'))
-    approval_year = int(data[26:30].decode('cp500'))
-    approval_month = int(data[30:32].decode('cp500'))
-    approval_day = int(data[32:34].decode('cp500'))
-    new_well = data[34:35].decode('cp500')
-    change_of_gatherer = data[35:36].decode('cp500')
-    change_of_purchaser = data[36:37].decode('cp500')
-    change_of_nominator = data[37:38].decode('cp500')
-    chg_purch_system_no = data[38:39].decode('cp500')
-    change_of_field = data[39:40].decode('cp500')
-    change_of_operator = data[40:41].decode('cp500')
-    change_of_lease_name = data[41:42].decode('cp500')
-    consolidation_lease = data[42:43].decode('cp500')
-    subdivision_lease = data[43:44].decode('cp500')
-    reclassification = data[44:45].decode('cp500')
-    special_form_filed = data[45:46].decode('cp500')
-    oil_field_transfer = data[46:47].decode('cp500')
-    type_record = data[50:51].decode('cp500')
-    info_field_number = int(data[51:59].decode('cp500'))
-    info_operator_number = int(data[59:65].decode('cp500'))
-    p5_number_filing_on_tape = int(data[65:71].decode('cp500'))
-
-    return InfoRecord(
-        sequence_date_key=sequence_date_key,
-        effective_date_key=effective_date_key,
-        effective_year=effective_year,
-        effective_month=effective_month,
-        effective_day=effective_day,
-        approval_year=approval_year,
-        approval_month=approval_month,
-        approval_day=approval_day,
-        new_well=new_well,
-        change_of_gatherer=change_of_gatherer,
-        change_of_purchaser=change_of_purchaser,
-        change_of_nominator=change_of_nominator,
-        chg_purch_system_no=chg_purch_system_no,
-        change_of_field=change_of_field,
-        change_of_operator=change_of_operator,
-        change_of_lease_name=change_of_lease_name,
-        consolidation_lease=consolidation_lease,
-        subdivision_lease=subdivision_lease,
-        reclassification=reclassification,
-        special_form_filed=special_form_filed,
-        oil_field_transfer=oil_field_transfer,
-        type_record=type_record,
-        info_field_number=info_field_number,
-        info_operator_number=info_operator_number,
-        p5_number_filing_on_tape=p5_number_filing_on_tape
-    )
+    return InfoRecord(data)
 
 
 def parse_lease_name_record(data: bytes) -> LeaseNameRecord:
     """Parse record type 07."""
-    sequence_date_key = int(data[2:10].decode('cp500'))
-    effect_date_key = int(data[10:18].decode('cp500'))
-    lease_name = data[18:50].decode('cp500').strip()
-    return LeaseNameRecord(
-        sequence_date_key=sequence_date_key,
-        effect_date_key=effect_date_key,
-        lease_name=lease_name
-    )
+    return LeaseNameRecord(data)
+
+
+LEASE_KEY = ('oil_gas_code', 'district', 'lease_rrcid')
+
+
+def _decode_int_column(cols: np.ndarray) -> np.ndarray:
+    """Decode a (n, width) block of Latin-1 digit characters to int64."""
+    digits = cols.astype(np.int64) - ord('0')
+    values = digits @ (10 ** np.arange(cols.shape[1] - 1, -1, -1, dtype=np.int64))
+    # Anything that isn't a plain digit run (spaces, signs) goes through int()
+    # so malformed values behave exactly like the scalar parsers
+    irregular = np.flatnonzero(((digits < 0) | (digits > 9)).any(axis=1))
+    for i in irregular:
+        values[i] = int(cols[i].tobytes().decode('latin-1'))
+    return values
+
+
+def _decode_str_column(cols: np.ndarray) -> np.ndarray:
+    """Decode a (n, width) block of Latin-1 characters to stripped strings."""
+    width = cols.shape[1]
+    raw = np.ascontiguousarray(cols).view(f'S{width}').ravel()
+    values = np.char.strip(np.char.decode(raw, 'latin-1')).astype(object)
+    # NumPy drops trailing NULs from fixed-width strings; str.strip() doesn't
+    for i in np.flatnonzero((cols == 0).any(axis=1)):
+        values[i] = cols[i].tobytes().decode('latin-1').strip()
+    return values
+
+
+def _decode_columns(records: np.ndarray, layout) -> dict:
+    """Slice and decode every column of a layout for a block of records."""
+    columns = {}
+    for name, start, end, kind in layout:
+        cols = records[:, start:end]
+        if kind == 'int':
+            columns[name] = _decode_int_column(cols)
+        elif kind == 'pct':
+            columns[name] = _decode_int_column(cols) / 10000.0
+        elif kind == 'char':
+            columns[name] = _CHARS[cols[:, 0]]
+        elif end - start == 1:
+            columns[name] = _STRIPPED_CHARS[cols[:, 0]]
+        else:
+            columns[name] = _decode_str_column(cols)
+    return columns
+
+
+def _last_index(mask: np.ndarray) -> np.ndarray:
+    """For each position, the index of the most recent True in mask (or -1)."""
+    return np.maximum.accumulate(np.where(mask, np.arange(len(mask)), -1))
+
+
+def iter_batches(f, block_records: int = 65536, select=None):
+    """Decode a P-4 stream in blocks, yielding column arrays per table.
+
+    Produces the same rows as the record-by-record path in create_p4_db.py:
+    each yielded dict maps 'root', 'info', 'gpn' and 'lease_name' to a dict of
+    NumPy column arrays. Child records carry their lease key, and GPN records
+    the sequence_date_key of the most recent info record of the same lease.
+
+    Blocks are cut on lease boundaries; `select`, if given, filters each block
+    of raw records before decoding (see rrc_groups.GroupSelector).
+    """
+    current_lease = None  # (oil_gas_code, district, lease_rrcid)
+    current_seq = None    # sequence_date_key of latest info in current lease
+
+    for data in iter_aligned_blocks(f, RECORD_LENGTH, ROOT_RECORD_ID, block_records):
+        if select is not None:
+            data = select(data)
+        if not data:
+            continue
+
+        records = np.frombuffer(
+            data.translate(CP500_TO_LATIN1), dtype=np.uint8
+        ).reshape(-1, RECORD_LENGTH)
+        n = len(records)
+        first, second = records[:, 0], records[:, 1]
+        is_root = (first == ord('0')) & (second == ord('1'))
+        is_info = (first == ord('0')) & (second == ord('2'))
+        is_gpn = (first == ord('0')) & (second == ord('3'))
+        is_name = (first == ord('0')) & (second == ord('7'))
+
+        root = _decode_columns(records[is_root], ROOT_LAYOUT)
+
+        # Lease key per record: slot 0 is the lease carried over from the
+        # previous block, slot k the k-th root record in this block
+        lease_slot = np.cumsum(is_root)
+        keys = {}
+        for i, name in enumerate(LEASE_KEY):
+            carried = current_lease[i] if current_lease else None
+            keys[name] = np.concatenate(([carried], root[name].astype(object)))
+        in_lease = lease_slot > 0 if current_lease is None else np.ones(n, dtype=bool)
+
+        def with_lease_key(mask, columns):
+            slots = lease_slot[mask]
+            out = {name: keys[name][slots] for name in LEASE_KEY}
+            out.update(columns)
+            return out
+
+        info_mask = is_info & in_lease
+        info = _decode_columns(records[info_mask], INFO_LAYOUT)
+
+        # GPN records attach to the latest info record of the same lease
+        last_root = _last_index(is_root)
+        last_info = _last_index(info_mask)
+        info_position = np.cumsum(info_mask) - 1
+        in_block_info = last_info > last_root
+        carried_info = (last_root < 0) & ~in_block_info & (current_seq is not None)
+        gpn_mask = is_gpn & in_lease & (in_block_info | carried_info)
+        gpn_seq = np.empty(n, dtype=object)
+        seq_values = info['sequence_date_key'].astype(object)
+        gpn_seq[in_block_info] = seq_values[info_position[last_info[in_block_info]]]
+        gpn_seq[carried_info] = current_seq
+        gpn = {'sequence_date_key': gpn_seq[gpn_mask]}
+        gpn.update(_decode_columns(records[gpn_mask], GPN_LAYOUT))
+
+        name_mask = is_name & in_lease
+        lease_name = _decode_columns(records[name_mask], LEASE_NAME_LAYOUT)
+        non_empty = lease_name['lease_name'] != ''
+        lease_name = {k: v[non_empty] for k, v in lease_name.items()}
+        name_slots = lease_slot[name_mask][non_empty]
+
+        yield {
+            'root': root,
+            'info': with_lease_key(info_mask, info),
+            'gpn': with_lease_key(gpn_mask, gpn),
+            'lease_name': dict(
+                {k: keys[k][name_slots] for k in LEASE_KEY}, **lease_name
+            ),
+        }
+
+        # Carry lease and info state into the next block
+        if is_root.any():
+            current_lease = tuple(keys[k][-1] for k in LEASE_KEY)
+            current_seq = None
+        if info_mask.any() and last_info[-1] > last_root[-1]:
+            current_seq = seq_values[-1]
 
 
 def main():
-    input_file = sys.argv[1] if len(sys.argv) > 1 else "data/p4f606.ebc.gz"
+    # --lease=O-08-012345 jumps straight to one lease via the seek index
+    lease = None
+    args = []
+    for arg in sys.argv[1:]:
+        if arg.startswith('--lease='):
+            lease = arg.split('=', 1)[1]
+        else:
+            args.append(arg)
+    input_file = args[0] if len(args) > 0 else "data/p4f606.ebc.gz"
+
+    f = io.BytesIO(read_group(input_file, lease)) if lease else gzip.open(input_file, 'rb')
 
-    with gzip.open(input_file, 'rb') as f:
+    with f:
         current_lease = None
 
         while True:
@@ -199,7 +270,7 @@ def main():
             record_id = record[0:2].decode('cp500')
 
             if record_id == '01':
-                current_lease = parse_lease_record(record)
+                current_lease = parse_root_record(record)
                 print(f"LEASE: {current_lease.oil_gas_code} "
                       f"District={current_lease.district} "
                       f"ID={current_lease.lease_rrcid} "
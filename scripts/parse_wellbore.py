@@ -1,243 +1,136 @@
 #!/usr/bin/env python3
 """Parse Texas RRC Well Bore EBCDIC data structures."""
 
-from dataclasses import dataclass
-import struct
-
-
-@dataclass
-class RootRecord:
-    """Record type 01: Well Bore root (WBROOT)"""
-    api_county: int
-    api_unique: int
-    field_district: int
-    res_county_code: int
-    orig_compl_century: int
-    orig_compl_year: int
-    orig_compl_month: int
-    orig_compl_day: int
-    total_depth: int
-    newest_drill_permit_nbr: int
-    fresh_water_flag: str
-    plug_flag: str
-    completion_data_ind: str
-
-
-@dataclass
-class WellIdRecord:
-    """Record type 21: Well Bore Well-ID (WBWELLID) - links API to RRC lease identifiers"""
-    api_county: int
-    api_unique: int
-    oil_gas_code: str  # 'O' for oil, 'G' for gas
-    district: int  # For both oil and gas
-    lease_number: int  # For oil wells (5 digits)
-    well_number: str  # For oil wells (6 chars)
-    gas_rrcid: int  # For gas wells (6 digits)
-
-
-@dataclass
-class NewLocationRecord:
-    """Record type 13: Well Bore new location (WBNEWLOC)"""
-    api_county: int
-    api_unique: int
-    loc_county: int
-    abstract: str
-    survey: str
-    block_number: str
-    section: str
-    alt_section: str
-    alt_abstract: str
-    feet_from_sur_sect_1: int
-    direc_from_sur_sect_1: str
-    feet_from_sur_sect_2: int
-    direc_from_sur_sect_2: str
-    wgs84_latitude: float
-    wgs84_longitude: float
-    plane_zone: int
-    plane_coordinate_east: float
-    plane_coordinate_north: float
-    verification_flag: str
+import gzip
+import io
+import sys
 
+import numpy as np
 
-def parse_root_record(record: bytes) -> RootRecord:
-    """Parse Well Bore root record (type 01, 247 bytes)."""
-    # Decode the record
-    decoded = record.decode('cp500')
+from record_view import record_view, zoned_decimal
+from rrc_index import read_group
 
-    # Extract fields based on positions from documentation
-    api_county = int(decoded[2:5])
-    api_unique = int(decoded[5:10])
-    field_district = int(decoded[14:16])
-    res_county_code = int(decoded[16:19])
 
+# Fixed-width layouts of the record views: (name, start, end, kind), with the
+# kinds of record_view.DECODERS
+ROOT_LAYOUT = (
+    ('api_county', 2, 5, 'int'),
+    ('api_unique', 5, 10, 'int'),
+    ('field_district', 14, 16, 'int'),
+    ('res_county_code', 16, 19, 'int'),
     # Original completion date
-    orig_compl_cent = int(decoded[20:22])
-    orig_compl_year = int(decoded[22:24])
-    orig_compl_month = int(decoded[24:26])
-    orig_compl_day = int(decoded[26:28])
-
+    ('orig_compl_century', 20, 22, 'int'),
+    ('orig_compl_year', 22, 24, 'int'),
+    ('orig_compl_month', 24, 26, 'int'),
+    ('orig_compl_day', 26, 28, 'int'),
     # Well details
-    total_depth = int(decoded[28:33])
-    newest_drill_permit_nbr = int(decoded[80:86])
-
+    ('total_depth', 28, 33, 'int'),
+    ('newest_drill_permit_nbr', 80, 86, 'int'),
     # Flags
-    fresh_water_flag = decoded[89]
-    plug_flag = decoded[90]
-    completion_data_ind = decoded[99]
-
-    return RootRecord(
-        api_county=api_county,
-        api_unique=api_unique,
-        field_district=field_district,
-        res_county_code=res_county_code,
-        orig_compl_century=orig_compl_cent,
-        orig_compl_year=orig_compl_year,
-        orig_compl_month=orig_compl_month,
-        orig_compl_day=orig_compl_day,
-        total_depth=total_depth,
-        newest_drill_permit_nbr=newest_drill_permit_nbr,
-        fresh_water_flag=fresh_water_flag,
-        plug_flag=plug_flag,
-        completion_data_ind=completion_data_ind
-    )
+    ('fresh_water_flag', 89, 90, 'char'),
+    ('plug_flag', 90, 91, 'char'),
+    ('completion_data_ind', 99, 100, 'char'),
+)
+
+NEW_LOCATION_LAYOUT = (
+    ('loc_county', 2, 5, 'int'),
+    ('abstract', 5, 11, 'str'),
+    ('survey', 11, 66, 'str'),
+    ('block_number', 66, 76, 'str'),
+    ('section', 76, 84, 'str'),
+    ('alt_section', 84, 88, 'str'),
+    ('alt_abstract', 88, 94, 'str'),
+    # Distance from survey lines
+    ('feet_from_sur_sect_1', 94, 100, 'feet'),
+    ('direc_from_sur_sect_1', 100, 113, 'str'),
+    ('feet_from_sur_sect_2', 113, 119, 'feet'),
+    ('direc_from_sur_sect_2', 119, 132, 'str'),
+    # WGS84 coordinates - PIC S9(3)V9(7) EBCDIC zoned decimal
+    # Position 133-142 (10 bytes for latitude)
+    # Position 143-152 (10 bytes for longitude)
+    ('wgs84_latitude', 132, 142, 'zoned_7'),
+    ('wgs84_longitude', 142, 152, 'zoned_7'),
+    ('plane_zone', 157, 159, 'int_or_zero'),
+    # Plane coordinates - PIC S9(8)V9(2) EBCDIC zoned decimal
+    ('plane_coordinate_east', 159, 169, 'zoned_2'),
+    ('plane_coordinate_north', 169, 179, 'zoned_2'),
+    ('verification_flag', 177, 178, 'char'),
+)
+
+# The district/lease columns are laid out differently for oil and gas wells;
+# WellIdRecord picks the right ones by oil_gas_code
+WELL_ID_LAYOUT = (
+    ('oil_gas_code', 2, 3, 'upper'),         # 'O' for oil, 'G' for gas
+    ('_oil_district', 3, 5, 'int'),
+    ('_oil_lease_number', 5, 10, 'int'),     # 5 digits
+    ('_oil_well_number', 10, 16, 'str'),     # 6 chars
+    ('_gas_district', 3, 5, 'int_or_zero'),
+    ('_gas_rrcid', 3, 9, 'int_or_zero'),     # 6 digits
+)
+
+WELL_KEY = ('api_county', 'api_unique')
+
+# The zoned decimal columns of NEW_LOCATION_LAYOUT, with their decimal places,
+# for decoding a block of location records at once
+LOCATION_COORDINATES = (
+    ('wgs84_latitude', 132, 142, 7),
+    ('wgs84_longitude', 142, 152, 7),
+    ('plane_coordinate_east', 159, 169, 2),
+    ('plane_coordinate_north', 169, 179, 2),
+)
+
+RootRecord = record_view('RootRecord', ROOT_LAYOUT, doc="Record type 01: Well Bore root (WBROOT)")
+NewLocationRecord = record_view('NewLocationRecord', NEW_LOCATION_LAYOUT, context=WELL_KEY,
+                                doc="Record type 13: Well Bore new location (WBNEWLOC)")
+
+
+class WellIdRecord(record_view('WellIdFields', WELL_ID_LAYOUT, context=WELL_KEY)):
+    """Record type 21: Well Bore Well-ID (WBWELLID) - links API to RRC lease identifiers"""
 
+    __slots__ = ()
+    FIELDS = WELL_KEY + ('oil_gas_code', 'district', 'lease_number', 'well_number', 'gas_rrcid')
 
-def parse_new_location_record(record: bytes, api_county: int, api_unique: int) -> NewLocationRecord:
-    """Parse Well Bore new location record (type 13, 247 bytes)."""
-    # Decode the record
-    decoded = record.decode('cp500')
-
-    # Extract location fields
-    loc_county = int(decoded[2:5])
-    abstract = decoded[5:11].strip()
-    survey = decoded[11:66].strip()
-    block_number = decoded[66:76].strip()
-    section = decoded[76:84].strip()
-    alt_section = decoded[84:88].strip()
-    alt_abstract = decoded[88:94].strip()
-
-    # Distance from survey lines (can contain decimals despite PIC 9(06) in docs)
-    feet_str_1 = decoded[94:100].strip()
-    try:
-        feet_from_sur_sect_1 = int(float(feet_str_1)) if feet_str_1 else 0
-    except ValueError:
-        feet_from_sur_sect_1 = 0
-    direc_from_sur_sect_1 = decoded[100:113].strip()
-    feet_str_2 = decoded[113:119].strip()
-    try:
-        feet_from_sur_sect_2 = int(float(feet_str_2)) if feet_str_2 else 0
-    except ValueError:
-        feet_from_sur_sect_2 = 0
-    direc_from_sur_sect_2 = decoded[119:132].strip()
+    @property
+    def district(self) -> int:
+        return self._oil_district if self.oil_gas_code == 'O' else self._gas_district
 
-    # WGS84 coordinates - PIC S9(3)V9(7) EBCDIC zoned decimal (10 digits, 7 decimal places)
-    # Position 133-142 (10 bytes for latitude)
-    # Position 143-152 (10 bytes for longitude)
-    wgs84_latitude = parse_ebcdic_signed_decimal(record[132:142], 7)
-    wgs84_longitude = parse_ebcdic_signed_decimal(record[142:152], 7)
-
-    # Plane coordinates
-    plane_zone_str = decoded[157:159].strip()
-    plane_zone = int(plane_zone_str) if plane_zone_str else 0
-
-    # Plane coordinates - PIC S9(8)V9(2) EBCDIC zoned decimal (10 digits, 2 decimal places)
-    plane_coordinate_east = parse_ebcdic_signed_decimal(record[159:169], 2)
-    plane_coordinate_north = parse_ebcdic_signed_decimal(record[169:179], 2)
-
-    verification_flag = decoded[177]
-
-    return NewLocationRecord(
-        api_county=api_county,
-        api_unique=api_unique,
-        loc_county=loc_county,
-        abstract=abstract,
-        survey=survey,
-        block_number=block_number,
-        section=section,
-        alt_section=alt_section,
-        alt_abstract=alt_abstract,
-        feet_from_sur_sect_1=feet_from_sur_sect_1,
-        direc_from_sur_sect_1=direc_from_sur_sect_1,
-        feet_from_sur_sect_2=feet_from_sur_sect_2,
-        direc_from_sur_sect_2=direc_from_sur_sect_2,
-        wgs84_latitude=wgs84_latitude,
-        wgs84_longitude=wgs84_longitude,
-        plane_zone=plane_zone,
-        plane_coordinate_east=plane_coordinate_east,
-        plane_coordinate_north=plane_coordinate_north,
-        verification_flag=verification_flag
-    )
+    @property
+    def lease_number(self) -> int:
+        return self._oil_lease_number if self.oil_gas_code == 'O' else 0
 
+    @property
+    def well_number(self) -> str:
+        return self._oil_well_number if self.oil_gas_code == 'O' else ''
 
-def parse_well_id_record(record: bytes, api_county: int, api_unique: int) -> WellIdRecord:
-    """Parse Well Bore Well-ID record (type 21, 247 bytes)."""
-    # Decode the record
-    decoded = record.decode('cp500')
-
-    # First byte indicates oil or gas
-    oil_gas_code = decoded[2].upper()
-
-    if oil_gas_code == 'O':
-        # Oil well format
-        district = int(decoded[3:5])
-        lease_number = int(decoded[5:10])
-        well_number = decoded[10:16].strip()
-        gas_rrcid = 0
-    else:
-        # Gas well format (oil_gas_code == 'G')
-        district_and_rrcid = decoded[3:9]
-        district = int(district_and_rrcid[0:2]) if district_and_rrcid[0:2].strip() else 0
-        gas_rrcid = int(district_and_rrcid) if district_and_rrcid.strip() else 0
-        lease_number = 0
-        well_number = ''
-
-    return WellIdRecord(
-        api_county=api_county,
-        api_unique=api_unique,
-        oil_gas_code=oil_gas_code,
-        district=district,
-        lease_number=lease_number,
-        well_number=well_number,
-        gas_rrcid=gas_rrcid
-    )
-
-
-def parse_ebcdic_signed_decimal(data: bytes, decimal_places: int) -> float:
-    """Parse EBCDIC zoned decimal with sign in last byte.
-
-    In EBCDIC, signed numeric fields store the sign in the zone bits of the last byte:
-    - 0xCn or 0xFn = positive digit (n = digit 0-9)
-    - 0xDn = negative digit (n = digit 0-9)
-    """
-    if not data or len(data) == 0:
-        return 0.0
+    @property
+    def gas_rrcid(self) -> int:
+        return 0 if self.oil_gas_code == 'O' else self._gas_rrcid
 
-    # Decode to EBCDIC string
-    decoded = data.decode('cp500')
+    def astuple(self) -> tuple:
+        # Only decodes the columns of the well's own format
+        if self.oil_gas_code == 'O':
+            return (self.api_county, self.api_unique, 'O',
+                    self._oil_district, self._oil_lease_number, self._oil_well_number, 0)
+        return (self.api_county, self.api_unique, self.oil_gas_code, self._gas_district, 0, '', self._gas_rrcid)
 
-    # Last character contains the sign
-    last_char = decoded[-1]
-    last_byte = data[-1]
 
-    # Extract the digit from last byte
-    digit = last_byte & 0x0F
+def parse_root_record(record: bytes) -> RootRecord:
+    """Parse Well Bore root record (type 01, 247 bytes)."""
+    return RootRecord(record)
 
-    # Check sign from zone bits
-    zone = last_byte & 0xF0
-    is_negative = (zone == 0xD0)
 
-    # Build the number string
-    digits = decoded[:-1] + str(digit)
+def parse_new_location_record(record: bytes, api_county: int, api_unique: int) -> NewLocationRecord:
+    """Parse Well Bore new location record (type 13, 247 bytes)."""
+    return NewLocationRecord(record, api_county, api_unique)
 
-    try:
-        value = int(digits)
-    except ValueError:
-        return 0.0
 
-    # Apply decimal scaling
-    scaled_value = value / (10 ** decimal_places)
+def parse_well_id_record(record: bytes, api_county: int, api_unique: int) -> WellIdRecord:
+    """Parse Well Bore Well-ID record (type 21, 247 bytes)."""
+    return WellIdRecord(record, api_county, api_unique)
 
-    return -scaled_value if is_negative else scaled_value
+
+# Kept under its original name for callers of the scalar parsers
+parse_ebcdic_signed_decimal = zoned_decimal
 
 
 def unpack_comp3_decimal(data: bytes, integer_digits: int, decimal_digits: int) -> float:
@@ -249,7 +142,7 @@ def unpack_comp3_decimal(data: bytes, integer_digits: int, decimal_digits: int)
     if not data or len(data) == 0:
         return 0.0
 
-    # Convert bytes to string of hex digits
+    # Convert bytes (or a memoryview slice) to string of hex digits
     hex_str = data.hex()
 
     # Last nibble is the sign (C=positive, D=negative, F=unsigned)
@@ -269,3 +162,110 @@ def unpack_comp3_decimal(data: bytes, integer_digits: int, decimal_digits: int)
     scaled_value = value / (10 ** decimal_digits)
 
     return -scaled_value if is_negative else scaled_value
+
+
+# Batch decoders: a (n, width) uint8 block of raw EBCDIC fields to float64.
+# Unlike the scalar parsers above, which stay as the reference, malformed
+# values come out as NaN rather than 0.0; fields that are entirely blank or
+# low-values (unset) are still 0.0.
+EBCDIC_BLANK = 0x40
+
+# Value of each byte before the sign byte of a zoned decimal: 0-9 for the
+# digits '0'-'9', -1 for a blank, -2 for anything else
+_ZONED_DIGIT = np.full(256, -2, dtype=np.int64)
+_ZONED_DIGIT[0xF0:0xFA] = np.arange(10)
+_ZONED_DIGIT[EBCDIC_BLANK] = -1
+
+# Sign of each sign nibble (the zone of a zoned decimal's last byte, the last
+# nibble of a COMP-3 field): C and F positive, D negative, 0 = invalid
+_SIGN_NIBBLE = np.zeros(16, dtype=np.int64)
+_SIGN_NIBBLE[[0xC, 0xF]] = 1
+_SIGN_NIBBLE[0xD] = -1
+
+
+def _scale(digits: np.ndarray, signs: np.ndarray, valid: np.ndarray, unset: np.ndarray,
+           decimal_places: int) -> np.ndarray:
+    """Combine (n, k) digit values into signed, scaled float64 values."""
+    if digits.shape[1] > 18:
+        raise ValueError(f"{digits.shape[1]} digits overflow int64")
+    values = digits @ (10 ** np.arange(digits.shape[1] - 1, -1, -1, dtype=np.int64))
+    # int64 -> float64 is exact below 2**53, so this rounds like int / 10**n
+    result = values / float(10 ** decimal_places) * signs
+    result[~valid] = np.nan
+    result[unset] = 0.0
+    return result
+
+
+def decode_zoned_column(cols: np.ndarray, decimal_places: int) -> np.ndarray:
+    """Batch parse_ebcdic_signed_decimal() of a (n, width) block of fields."""
+    body = _ZONED_DIGIT[cols[:, :-1]]
+    last = cols[:, -1]
+    signs = _SIGN_NIBBLE[last >> 4]
+    # Blanks are allowed only before the first digit, as int() allows them
+    seen_digit = np.maximum.accumulate(body >= 0, axis=1)
+    valid = ((body >= 0) | ((body == -1) & ~seen_digit)).all(axis=1) & (signs != 0) & ((last & 0x0F) <= 9)
+    digits = np.concatenate([np.maximum(body, 0), (last & 0x0F)[:, None].astype(np.int64)], axis=1)
+    unset = (cols == EBCDIC_BLANK).all(axis=1) | (cols == 0).all(axis=1)
+    return _scale(digits, signs, valid, unset, decimal_places)
+
+
+def decode_comp3_column(cols: np.ndarray, decimal_digits: int) -> np.ndarray:
+    """Batch unpack_comp3_decimal() of a (n, width) block of packed fields."""
+    nibbles = np.stack([cols >> 4, cols & 0x0F], axis=2).reshape(len(cols), -1).astype(np.int64)
+    digits = nibbles[:, :-1]
+    signs = _SIGN_NIBBLE[nibbles[:, -1]]
+    valid = (digits <= 9).all(axis=1) & (signs != 0)
+    unset = (cols == EBCDIC_BLANK).all(axis=1) | (cols == 0).all(axis=1)
+    return _scale(digits, signs, valid, unset, decimal_digits)
+
+
+def decode_location_coordinates(records: np.ndarray) -> dict:
+    """The LOCATION_COORDINATES of a (n, RECORD_LENGTH) block of location records."""
+    return {name: decode_zoned_column(records[:, start:end], decimal_places)
+            for name, start, end, decimal_places in LOCATION_COORDINATES}
+
+
+def main():
+    # --api=42-12345 jumps straight to one well bore via the seek index
+    api = None
+    args = []
+    for arg in sys.argv[1:]:
+        if arg.startswith('--api='):
+            api = arg.split('=', 1)[1]
+        else:
+            args.append(arg)
+    input_file = args[0] if len(args) > 0 else "data/dbf900.ebc.gz"
+
+    f = io.BytesIO(read_group(input_file, api)) if api else gzip.open(input_file, 'rb')
+
+    with f:
+        current_api = None
+
+        while True:
+            record = f.read(247)
+            if not record or len(record) < 247:
+                break
+
+            record_id = record[0:2].decode('cp500')
+
+            if record_id == '01':
+                root = parse_root_record(record)
+                current_api = (root.api_county, root.api_unique)
+                print(f"WELL: API {root.api_county}-{root.api_unique} "
+                      f"District={root.field_district} "
+                      f"Depth={root.total_depth} "
+                      f"Plugged={root.plug_flag}")
+
+            elif record_id == '13' and current_api:
+                loc = parse_new_location_record(record, *current_api)
+                print(f"  LOCATION: {loc.wgs84_latitude:.7f}, {loc.wgs84_longitude:.7f} "
+                      f"County={loc.loc_county} Verified={loc.verification_flag}")
+
+            elif record_id == '21' and current_api:
+                wellid = parse_well_id_record(record, *current_api)
+                lease = wellid.lease_number if wellid.oil_gas_code == 'O' else wellid.gas_rrcid
+                print(f"  WELL-ID: {wellid.oil_gas_code} District={wellid.district} Lease={lease}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,402 @@
+#!/usr/bin/env python3
+"""Run the build as a DAG of stages in one process, skipping unchanged ones.
+
+The stages of both Makefile stages (infrastructure database, then the plume
+ETL on a copy of it) are declared below with their dependencies. Stages whose
+dependencies are done run concurrently (the OGIM load and the P-4, P-5 and
+wellbore parses share no inputs), each on its own cursor of a single
+in-process DuckDB instance per database file, so extensions are loaded once.
+
+Every stage has a cache key: a hash of its queries and code, its input files
+and the keys of the stages it depends on. Keys of successful runs are kept
+in meta.pipeline of the stage's database, and a stage whose key is unchanged
+(and whose output files exist) is skipped. Parse stages always rebuild their
+schema in full; `make rrc-update` remains the in-place refresh.
+
+Each stage run or skip is also appended to the run manifest (see
+run_stage.py).
+
+Usage:
+  pipeline.py [--force] [--dry-run] [--jobs=N] [STAGE ...]
+
+With STAGE names, only those stages and the stages they depend on are run.
+"""
+
+import datetime
+import hashlib
+import inspect
+import multiprocessing
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import threading
+import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable
+
+import duckdb
+
+import create_p4_db
+import create_p5_db
+import create_wellbore_db
+import export_geoparquet
+import load_ogim
+from run_stage import append_record, file_digest
+
+SCRIPTS = Path(__file__).parent
+QUERIES = SCRIPTS.parent / "queries"
+INFRASTRUCTURE = "data/infrastructure.duckdb"
+DATA = "data/data.duckdb"
+DEFAULT_JOBS = 4
+
+META_SQL = """
+CREATE SCHEMA IF NOT EXISTS meta;
+CREATE TABLE IF NOT EXISTS meta.pipeline (
+  stage VARCHAR PRIMARY KEY,
+  cache_key VARCHAR NOT NULL,              -- see Pipeline.cache_keys
+  finished_at TIMESTAMP,
+  seconds DOUBLE
+);
+"""
+
+INFRASTRUCTURE_INDEXES_SQL = """
+INSTALL spatial;
+LOAD spatial;
+CREATE INDEX IF NOT EXISTS idx_wellbore_location_geom ON wellbore.location USING RTREE (geom);
+CREATE INDEX IF NOT EXISTS idx_p4_gpn_lease ON p4.gpn (oil_gas_code, district, lease_rrcid);
+CREATE INDEX IF NOT EXISTS idx_p4_gpn_number ON p4.gpn (gpn_number);
+"""
+
+EMISSIONS_INDEX_SQL = """
+INSTALL spatial;
+LOAD spatial;
+CREATE INDEX IF NOT EXISTS idx_emissions_sources_geom ON emissions.sources USING RTREE (geom);
+"""
+
+# Local modules each parser imports, hashed with it
+PARSER_CODE = {
+    'p4': ['create_p4_db.py', 'parse_p4.py', 'arrow_sink.py', 'rrc_groups.py', 'rrc_index.py'],
+    'p5': ['create_p5_db.py', 'parse_p5.py', 'arrow_sink.py'],
+    'wellbore': ['create_wellbore_db.py', 'parse_wellbore.py', 'arrow_sink.py', 'rrc_groups.py', 'rrc_index.py'],
+}
+
+
+@dataclass
+class Stage:
+    name: str
+    database: str                   # database file the stage writes
+    run: Callable                   # run(pipeline)
+    deps: tuple = ()
+    code: tuple = ()                # query files, scripts or SQL text defining the stage
+    inputs: tuple = ()              # data files read
+    outputs: tuple = ()             # files written; a missing one forces a rerun
+
+
+def run_sql(con, sql: str):
+    """Run a SQL script and print the result of its last statement (the summary)."""
+    con.execute(sql)
+    if con.description:
+        for row in con.fetchall():
+            print("   ", " | ".join(str(value) for value in row))
+
+
+def sql_stage(name: str, database: str, query: str, deps: tuple, **kwargs) -> Stage:
+    path = QUERIES / query
+    return Stage(name, database, lambda p: run_sql(p.cursor(database), path.read_text()),
+                 deps, code=(path,), **kwargs)
+
+
+def inline_sql_stage(name: str, database: str, sql: str, deps: tuple, **kwargs) -> Stage:
+    return Stage(name, database, lambda p: run_sql(p.cursor(database), sql), deps, code=(sql,), **kwargs)
+
+
+def export_stage(name: str, query: str, output: str, deps: tuple, options: str = "FORMAT JSON, ARRAY true") -> Stage:
+    path = QUERIES / "exports" / query
+
+    def run(p):
+        con = p.cursor(DATA)
+        con.execute("INSTALL spatial; LOAD spatial;")
+        con.execute(f"COPY ({path.read_text()}) TO '{output}' ({options})")
+
+    return Stage(name, DATA, run, deps, code=(path,), outputs=(output,))
+
+
+def geoparquet_stage(name: str, query: str, output: str, deps: tuple) -> Stage:
+    path = QUERIES / "exports" / query
+
+    def run(p):
+        rows = export_geoparquet.export(p.cursor(DATA), path.read_text(), output)
+        print(f"    {rows:,} rows")
+
+    return Stage(name, DATA, run, deps, code=(path, SCRIPTS / "export_geoparquet.py"), outputs=(output,))
+
+
+def parse_stage(name: str, schema: str, input_file: str, load: Callable) -> Stage:
+    """Full parse of one RRC dump into its schema, emptied first."""
+    def run(p):
+        con = p.cursor(INFRASTRUCTURE)
+        for (table,) in con.execute("SELECT table_name FROM duckdb_tables() WHERE schema_name = ?",
+                                    [schema]).fetchall():
+            con.execute(f"DELETE FROM {schema}.{table}")
+        counts = load(con, input_file)
+        print("   ", ", ".join(f"{count:,} {table}" for table, count in counts.items()))
+
+    return Stage(name, INFRASTRUCTURE, run, ('schema',),
+                 code=tuple(SCRIPTS / script for script in PARSER_CODE[schema]), inputs=(input_file,))
+
+
+def load_facilities(p):
+    """OGIM facilities of the configured region (see load_ogim.py)."""
+    counts = load_ogim.load(p.cursor(INFRASTRUCTURE), "data/OGIM_v2.7.gpkg", load_ogim.region(), jobs=os.cpu_count())
+    print("   ", ", ".join(f"{count:,} {infra_type}" for infra_type, count in counts.items()))
+
+
+def copy_infrastructure(p):
+    """Start the plume database from a copy of the infrastructure database."""
+    p.close(INFRASTRUCTURE)
+    p.close(DATA)
+    shutil.copy(INFRASTRUCTURE, DATA)
+    # Lets `make data-incremental` pick up a database built here
+    with open(f"{DATA}.infra", 'w') as f:
+        subprocess.run(['cksum', INFRASTRUCTURE], stdout=f, check=True)
+
+
+STAGES = [
+    # Stage 1: infrastructure database
+    sql_stage('schema', INFRASTRUCTURE, "schema.sql", ()),
+    # The region ($OGIM_BBOX) is part of the stage's code, so changing it reloads
+    Stage('load_ogim', INFRASTRUCTURE, load_facilities, ('schema',),
+          code=(SCRIPTS / "load_ogim.py", QUERIES / "load_ogim.sql", repr(load_ogim.region())),
+          inputs=("data/OGIM_v2.7.gpkg",)),
+    parse_stage('parse_p4', 'p4', "data/p4f606.ebc.gz",
+                lambda con, f: create_p4_db.load(con, f, batch=True)),
+    parse_stage('parse_p5', 'p5', "data/orf850.ebc.gz", create_p5_db.load),
+    parse_stage('parse_wellbore', 'wellbore', "data/dbf900.ebc.gz",
+                lambda con, f: create_wellbore_db.load(con, f, jobs=os.cpu_count())),
+    sql_stage('load_p4', INFRASTRUCTURE, "load_p4.sql", ('parse_p4',)),
+    sql_stage('load_p5', INFRASTRUCTURE, "load_p5.sql", ('parse_p5',)),
+    sql_stage('load_wellbore', INFRASTRUCTURE, "load_wellbore.sql", ('parse_wellbore',)),
+    sql_stage('create_operators', INFRASTRUCTURE, "create_operators.sql", ('load_ogim', 'load_p5')),
+    sql_stage('create_well_operator', INFRASTRUCTURE, "create_well_operator.sql",
+              ('load_p4', 'load_wellbore', 'create_operators')),
+    inline_sql_stage('create_indexes', INFRASTRUCTURE, INFRASTRUCTURE_INDEXES_SQL, ('load_p4', 'load_wellbore')),
+    inline_sql_stage('optimize', INFRASTRUCTURE, "VACUUM; ANALYZE;", ('create_well_operator', 'create_indexes')),
+
+    # Stage 2: plume ETL
+    Stage('copy_infrastructure', DATA, copy_infrastructure, ('optimize',), code=(inspect.getsource(copy_infrastructure),)),
+    sql_stage('load_emissions', DATA, "load_emissions.sql", ('copy_infrastructure',),
+              inputs=("data/plumes_latest.csv",)),
+    inline_sql_stage('create_emissions_index', DATA, EMISSIONS_INDEX_SQL, ('load_emissions',)),
+    sql_stage('scoring_profiles', DATA, "scoring_profiles.sql", ('copy_infrastructure',)),
+    sql_stage('candidate_pairs', DATA, "candidate_pairs.sql", ('load_emissions',)),
+    sql_stage('attribution', DATA, "create_attribution.sql",
+              ('create_emissions_index', 'scoring_profiles', 'candidate_pairs')),
+    sql_stage('score_attribution', DATA, "score_attribution.sql", ('attribution',)),
+    export_stage('export_plumes', "plumes.sql", "data/plumes.json", ('score_attribution',)),
+    export_stage('export_infrastructure', "infrastructure.sql", "data/infrastructure.json", ('score_attribution',)),
+    geoparquet_stage('export_plumes_geoparquet', "plumes_geoparquet.sql", "data/plumes.parquet", ('score_attribution',)),
+    geoparquet_stage('export_infrastructure_geoparquet', "infrastructure_geoparquet.sql", "data/infrastructure.parquet",
+                     ('score_attribution',)),
+    export_stage('export_infrastructure_links', "infrastructure_links.sql", "data/infrastructure_links.parquet",
+                 ('score_attribution',), options="FORMAT PARQUET, COMPRESSION zstd"),
+]
+
+
+def content_hash(item) -> str:
+    if isinstance(item, Path):
+        return hashlib.sha256(item.read_bytes()).hexdigest()
+    return hashlib.sha256(item.encode()).hexdigest()
+
+
+class Pipeline:
+    """Stages by name, with one DuckDB instance per database file."""
+
+    def __init__(self, stages: list):
+        self.stages = {stage.name: stage for stage in stages}
+        self.connections = {}
+        self.lock = threading.Lock()
+        self.digests = {}
+
+    def cursor(self, database: str):
+        """A new cursor (connection) on the shared instance of a database."""
+        with self.lock:
+            if database not in self.connections:
+                Path(database).parent.mkdir(parents=True, exist_ok=True)
+                con = duckdb.connect(database)
+                con.execute(META_SQL)
+                self.connections[database] = con
+            return self.connections[database].cursor()
+
+    def close(self, database: str):
+        with self.lock:
+            con = self.connections.pop(database, None)
+        if con is not None:
+            con.execute("CHECKPOINT")
+            con.close()
+
+    def close_all(self):
+        for database in list(self.connections):
+            self.close(database)
+
+    def selected(self, targets: list) -> list:
+        """Stages needed for targets (all stages if none), in declaration order."""
+        unknown = [name for name in targets if name not in self.stages]
+        if unknown:
+            raise SystemExit(f"Unknown stage(s): {', '.join(unknown)}")
+        needed = set()
+        pending = list(targets or self.stages)
+        while pending:
+            name = pending.pop()
+            if name not in needed:
+                needed.add(name)
+                pending.extend(self.stages[name].deps)
+        return [name for name in self.stages if name in needed]
+
+    def digest(self, path: str) -> dict:
+        if path not in self.digests:
+            if not Path(path).exists():
+                raise SystemExit(f"Missing input file {path} (download it with make first)")
+            self.digests[path] = file_digest(path)
+        return self.digests[path]
+
+    def cache_keys(self, names: list) -> dict:
+        """Hash of each stage's code, inputs and dependency keys."""
+        keys = {}
+        for name in names:
+            stage = self.stages[name]
+            parts = ([content_hash(item) for item in stage.code] +
+                     [self.digest(path)['sha256'] for path in stage.inputs] +
+                     [keys[dep] for dep in stage.deps])
+            keys[name] = hashlib.sha256("\n".join(parts).encode()).hexdigest()
+        return keys
+
+    def stored_keys(self) -> dict:
+        """Keys of the last successful run of each stage, from the database it writes.
+
+        data.duckdb starts as a copy of infrastructure.duckdb, so its
+        meta.pipeline also holds (possibly stale) rows for the stage-1 stages;
+        only the rows of a database's own stages are read from it.
+        """
+        by_database = {}
+        for name, stage in self.stages.items():
+            by_database.setdefault(stage.database, []).append(name)
+        stored = {}
+        for database, names in by_database.items():
+            if Path(database).exists():
+                stored.update(self.cursor(database).execute(
+                    "SELECT stage, cache_key FROM meta.pipeline WHERE stage IN (SELECT unnest(?))",
+                    [names]).fetchall())
+        return stored
+
+    def plan(self, names: list, keys: dict, force: bool = False) -> list:
+        """Stages that need to run: forced, changed, never run here, or missing outputs."""
+        stored = {} if force else self.stored_keys()
+        return [name for name in names
+                if stored.get(name) != keys[name]
+                or not all(Path(path).exists() for path in self.stages[name].outputs)]
+
+    def run_stage(self, name: str, key: str) -> float:
+        stage = self.stages[name]
+        start = time.perf_counter()
+        stage.run(self)
+        seconds = time.perf_counter() - start
+        self.cursor(stage.database).execute(
+            "INSERT OR REPLACE INTO meta.pipeline VALUES (?, ?, now()::TIMESTAMP, ?)", [name, key, seconds])
+        return seconds
+
+    def run(self, names: list, keys: dict, to_run: list, jobs: int) -> bool:
+        """Run stages as their dependencies finish; False if any stage failed."""
+        done = {name for name in names if name not in to_run}
+        for name in names:
+            if name in done:
+                self.record(name, keys, status=0, seconds=0.0, cached=True)
+        waiting = [name for name in names if name in to_run]
+        running = {}
+        failed = False
+
+        with ThreadPoolExecutor(max_workers=jobs) as pool:
+            while waiting or running:
+                if not failed:
+                    for name in [n for n in waiting if all(dep in done for dep in self.stages[n].deps)]:
+                        if len(running) >= jobs:
+                            break
+                        print(f"▶ {name}")
+                        waiting.remove(name)
+                        running[pool.submit(self.run_stage, name, keys[name])] = (name, time.perf_counter())
+                if not running:
+                    break
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    name, start = running.pop(future)
+                    error = future.exception()
+                    seconds = time.perf_counter() - start
+                    self.record(name, keys, status=0 if error is None else 1, seconds=seconds, cached=False)
+                    if error is None:
+                        done.add(name)
+                        print(f"✓ {name} ({seconds:.1f}s)")
+                    else:
+                        failed = True
+                        traceback.print_exception(error)
+                        print(f"✗ {name}: {error}")
+        return not failed
+
+    def record(self, name: str, keys: dict, status: int, seconds: float, cached: bool):
+        stage = self.stages[name]
+        append_record({
+            'run_id': os.environ.get('RUN_ID'),
+            'stage': name,
+            'database': stage.database,
+            'started_at': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+            'inputs': {path: self.digest(path) for path in stage.inputs},
+            'command': 'pipeline.py',
+            'cached': cached,
+            'cache_key': keys[name],
+            'status': status,
+            'seconds': round(seconds, 3),
+            # Whole process, so shared by concurrent stages
+            'peak_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        })
+
+
+def main():
+    force = '--force' in sys.argv
+    dry_run = '--dry-run' in sys.argv
+    jobs = DEFAULT_JOBS
+    targets = []
+    for arg in sys.argv[1:]:
+        if arg.startswith('--jobs='):
+            jobs = int(arg.split('=', 1)[1])
+        elif arg.startswith('--') and arg not in ('--force', '--dry-run'):
+            print(__doc__.strip())
+            sys.exit(1)
+        elif not arg.startswith('--'):
+            targets.append(arg)
+
+    # DuckDB's threads make forking the parser worker pools unsafe
+    multiprocessing.set_start_method('forkserver')
+
+    pipeline = Pipeline(STAGES)
+    names = pipeline.selected(targets)
+    try:
+        keys = pipeline.cache_keys(names)
+        to_run = pipeline.plan(names, keys, force)
+        for name in names:
+            print(f"  {name:<24} {'run' if name in to_run else 'unchanged'}")
+        if dry_run:
+            return
+        ok = pipeline.run(names, keys, to_run, jobs)
+    finally:
+        pipeline.close_all()
+
+    if not ok:
+        sys.exit(1)
+    print(f"✓ Pipeline complete ({len(to_run)} of {len(names)} stages run)")
+
+
+if __name__ == '__main__':
+    main()
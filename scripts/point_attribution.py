@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""Attribute arbitrary points to nearby infrastructure operators, from a warm index.
+
+Answers "who operates infrastructure near this lat/lon?" with the same
+search radius, nearest-facility choice and confidence score as
+queries/create_attribution.sql (via the KD-tree engine of
+scripts/attribution.py). RRC wells (rrc.well_operator) and OGIM facilities
+(infra.all_facilities) are read once at startup, with the default scoring
+profile (queries/scoring_profiles.sql); the database is closed again, so
+builds can keep writing to it.
+
+As a library:
+
+    index = PointIndex.load("data/data.duckdb")
+    index.attribute([(31.95, -102.18), {'id': 'site-1', 'lat': 32.1, 'lon': -101.9}])
+
+As a local HTTP service (--port, default 8002):
+
+    GET  /attribute?lat=31.95&lon=-102.18
+    POST /attribute   {"points": [{"id": "site-1", "lat": 32.1, "lon": -101.9}, ...]}
+    GET  /stats       startup time, query counts and latency percentiles
+
+Each result carries the nearest facility, its operator and the confidence
+score, or nulls when nothing is within the search radius.
+
+Usage:
+  point_attribution.py [--port=N] [database]
+  point_attribution.py --point=LAT,LON [--point=LAT,LON ...] [database]
+"""
+
+import json
+import sys
+import threading
+import time
+import urllib.parse
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import duckdb
+import numpy as np
+import pyarrow as pa
+
+import attribution
+
+PORT = 8002
+MAX_POINTS = 100_000        # per request
+LATENCY_WINDOW = 10_000     # recent queries kept for the percentiles
+
+# Plume columns of emissions.attributed that don't apply to a bare point
+PLUME_COLUMNS = {'id', 'rate_kg_hr', 'rate_uncertainty_kg_hr', 'datetime', 'latitude', 'longitude'}
+RESULT_COLUMNS = [name for name in attribution.ATTRIBUTED_SCHEMA.names if name not in PLUME_COLUMNS]
+
+
+def parse_point(point, index: int) -> tuple:
+    """(id, lat, lon) from a (lat, lon) pair or a {'lat', 'lon'[, 'id']} dict."""
+    if isinstance(point, dict):
+        point_id, lat, lon = point.get('id', index), point.get('lat'), point.get('lon')
+    elif isinstance(point, (list, tuple)) and len(point) == 2:
+        point_id, (lat, lon) = index, point
+    else:
+        raise ValueError(f"Point {index}: expected [lat, lon] or {{lat, lon}}")
+    try:
+        lat, lon = float(lat), float(lon)
+    except (TypeError, ValueError):
+        raise ValueError(f"Point {point_id}: lat and lon must be numbers") from None
+    if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+        raise ValueError(f"Point {point_id}: ({lat}, {lon}) is not a valid lat/lon")
+    return point_id, lat, lon
+
+
+class LatencyStats:
+    """Query counts and a window of recent latencies, safe to share between threads."""
+
+    def __init__(self, window: int = LATENCY_WINDOW):
+        self.lock = threading.Lock()
+        self.recent = deque(maxlen=window)
+        self.queries = 0
+        self.points = 0
+
+    def record(self, seconds: float, points: int):
+        with self.lock:
+            self.recent.append(seconds * 1000.0)
+            self.queries += 1
+            self.points += points
+
+    def summary(self) -> dict:
+        with self.lock:
+            recent = np.array(self.recent)
+            summary = {'queries': self.queries, 'points': self.points}
+        if len(recent):
+            p50, p95, p99 = np.percentile(recent, [50, 95, 99])
+            summary['latency_ms'] = {'p50': round(float(p50), 3), 'p95': round(float(p95), 3),
+                                     'p99': round(float(p99), 3),
+                                     'max': round(float(recent.max()), 3), 'window': len(recent)}
+        return summary
+
+
+class PointIndex:
+    """RRC wells and OGIM facilities held in memory with their KD-trees, and the scoring profile."""
+
+    def __init__(self, wells: attribution.FacilitySet, facilities: attribution.FacilitySet, profile: dict,
+                 startup_seconds: float = 0.0):
+        self.wells = wells
+        self.facilities = facilities
+        self.profile = profile
+        self.startup_seconds = startup_seconds
+        self.stats = LatencyStats()
+        # Warm the per-column arrays the first query would otherwise build
+        wells.ints('api_key')
+        wells.ints('operator_number')
+        facilities.codes('infra_type')
+        facilities.distinct('operator')
+        for infra_type in attribution.TYPE_COUNTS.values():
+            facilities.equals('infra_type', infra_type)
+
+    @classmethod
+    def load(cls, database: str) -> 'PointIndex':
+        """Read the facility tables of a database into a new index."""
+        start = time.perf_counter()
+        con = duckdb.connect(database, read_only=True)
+        try:
+            con.execute("INSTALL spatial; LOAD spatial;")
+            profile = attribution.load_scoring_profile(con)
+            wells = attribution.load_rrc_wells(con)
+            facilities = attribution.load_ogim_facilities(con)
+        finally:
+            con.close()
+        index = cls(wells, facilities, profile)
+        index.startup_seconds = time.perf_counter() - start
+        return index
+
+    def attribute(self, points) -> list:
+        """One result dict per point, in order; see the module docstring for the point forms."""
+        start = time.perf_counter()
+        parsed = [parse_point(point, i) for i, point in enumerate(points)]
+        lat = np.array([p[1] for p in parsed], dtype=np.float64)
+        lon = np.array([p[2] for p in parsed], dtype=np.float64)
+        n = len(parsed)
+        # Points go through the batch engine as plumes without a rate or time
+        plumes = pa.table({
+            'id': pa.array([str(i) for i in range(n)], pa.string()),
+            'x': lon,
+            'y': lat,
+            'emission_auto': pa.nulls(n, pa.float64()),
+            'emission_uncertainty_auto': pa.nulls(n, pa.float64()),
+            'datetime': pa.nulls(n, pa.timestamp('us')),
+        })
+        rows = attribution.attribute(plumes, self.wells, self.facilities, self.profile) if n else None
+
+        results = [{'id': point_id, 'latitude': point_lat, 'longitude': point_lon,
+                    **dict.fromkeys(RESULT_COLUMNS)}
+                   for point_id, point_lat, point_lon in parsed]
+        if rows is not None and rows.num_rows:
+            matched = rows.select(['id'] + RESULT_COLUMNS).to_pylist()
+            for row in matched:
+                results[int(row.pop('id'))].update(row)
+        self.stats.record(time.perf_counter() - start, n)
+        return results
+
+    def summary(self) -> dict:
+        return {'startup_seconds': round(self.startup_seconds, 3), 'scoring_profile': self.profile['profile_id'],
+                'rrc_wells': len(self.wells),
+                'ogim_facilities': len(self.facilities), **self.stats.summary()}
+
+
+class Handler(BaseHTTPRequestHandler):
+    index: PointIndex
+
+    def send_json(self, status: int, body):
+        data = (json.dumps(body, default=str) + "\n").encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def answer(self, points):
+        if len(points) > MAX_POINTS:
+            self.send_json(413, {'error': f"At most {MAX_POINTS:,} points per request"})
+            return
+        start = time.perf_counter()
+        try:
+            results = self.index.attribute(points)
+        except ValueError as error:
+            self.send_json(400, {'error': str(error)})
+            return
+        self.send_json(200, {'results': results, 'elapsed_ms': round((time.perf_counter() - start) * 1000.0, 3)})
+
+    def do_GET(self):
+        url = urllib.parse.urlsplit(self.path)
+        if url.path == '/stats':
+            self.send_json(200, self.index.summary())
+        elif url.path == '/attribute':
+            params = dict(urllib.parse.parse_qsl(url.query))
+            if 'lat' not in params or 'lon' not in params:
+                self.send_json(400, {'error': "lat and lon are required"})
+                return
+            self.answer([params])
+        else:
+            self.send_error(404)
+
+    def do_POST(self):
+        if urllib.parse.urlsplit(self.path).path != '/attribute':
+            self.send_error(404)
+            return
+        try:
+            body = json.loads(self.rfile.read(int(self.headers.get('Content-Length') or 0)) or b'{}')
+        except json.JSONDecodeError as error:
+            self.send_json(400, {'error': f"Invalid JSON: {error}"})
+            return
+        points = body.get('points') if isinstance(body, dict) else body
+        if not isinstance(points, list):
+            self.send_json(400, {'error': "Expected {\"points\": [...]}"})
+            return
+        self.answer(points)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def main():
+    port = PORT
+    points = []
+    args = []
+    for arg in sys.argv[1:]:
+        if arg.startswith('--port='):
+            port = int(arg.split('=', 1)[1])
+        elif arg.startswith('--point='):
+            points.append(tuple(arg.split('=', 1)[1].split(',')))
+        else:
+            args.append(arg)
+    database = args[0] if args else "data/data.duckdb"
+
+    print(f"Loading facilities from {database}...")
+    index = PointIndex.load(database)
+    print(f"  {len(index.wells):,} RRC well links and {len(index.facilities):,} OGIM facilities "
+          f"in {index.startup_seconds:.1f}s, scoring profile {index.profile['profile_id']}")
+
+    if points:
+        for result in index.attribute(points):
+            print(json.dumps(result, default=str))
+        return
+
+    Handler.index = index
+    server = ThreadingHTTPServer(('localhost', port), Handler)
+    print(f"Serving point attribution on http://localhost:{port}/attribute")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        summary = index.stats.summary()
+        latency = summary.get('latency_ms', {})
+        print(f"\n{summary['queries']:,} queries, {summary['points']:,} points"
+              + (f", p50 {latency['p50']:.1f} ms, p95 {latency['p95']:.1f} ms" if latency else ""))
+
+
+if __name__ == '__main__':
+    main()
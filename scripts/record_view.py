@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""Lazy, zero-copy views of fixed-width EBCDIC records.
+
+A view wraps a memoryview of the buffer a record was read into. Nothing is
+decoded until a field is first read; then only that field's bytes are
+decoded, and the value is cached. astuple() reads a whole record in one
+pass, decoding just the span of the record its layout covers. Views use
+__slots__, so a record costs one small object instead of a dataclass with
+every field decoded up front.
+
+Layouts are tuples of (name, start, end, kind), the same tables the P-4
+batch decoder uses, with kinds from DECODERS.
+"""
+
+_MISSING = object()
+
+
+def _int_or_zero(text: str) -> int:
+    text = text.strip()
+    return int(text) if text else 0
+
+
+def _feet(text: str) -> int:
+    # Distances can contain decimals despite PIC 9(06) in the docs
+    text = text.strip()
+    try:
+        return int(float(text)) if text else 0
+    except ValueError:
+        return 0
+
+
+# Zone sign and digit of each character of a zoned decimal's last byte
+_SIGNED_DIGITS = {bytes([byte]).decode('cp500'): (str(byte & 0x0F), byte & 0xF0 == 0xD0) for byte in range(256)}
+
+
+def zoned_text(text: str, decimal_places: int) -> float:
+    """zoned_decimal() of a field already decoded from cp500."""
+    if not text:
+        return 0.0
+
+    digit, negative = _SIGNED_DIGITS[text[-1]]
+    try:
+        value = int(text[:-1] + digit)
+    except ValueError:
+        return 0.0
+
+    scaled_value = value / (10 ** decimal_places)
+    return -scaled_value if negative else scaled_value
+
+
+def zoned_decimal(data, decimal_places: int) -> float:
+    """Parse EBCDIC zoned decimal with sign in last byte.
+
+    In EBCDIC, signed numeric fields store the sign in the zone bits of the last byte:
+    - 0xCn or 0xFn = positive digit (n = digit 0-9)
+    - 0xDn = negative digit (n = digit 0-9)
+    """
+    return zoned_text(str(data, 'cp500'), decimal_places)
+
+
+# Field decoders by layout kind; each takes the field's text
+DECODERS = {
+    'int': int,
+    'char': str,                                        # raw characters
+    'str': str.strip,                                   # stripped string
+    'pct': lambda text: int(text) / 10000.0,            # PIC 9(01)V9(04)
+    'upper': str.upper,
+    'int_or_zero': _int_or_zero,                        # blank = 0
+    'feet': _feet,
+    'zoned_2': lambda text: zoned_text(text, 2),        # PIC S9(8)V9(2)
+    'zoned_7': lambda text: zoned_text(text, 7),        # PIC S9(3)V9(7)
+}
+
+
+class Field:
+    """Descriptor decoding one field of a view on first access."""
+
+    __slots__ = ('index', 'start', 'end', 'decode')
+
+    def __init__(self, index: int, start: int, end: int, kind: str):
+        self.index = index
+        self.start = start
+        self.end = end
+        self.decode = DECODERS[kind]
+
+    def __get__(self, view, owner=None):
+        if view is None:
+            return self
+        values = view._values
+        if values is None:
+            values = view._values = [_MISSING] * view.LAYOUT_SIZE
+        value = values[self.index]
+        if value is _MISSING:
+            value = values[self.index] = self.decode(str(view._data[self.start:self.end], 'cp500'))
+        return value
+
+
+class RecordView:
+    """Base class of record views; see record_view()."""
+
+    __slots__ = ('_data', '_values')
+    FIELDS = ()         # context fields, then layout fields in layout order
+    LAYOUT_SIZE = 0
+    CONTEXT = ()        # fields passed to the constructor
+    LAYOUT_FIELDS = ()  # fields decoded from the record, in layout order
+    SPAN = slice(0)     # the part of the record the layout covers
+    DECODE_ALL = ()     # (decode, slice relative to SPAN) of each layout field
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # Rows of views whose FIELDS are context + layout come straight from
+        # the decoded values; others (with computed fields) go through getattr
+        if cls.FIELDS == cls.CONTEXT + cls.LAYOUT_FIELDS:
+            context = cls.CONTEXT
+            cls._row = staticmethod(lambda view: tuple(getattr(view, name) for name in context)
+                                    + tuple(view._values))
+        else:
+            fields = cls.FIELDS
+            cls._row = staticmethod(lambda view: tuple(getattr(view, name) for name in fields))
+
+    def __init__(self, data):
+        self._data = data if isinstance(data, memoryview) else memoryview(data)
+        self._values = None
+
+    def astuple(self) -> tuple:
+        """Every field in FIELDS order; the fastest way to read a whole record."""
+        if self._values is None:
+            # Decode all fields in one pass rather than one descriptor call each
+            text = str(self._data[self.SPAN], 'cp500')
+            self._values = [decode(text[part]) for decode, part in self.DECODE_ALL]
+        elif _MISSING in self._values:
+            self._values = [getattr(self, name) for name in self.LAYOUT_FIELDS]
+        return self._row(self)
+
+    def __eq__(self, other):
+        return type(self) is type(other) and self.astuple() == other.astuple()
+
+    def __repr__(self):
+        fields = ', '.join(f"{name}={getattr(self, name)!r}" for name in self.FIELDS)
+        return f"{type(self).__name__}({fields})"
+
+
+def record_view(name: str, layout: tuple, context: tuple = (), doc: str = None) -> type:
+    """A RecordView class with one lazily decoded attribute per layout field.
+
+    Context fields (e.g. the API number of the well a child record belongs
+    to) are not in the record; they are passed to the constructor after the
+    record and stored as is.
+    """
+    names = tuple(field[0] for field in layout)
+    first = min(start for _, start, _, _ in layout)
+    namespace = {'__slots__': context, '__doc__': doc, 'LAYOUT_SIZE': len(layout), 'CONTEXT': context,
+                 'LAYOUT_FIELDS': names, 'FIELDS': context + names,
+                 'SPAN': slice(first, max(end for _, _, end, _ in layout)),
+                 'DECODE_ALL': tuple((DECODERS[kind], slice(start - first, end - first))
+                                     for _, start, end, kind in layout)}
+    if context:
+        def __init__(self, data, *values):
+            RecordView.__init__(self, data)
+            for slot, value in zip(context, values):
+                setattr(self, slot, value)
+        namespace['__init__'] = __init__
+    for index, (field, start, end, kind) in enumerate(layout):
+        namespace[field] = Field(index, start, end, kind)
+    return type(name, (RecordView,), namespace)
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""Root-record groups in the RRC dumps: aligned reads and change fingerprints.
+
+Every RRC dataset is a sequence of groups, each a root record followed by its
+children (a P-4 lease, a well bore). Reading in root-aligned blocks keeps
+groups whole, and hashing each group's raw bytes lets an incremental refresh
+decode and rewrite only the groups that changed since the previous build.
+"""
+
+import hashlib
+
+import numpy as np
+import pyarrow as pa
+
+
+def iter_aligned_blocks(f, record_length: int, root_id: bytes, block_records: int = 65536):
+    """Read a stream in blocks of whole records that each start at a root.
+
+    Every block except possibly the first begins with a root record, so no
+    group is split across blocks. A trailing partial record is dropped, as
+    in a sequential read.
+    """
+    pending = b''
+
+    while True:
+        block = f.read(block_records * record_length)
+        data = pending + block
+        usable = len(data) - len(data) % record_length
+
+        if not block:
+            if usable:
+                yield data[:usable]
+            return
+
+        # Cut before the last root in the block so its children stay with it
+        cut = 0
+        for offset in range(usable - record_length, 0, -record_length):
+            if data[offset:offset + 2] == root_id:
+                cut = offset
+                break
+
+        if cut:
+            yield data[:cut]
+            pending = data[cut:]
+        else:
+            pending = data
+
+
+def group_bounds(data: bytes, record_length: int, root_id: bytes) -> list:
+    """Byte ranges (start, end) of the root-led groups in a block of records.
+
+    Records before the first root (only possible in the first block) are
+    not part of any group and are not returned.
+    """
+    records = np.frombuffer(data, dtype=np.uint8).reshape(-1, record_length)
+    starts = np.flatnonzero((records[:, 0] == root_id[0]) & (records[:, 1] == root_id[1])) * record_length
+    ends = np.append(starts[1:], len(data))
+    return list(zip(starts.tolist(), ends.tolist()))
+
+
+def digest(group: bytes) -> bytes:
+    return hashlib.blake2b(group, digest_size=16).digest()
+
+
+class GroupSelector:
+    """Fingerprint every group in a stream and choose which ones to decode.
+
+    Call the selector on each root-aligned block; it returns the block with
+    unwanted groups removed. `wanted(key, index, digest)` decides per group,
+    where index counts earlier groups with the same key (the dumps contain a
+    few duplicated leases and wells). Skipped groups are remembered so they
+    can be fetched in a second pass if their key turns out to have changed.
+    """
+
+    def __init__(self, record_length: int, root_id: bytes, key, wanted=None):
+        self.record_length = record_length
+        self.root_id = root_id
+        self.key = key
+        self.wanted = wanted
+        self.digests = {}
+        self.skipped = set()
+
+    def add(self, key: str, group_digest: bytes) -> int:
+        """Record a group's digest, returning its index among groups with that key."""
+        seen = self.digests.setdefault(key, [])
+        seen.append(group_digest)
+        return len(seen) - 1
+
+    def __call__(self, data: bytes) -> bytes:
+        bounds = group_bounds(data, self.record_length, self.root_id)
+        first = bounds[0][0] if bounds else len(data)
+        parts = [data[:first]]  # leading orphans, ignored by the parsers
+
+        for start, end in bounds:
+            group = data[start:end]
+            key = self.key(group[:self.record_length])
+            group_digest = digest(group)
+            index = self.add(key, group_digest)
+            if self.wanted is None or self.wanted(key, index, group_digest):
+                parts.append(group)
+            else:
+                self.skipped.add((key, index))
+
+        return b''.join(parts)
+
+    def fingerprints(self) -> dict:
+        """Fingerprint per key, covering all of its groups in file order."""
+        return {key: fingerprint(digests) for key, digests in self.digests.items()}
+
+
+def fingerprint(digests: list) -> str:
+    if len(digests) == 1:
+        return digests[0].hex()
+    return hashlib.blake2b(b''.join(digests), digest_size=16).hexdigest()
+
+
+def group_digests(data: bytes, record_length: int, root_id: bytes, key) -> list:
+    """(key, digest) for each group in a block, for fingerprinting in workers."""
+    return [
+        (key(data[start:start + record_length]), digest(data[start:end]))
+        for start, end in group_bounds(data, record_length, root_id)
+    ]
+
+
+def changed_only(previous: dict):
+    """`wanted` predicate for an incremental pass over a previous build.
+
+    A key's first group is decoded when its digest differs from the stored
+    fingerprint; later groups of a duplicated key are always decoded.
+    """
+    def wanted(key, index, group_digest):
+        return index > 0 or previous.get(key) != group_digest.hex()
+    return wanted
+
+
+def refetch_skipped(selector: GroupSelector, previous: dict):
+    """`wanted` predicate for a second pass, or None if none is needed.
+
+    A skipped group must still be decoded if another group with the same key
+    made that key's fingerprint change, since all of the key's rows are
+    replaced together.
+    """
+    current = selector.fingerprints()
+    groups = {(key, index) for key, index in selector.skipped if previous.get(key) != current[key]}
+    if not groups:
+        return None
+    return lambda key, index, group_digest: (key, index) in groups
+
+
+def fingerprint_stream(f, record_length: int, root_id: bytes, key) -> dict:
+    """Fingerprints of every group in a stream, without decoding anything."""
+    selector = GroupSelector(record_length, root_id, key)
+    for data in iter_aligned_blocks(f, record_length, root_id):
+        selector(data)
+    return selector.fingerprints()
+
+
+class Refresh:
+    """Apply an incremental refresh of one RRC schema in DuckDB.
+
+    Decoded rows are staged in temporary copies of the target tables; once
+    the pass is complete, rows of changed and deleted keys are replaced in a
+    single transaction and the fingerprint table is brought up to date.
+    """
+
+    def __init__(self, con, fingerprint_table: str, tables: list, key_expr: str):
+        self.con = con
+        self.fingerprint_table = fingerprint_table
+        self.tables = tables
+        self.key_expr = key_expr
+
+    def previous(self) -> dict:
+        rows = self.con.execute(f"SELECT key, fingerprint FROM {self.fingerprint_table}").fetchall()
+        if not rows and self.con.execute(f"SELECT COUNT(*) FROM {self.tables[0]}").fetchone()[0]:
+            raise SystemExit(f"{self.fingerprint_table} is empty but {self.tables[0]} is not; "
+                             f"run a full build before an incremental one")
+        return dict(rows)
+
+    @staticmethod
+    def staging_table(table: str) -> str:
+        return f"staging_{table.replace('.', '_')}"
+
+    def create_staging(self):
+        for table in self.tables:
+            self.con.execute(f"CREATE OR REPLACE TEMP TABLE {self.staging_table(table)} "
+                             f"AS SELECT * FROM {table} LIMIT 0")
+
+    def insert(self, table: str, columns: dict):
+        """Insert string columns into a table in one statement, via a registered Arrow table."""
+        self.con.register('refresh_rows', pa.table({name: pa.array(values, pa.string())
+                                                    for name, values in columns.items()}))
+        try:
+            self.con.execute(f"INSERT INTO {table} BY NAME SELECT * FROM refresh_rows")
+        finally:
+            self.con.unregister('refresh_rows')
+
+    def apply(self, previous: dict, current: dict) -> dict:
+        """Replace rows for keys whose fingerprint differs; return change counts."""
+        changed = [key for key, fp in current.items() if previous.get(key) != fp]
+        deleted = [key for key in previous if key not in current]
+        stats = {
+            'new': sum(1 for key in changed if key not in previous),
+            'changed': sum(1 for key in changed if key in previous),
+            'deleted': len(deleted),
+            'unchanged': len(current) - len(changed),
+        }
+
+        self.con.execute("CREATE OR REPLACE TEMP TABLE refresh_keys (key VARCHAR)")
+        if not changed and not deleted:
+            return stats
+        self.insert('refresh_keys', {'key': changed + deleted})
+
+        self.con.execute("BEGIN TRANSACTION")
+        try:
+            for table in self.tables:
+                self.con.execute(f"DELETE FROM {table} WHERE {self.key_expr} IN (SELECT key FROM refresh_keys)")
+                self.con.execute(f"INSERT INTO {table} SELECT * FROM {self.staging_table(table)} "
+                                 f"WHERE {self.key_expr} IN (SELECT key FROM refresh_keys)")
+            self.con.execute(f"DELETE FROM {self.fingerprint_table} WHERE key IN (SELECT key FROM refresh_keys)")
+            if changed:
+                self.insert(self.fingerprint_table, {'key': changed,
+                                                     'fingerprint': [current[key] for key in changed]})
+            self.con.execute("COMMIT")
+        except Exception:
+            self.con.execute("ROLLBACK")
+            raise
+
+        return stats
+
+    def replace_fingerprints(self, current: dict):
+        """Store fingerprints after a full build."""
+        self.con.execute(f"DELETE FROM {self.fingerprint_table}")
+        if not current:
+            return
+        self.insert(self.fingerprint_table, {'key': list(current), 'fingerprint': list(current.values())})
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""Build and use random-access seek indexes for the Texas RRC .ebc.gz files.
+
+An index is two sidecar files next to the data file:
+  <file>.gzidx          zran-style gzip access points (indexed_gzip export)
+  <file>.roots.pq       uncompressed byte offset of every root record, keyed
+                        by lease (P-4), API number (wellbore) or operator (P-5)
+
+The roots file records the size and modification time of the data file it was
+built from; once the data file is replaced (e.g. by `make rrc-update`) the
+index no longer counts as present until it is rebuilt.
+
+Usage:
+  rrc_index.py build data/p4f606.ebc.gz [data/dbf900.ebc.gz ...]
+  rrc_index.py show data/dbf900.ebc.gz 42-12345
+"""
+
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Optional
+
+import indexed_gzip
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+# Distance between gzip access points; a seek decompresses at most this much
+SPACING = 16 * 1024 * 1024
+BLOCK_BYTES = 64 * 1024 * 1024
+
+
+def p4_key(record: bytes) -> str:
+    """Lease key of a P-4 root record: oil_gas_code-district-lease_rrcid."""
+    decoded = record[2:11].decode('cp500')
+    return f"{decoded[0].strip()}-{int(decoded[1:3])}-{int(decoded[3:9])}"
+
+
+def wellbore_key(record: bytes) -> str:
+    """API key of a well bore root record: api_county-api_unique."""
+    decoded = record[2:10].decode('cp500')
+    return f"{int(decoded[0:3])}-{int(decoded[3:8])}"
+
+
+def p5_key(record: bytes) -> str:
+    """Operator number of a P-5 organization record."""
+    return str(int(record[2:8].decode('cp500')))
+
+
+@dataclass
+class Layout:
+    """Record layout of an RRC dataset, as far as the index needs it."""
+    record_length: int
+    root_id: bytes
+    key: Callable[[bytes], str]
+
+
+LAYOUTS = {
+    'p4f606': Layout(92, '01'.encode('cp500'), p4_key),
+    'dbf900': Layout(247, '01'.encode('cp500'), wellbore_key),
+    'orf850': Layout(350, 'A '.encode('cp500'), p5_key),
+}
+
+
+def layout_for(path) -> Layout:
+    name = Path(path).name.split('.')[0]
+    if name not in LAYOUTS:
+        raise ValueError(f"No record layout known for {path}")
+    return LAYOUTS[name]
+
+
+def gzip_index_path(path) -> Path:
+    return Path(f"{path}.gzidx")
+
+
+def roots_path(path) -> Path:
+    return Path(f"{path}.roots.pq")
+
+
+def source_stamp(path) -> dict:
+    """Size and modification time of a data file, as recorded in its roots file."""
+    stat = Path(path).stat()
+    return {'source_size': str(stat.st_size), 'source_mtime_ns': str(stat.st_mtime_ns)}
+
+
+def has_index(path) -> bool:
+    """Whether a file has both sidecars, built from its current contents."""
+    if not (gzip_index_path(path).exists() and roots_path(path).exists()):
+        return False
+    metadata = pq.read_schema(roots_path(path)).metadata or {}
+    recorded = {key: metadata.get(key.encode(), b'').decode() for key in ('source_size', 'source_mtime_ns')}
+    if recorded != source_stamp(path):
+        print(f"  Ignoring stale seek index for {path} (the file changed since it was built); "
+              f"run: rrc_index.py build {path}", file=sys.stderr)
+        return False
+    return True
+
+
+def normalize_key(path, key: str) -> str:
+    """Canonicalize a user-supplied key, e.g. 'O-08-012345' -> 'O-8-12345'."""
+    parts = key.split('-')
+    if Path(path).name.startswith('p4f606'):
+        return '-'.join([parts[0].upper()] + [str(int(p)) for p in parts[1:]])
+    return '-'.join(str(int(p)) for p in parts)
+
+
+def build_index(path, spacing: int = SPACING) -> int:
+    """Scan a file once, writing its gzip access points and root offsets."""
+    layout = layout_for(path)
+    stamp = source_stamp(path)
+    keys = []
+    offsets = []
+
+    with indexed_gzip.IndexedGzipFile(str(path), spacing=spacing) as f:
+        position = 0
+        pending = b''
+        while True:
+            block = f.read(BLOCK_BYTES)
+            data = pending + block
+            usable = len(data) - len(data) % layout.record_length
+            if usable:
+                records = np.frombuffer(data, dtype=np.uint8, count=usable).reshape(-1, layout.record_length)
+                is_root = (records[:, 0] == layout.root_id[0]) & (records[:, 1] == layout.root_id[1])
+                for i in np.flatnonzero(is_root):
+                    start = int(i) * layout.record_length
+                    keys.append(layout.key(data[start:start + layout.record_length]))
+                    offsets.append(position + start)
+            position += usable
+            pending = data[usable:]
+            if not block:
+                break
+
+        f.build_full_index()
+        f.export_index(str(gzip_index_path(path)))
+
+    table = pa.table({
+        'key': pa.array(keys, type=pa.string()),
+        'offset': pa.array(offsets, type=pa.int64()),
+    }).replace_schema_metadata(stamp)
+    pq.write_table(table, roots_path(path))
+    return len(keys)
+
+
+def open_indexed(path):
+    """Open a gzip file for random access using its prebuilt index."""
+    if not has_index(path):
+        raise FileNotFoundError(f"No up-to-date seek index for {path}; run: rrc_index.py build {path}")
+    return indexed_gzip.IndexedGzipFile(str(path), index_file=str(gzip_index_path(path)))
+
+
+def load_roots(path) -> pa.Table:
+    return pq.read_table(roots_path(path))
+
+
+def find_group(path, key: str, roots: Optional[pa.Table] = None) -> tuple:
+    """Byte range (start, end) of a root record and its children.
+
+    end is None when the group runs to the end of the file. Duplicate keys
+    resolve to their first occurrence.
+    """
+    roots = roots if roots is not None else load_roots(path)
+    key = normalize_key(path, key)
+    matches = pc.indices_nonzero(pc.equal(roots['key'], key)).to_pylist()
+    if not matches:
+        raise KeyError(f"{key} not found in {roots_path(path)}")
+    row = matches[0]
+    start = roots['offset'][row].as_py()
+    end = roots['offset'][row + 1].as_py() if row + 1 < roots.num_rows else None
+    return start, end
+
+
+def read_range(f, start: int, end: Optional[int], record_length: int) -> bytes:
+    """Read whole records between two uncompressed offsets of an open file."""
+    f.seek(start)
+    data = f.read() if end is None else f.read(end - start)
+    return data[:len(data) - len(data) % record_length]
+
+
+def read_group(path, key: str) -> bytes:
+    """Raw records (root plus children) for one lease, well or operator."""
+    with open_indexed(path) as f:
+        start, end = find_group(path, key)
+        return read_range(f, start, end, layout_for(path).record_length)
+
+
+def chunk_ranges(path, chunk_bytes: int) -> list:
+    """Split a file into (start, end) ranges of about chunk_bytes that each
+    begin at a root record, for parallel decompression and parsing."""
+    offsets = load_roots(path)['offset'].to_numpy()
+    if len(offsets) == 0:
+        return [(0, None)]
+    targets = np.arange(chunk_bytes, offsets[-1] + 1, chunk_bytes)
+    cuts = np.unique(offsets[np.minimum(np.searchsorted(offsets, targets), len(offsets) - 1)])
+    bounds = [0] + [int(c) for c in cuts if c > 0]
+    return list(zip(bounds, bounds[1:] + [None]))
+
+
+def main():
+    if len(sys.argv) < 3 or sys.argv[1] not in ('build', 'show'):
+        print(__doc__, file=sys.stderr)
+        sys.exit(1)
+
+    if sys.argv[1] == 'build':
+        for path in sys.argv[2:]:
+            print(f"Indexing {path}...")
+            count = build_index(path)
+            print(f"  {count:,} root records -> {gzip_index_path(path)}, {roots_path(path)}")
+        return
+
+    path, key = sys.argv[2], sys.argv[3]
+    layout = layout_for(path)
+    data = read_group(path, key)
+    for offset in range(0, len(data), layout.record_length):
+        print(data[offset:offset + layout.record_length].decode('cp500').rstrip())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""Run one pipeline stage and append a record of it to the run manifest.
+
+Wraps a stage of the Makefile: either a SQL file, fed to the duckdb CLI on
+stdin as `duckdb DATABASE < SQL_FILE` would, or any command after `--`. The
+record (one JSON line in the manifest) holds the wall time, exit status,
+peak RSS, rows per table of the database before and after the stage, and the
+size and SHA-256 of each --input and --output file. Records of one `make`
+invocation share its RUN_ID, so the manifest is a history of runs (see
+`make runs`).
+
+With --profile, every statement of the SQL file is profiled and the slowest
+one's DuckDB profile (total time and the slowest operators) is kept.
+
+Usage:
+  run_stage.py [--input=FILE ...] [--output=FILE ...] [--profile] STAGE DATABASE SQL_FILE
+  run_stage.py [--input=FILE ...] [--output=FILE ...] STAGE DATABASE -- COMMAND [ARG ...]
+
+The manifest is $MANIFEST (default data/run_manifest.jsonl).
+"""
+
+import datetime
+import hashlib
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import duckdb
+
+DEFAULT_MANIFEST = "data/run_manifest.jsonl"
+TOP_OPERATORS = 8
+
+
+def operator_timings(*profiles: dict) -> list:
+    """Total time per operator in DuckDB JSON profiles, slowest first."""
+    totals = {}
+
+    def visit(node):
+        name = node.get('operator_name', '').strip()
+        if name:
+            table = node.get('extra_info', {}).get('Table', '')
+            label = f"{name} {table}".strip()
+            timing, rows = totals.get(label, (0.0, 0))
+            totals[label] = (timing + node.get('operator_timing', 0.0), rows + node.get('operator_cardinality', 0))
+        for child in node.get('children', []):
+            visit(child)
+
+    for profile in profiles:
+        visit(profile)
+    ranked = sorted(totals.items(), key=lambda item: -item[1][0])
+    return [{'operator': label, 'seconds': round(timing, 3), 'rows': rows} for label, (timing, rows) in ranked]
+
+
+def table_rows(database: str) -> dict:
+    """Rows per table ('schema.table') of a database, {} if it does not exist yet."""
+    if not Path(database).exists():
+        return {}
+    con = duckdb.connect(database, read_only=True)
+    try:
+        rows = con.execute("""
+            SELECT schema_name || '.' || table_name, estimated_size
+            FROM duckdb_tables()
+            WHERE database_name = current_database() AND NOT temporary
+        """).fetchall()
+    finally:
+        con.close()
+    return dict(rows)
+
+
+def file_digest(path: str) -> dict:
+    sha256 = hashlib.sha256()
+    with open(path, 'rb') as f:
+        while chunk := f.read(1 << 20):
+            sha256.update(chunk)
+    return {'bytes': os.path.getsize(path), 'sha256': sha256.hexdigest()}
+
+
+def profiled_sql(sql: str, profile_dir: Path) -> str:
+    """The script with a JSON profile written for each statement."""
+    statements = [s for s in re.split(r';[ \t]*\n', sql) if s.strip()]
+    return ''.join(f"PRAGMA enable_profiling = 'json';\n"
+                   f"PRAGMA profiling_output = '{profile_dir / f'{i:04}.json'}';\n"
+                   f"{statement.rstrip().rstrip(';')};\n"
+                   for i, statement in enumerate(statements))
+
+
+def slowest_profile(profile_dir: Path, sql: str) -> dict:
+    """Summary of the slowest statement's profile."""
+    statements = [s for s in re.split(r';[ \t]*\n', sql) if s.strip()]
+    profiles = [(json.loads(path.read_text()), int(path.stem)) for path in sorted(profile_dir.glob('*.json'))]
+    if not profiles:
+        return None
+    profile, index = max(profiles, key=lambda p: p[0].get('latency', 0.0))
+    statement = next(line for line in statements[index].splitlines() if line.strip() and not line.startswith('--'))
+    return {
+        'statement': statement.strip(),
+        'query_seconds': round(profile.get('latency', 0.0), 3),
+        'operators': operator_timings(profile)[:TOP_OPERATORS],
+    }
+
+
+def append_record(record: dict):
+    """Append one stage record to the run manifest."""
+    manifest = Path(os.environ.get('MANIFEST') or DEFAULT_MANIFEST)
+    manifest.parent.mkdir(parents=True, exist_ok=True)
+    with open(manifest, 'a') as f:
+        f.write(json.dumps(record) + "\n")
+
+
+def run(command: list, stdin=None) -> tuple:
+    """Run a command to completion; return (exit status, seconds, peak RSS in MB)."""
+    start = time.perf_counter()
+    process = subprocess.Popen(command, stdin=stdin)
+    _, status, usage = os.wait4(process.pid, 0)
+    return os.waitstatus_to_exitcode(status), time.perf_counter() - start, usage.ru_maxrss / 1024
+
+
+def main():
+    args = sys.argv[1:]
+    command = []
+    if '--' in args:
+        command = args[args.index('--') + 1:]
+        args = args[:args.index('--')]
+    inputs = [arg.split('=', 1)[1] for arg in args if arg.startswith('--input=')]
+    outputs = [arg.split('=', 1)[1] for arg in args if arg.startswith('--output=')]
+    profile = '--profile' in args
+    positional = [arg for arg in args if not arg.startswith('--')]
+    if len(positional) != (2 if command else 3) or (profile and command):
+        print(__doc__.strip())
+        sys.exit(1)
+    stage, database = positional[:2]
+
+    record = {
+        'run_id': os.environ.get('RUN_ID'),
+        'stage': stage,
+        'database': database,
+        'started_at': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+        'inputs': {path: file_digest(path) for path in inputs},
+    }
+    rows_before = table_rows(database)
+
+    with tempfile.TemporaryDirectory(prefix="run_stage_") as tmp:
+        if command:
+            record['command'] = ' '.join(command)
+            status, seconds, peak_rss_mb = run(command)
+        else:
+            duckdb_cli = shutil.which('duckdb')
+            if not duckdb_cli:
+                raise SystemExit("The duckdb CLI is needed to run SQL stages")
+            sql_file = positional[2]
+            record['command'] = f"duckdb {database} < {sql_file}"
+            sql = Path(sql_file).read_text()
+            if profile:
+                script = Path(tmp) / "script.sql"
+                script.write_text(profiled_sql(sql, Path(tmp)))
+                sql_file = script
+            with open(sql_file) as stdin:
+                status, seconds, peak_rss_mb = run([duckdb_cli, database], stdin)
+            if profile:
+                record['profile'] = slowest_profile(Path(tmp), sql)
+
+    rows_after = table_rows(database)
+    record.update({
+        'status': status,
+        'seconds': round(seconds, 3),
+        'peak_rss_mb': round(peak_rss_mb, 1),
+        'outputs': {path: file_digest(path) for path in outputs if Path(path).exists()},
+        'rows_before': sum(rows_before.values()),
+        'rows_after': sum(rows_after.values()),
+        # Only the tables the stage changed
+        'tables': {
+            table: {'before': rows_before.get(table, 0), 'after': rows_after.get(table, 0)}
+            for table in sorted(rows_before.keys() | rows_after.keys())
+            if rows_before.get(table) != rows_after.get(table)
+        },
+    })
+
+    append_record(record)
+    sys.exit(status)
+
+
+if __name__ == '__main__':
+    main()
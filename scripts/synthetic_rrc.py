@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""Write synthetic Texas RRC EBCDIC dumps for offline testing and benchmarks.
+
+Generates p4f606.ebc.gz (P-4), orf850.ebc.gz (P-5) and dbf900.ebc.gz
+(wellbore) in the fixed-width cp500 record layouts of resources/*.txt,
+including signed zoned-decimal WGS84 and plane coordinates. The files refer
+to each other (wells → P-4 leases → P-5 operators), so the whole stage 1
+build, rrc.well_operator and attribution can run on them. Output is
+deterministic for a given size and seed.
+
+Usage:
+  synthetic_rrc.py [--wells=N] [--seed=N] output_dir
+"""
+
+import gzip
+import random
+import sys
+from pathlib import Path
+
+from rrc_index import LAYOUTS
+
+DEFAULT_WELLS = 100_000
+WELLS_PER_LEASE = 4
+WELLS_PER_OPERATOR = 100
+
+# Texas counties have odd codes 001-507 in API numbers
+COUNTIES = range(1, 508, 2)
+
+OPERATOR_NAMES = [
+    'PIONEER NATURAL RES USA, INC.', 'EOG RESOURCES, INC.', 'APACHE CORPORATION',
+    'DIAMONDBACK E&P LLC', 'COTERRA ENERGY INC.', 'XTO ENERGY INC.', 'ENTERPRISE CRUDE OIL LLC',
+    'TARGA MIDSTREAM SERVICES LLC', 'ENERGY TRANSFER CRUDE MARKETING', 'SMALL "A" OIL CO',
+]
+
+
+def text(value, width: int) -> str:
+    """Alphanumeric field, PIC X(width): left-justified, space-padded."""
+    return str(value)[:width].ljust(width)
+
+
+def number(value: int, width: int) -> str:
+    """Unsigned numeric field, PIC 9(width): zero-padded."""
+    return str(value).zfill(width)[-width:]
+
+
+def zoned(value: float, width: int, decimals: int) -> bytes:
+    """Signed zoned decimal, PIC S9(n)V9(decimals): sign in the last byte's zone."""
+    digits = str(round(abs(value) * 10 ** decimals)).zfill(width)[-width:]
+    zone = 0xD0 if value < 0 else 0xC0
+    return digits[:-1].encode('cp500') + bytes([zone | int(digits[-1])])
+
+
+def record(length: int, *fields) -> bytes:
+    """Concatenate str and bytes fields into one space-padded record."""
+    data = b''.join(f.encode('cp500') if isinstance(f, str) else f for f in fields)
+    assert len(data) <= length, (len(data), length)
+    return data + text('', length - len(data)).encode('cp500')
+
+
+class Universe:
+    """Operators, leases and well locations shared by the three files."""
+
+    def __init__(self, wells: int, seed: int):
+        r = random.Random(seed)
+        self.wells = wells
+
+        operators = max(10, wells // WELLS_PER_OPERATOR)
+        self.operators = r.sample(range(1, 1_000_000), operators)
+        self.operator_names = {
+            op: f"{r.choice(OPERATOR_NAMES)} {i}" if i >= len(OPERATOR_NAMES) else OPERATOR_NAMES[i]
+            for i, op in enumerate(self.operators)
+        }
+
+        # Oil leases have 5-digit numbers; gas RRC IDs are 6 digits, the
+        # first two being the district (see parse_wellbore.parse_well_id_record)
+        self.leases = []
+        for i in range(max(1, wells // WELLS_PER_LEASE)):
+            district = r.randint(1, 14)
+            if r.random() < 0.7:
+                self.leases.append(('O', district, 1 + i % 99_999))
+            else:
+                self.leases.append(('G', district, district * 10_000 + i % 10_000))
+
+        # Permian-like clusters of wells
+        self.clusters = [(r.uniform(27.0, 35.5), r.uniform(-104.5, -95.0), r.uniform(0.01, 0.2))
+                         for _ in range(max(1, wells // 2_000))]
+
+
+def write_p4(path, universe: Universe, seed: int) -> int:
+    r = random.Random(seed)
+    count = 0
+    with gzip.open(path, 'wb', compresslevel=1) as f:
+        for oil_gas_code, district, lease_rrcid in universe.leases:
+            operator = r.choice(universe.operators)
+            field_number = r.randint(1, 99_999_999)
+            records = [record(92, '01', oil_gas_code, number(district, 2), number(lease_rrcid, 6),
+                              number(field_number, 8), r.choice('YN'), number(operator, 6))]
+
+            for _ in range(r.randint(1, 3)):
+                year = r.randint(1980, 2025)
+                records.append(record(
+                    92, '02', number(r.randint(1, 99_999_999), 8), number(r.randint(1, 99_999_999), 8),
+                    number(year, 4), number(r.randint(1, 12), 2), number(r.randint(1, 28), 2),
+                    number(year, 4), number(r.randint(1, 12), 2), number(r.randint(1, 28), 2),
+                    ''.join(r.choice('YN') for _ in range(13)), text('', 3), r.choice('ORC'),
+                    number(field_number, 8), number(operator, 6), number(operator, 6)))
+
+                for _ in range(r.randint(0, 4)):
+                    percentage = r.randint(0, 10_000)
+                    records.append(record(
+                        92, '03', r.choice('OGHFP'), r.choice('GHI'), number(percentage, 5),
+                        number(r.choice(universe.operators), 6), number(r.randint(0, 9999), 4),
+                        r.choice('YN'), number(percentage, 5), r.choice('YN'), r.choice('YN')))
+
+            records.append(record(92, '07', number(r.randint(1, 99_999_999), 8),
+                                  number(r.randint(1, 99_999_999), 8),
+                                  text(f"{r.choice(['SMITH', 'JONES', 'UNIVERSITY', 'STATE'])} UNIT {lease_rrcid}", 32)))
+            f.write(b''.join(records))
+            count += len(records)
+    return count
+
+
+def write_p5(path, universe: Universe, seed: int) -> int:
+    r = random.Random(seed)
+    count = 0
+    with gzip.open(path, 'wb', compresslevel=1) as f:
+        for operator in sorted(universe.operators):
+            name = text(universe.operator_names[operator], 32)
+            records = [record(
+                350, 'A ', number(operator, 6), name, 'N', r.choice('AID'), 'N', 'P', r.choice('ACP'),
+                text('', 20), text(r.choice(['', 'G1234']), 5),
+                text('123 MAIN ST', 31), text('SUITE 100', 31), text('MIDLAND', 13), 'TX', number(79701, 5),
+                number(1234, 4), text('1 LOCATION ST', 31), text('', 31), text('ODESSA', 13), 'TX',
+                number(79760, 5), text('', 4),
+                f"{r.randint(1980, 2025)}{r.randint(1, 12):02}{r.randint(1, 28):02}", text('', 8),
+                number(r.randint(2_000_000_000, 9_999_999_999), 10))]
+
+            for _ in range(r.randint(0, 2)):
+                records.append(record(
+                    350, 'F ', number(operator, 6), name, text(r.choice(['GATHER', 'PURCH', 'TRANS']), 6),
+                    text('PO BOX 1', 31), text('', 31), text('HOUSTON', 13), 'TX', number(77001, 5), text('', 4)))
+            for _ in range(r.randint(0, 2)):
+                records.append(record(
+                    350, 'K ', number(operator, 6), name, text('JANE DOE', 32), text('PRESIDENT', 32),
+                    text('1 A ST', 31), text('', 31), text('DALLAS', 13), 'TX', number(75201, 5), text('', 4),
+                    text('', 86), 'L', 'TX', text(r.randint(10_000_000, 99_999_999), 20), 'O'))
+            for _ in range(r.randint(0, 2)):
+                records.append(record(
+                    350, 'U ', number(operator, 6), name, text('OPRS/G', 6),
+                    ''.join(r.choice('01') for _ in range(14))))
+            f.write(b''.join(records))
+            count += len(records)
+    return count
+
+
+def write_wellbore(path, universe: Universe, seed: int) -> int:
+    r = random.Random(seed)
+    count = 0
+    with gzip.open(path, 'wb', compresslevel=1) as f:
+        for i in range(universe.wells):
+            county = COUNTIES[i % len(COUNTIES)]
+            unique = 1 + i // len(COUNTIES)
+            records = [record(
+                247, '01', number(county, 3), number(unique, 5), text('', 4), number(r.randint(1, 14), 2),
+                number(county, 3), text('', 1), number(r.choice([19, 20]), 2), number(r.randint(0, 99), 2),
+                number(r.randint(1, 12), 2), number(r.randint(1, 28), 2), number(r.randint(0, 99_999), 5),
+                text('', 47), number(r.randint(0, 999_999), 6), text('', 3), r.choice('YN'), r.choice('YN'),
+                text('', 8), r.choice('YN'))]
+
+            if r.random() < 0.95:
+                if r.random() < 0.97:
+                    lat, lon, spread = r.choice(universe.clusters)
+                    lat, lon = r.gauss(lat, spread), r.gauss(lon, spread)
+                else:
+                    lat = lon = 0.0  # located by survey only
+                records.append(record(
+                    247, '13', number(county, 3), text(r.randint(1, 9999), 6), text('T&P RR CO', 55),
+                    text(r.randint(1, 99), 10), text(r.randint(1, 99), 8), text('', 4), text('', 6),
+                    text(r.choice(['660', '1320', '467.5']), 6), text('N', 13),
+                    text(r.choice(['660', '1320']), 6), text('E', 13),
+                    zoned(lat, 10, 7), zoned(lon, 10, 7), text('', 5), number(r.choice([41, 42]), 2),
+                    zoned(r.uniform(0, 3e6), 10, 2), zoned(r.uniform(0, 1e7), 10, 2), r.choice('YNC')))
+
+            for _ in range(r.choice([0, 1, 1, 1, 1, 1, 1, 1, 2])):
+                oil_gas_code, district, lease_rrcid = r.choice(universe.leases)
+                if oil_gas_code == 'O':
+                    records.append(record(247, '21', 'O', number(district, 2), number(lease_rrcid, 5),
+                                          text(r.randint(1, 99), 6)))
+                else:
+                    records.append(record(247, '21', 'G', number(lease_rrcid, 6)))
+            f.write(b''.join(records))
+            count += len(records)
+    return count
+
+
+FILES = {
+    'p4f606.ebc.gz': write_p4,
+    'orf850.ebc.gz': write_p5,
+    'dbf900.ebc.gz': write_wellbore,
+}
+
+
+def write_all(output_dir, wells: int = DEFAULT_WELLS, seed: int = 0) -> dict:
+    """Write all three dumps; return the number of records in each file."""
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    universe = Universe(wells, seed)
+    return {name: write(output_dir / name, universe, seed) for name, write in FILES.items()}
+
+
+def main():
+    wells = DEFAULT_WELLS
+    seed = 0
+    args = []
+    for arg in sys.argv[1:]:
+        if arg.startswith('--wells='):
+            wells = int(arg.split('=', 1)[1])
+        elif arg.startswith('--seed='):
+            seed = int(arg.split('=', 1)[1])
+        else:
+            args.append(arg)
+    if len(args) != 1:
+        print(__doc__.strip())
+        sys.exit(1)
+
+    for name, count in write_all(args[0], wells, seed).items():
+        record_length = LAYOUTS[name.split('.')[0]].record_length
+        print(f"  {name}: {count:,} records ({count * record_length / 1e6:,.1f} MB uncompressed)")
+    print(f"Output: {args[0]}")
+
+
+if __name__ == '__main__':
+    main()